@@ -0,0 +1,245 @@
+# Benchmark untuk Sistem Promosi Otomatis Supermarket Jack
+
+import argparse
+import json, os, platform, random, sys, tempfile, time
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+import supermarket_optimizer as so
+
+# =======================================================
+# GENERATOR DATA SINTETIS
+# =======================================================
+def synthetic_stores(n: int, seed: int = 42) -> List[dict]:
+    # Distribusi mengikuti rentang STORES asli (Exhibit 1)
+    rng = random.Random(seed)
+    return [{"store_id": i, "open_year": rng.randint(2010, 2025), "size_m2": rng.randint(150, 350),
+             "sku_count": rng.randint(6000, 19000), "employees": rng.randint(3, 8)} for i in range(1, n+1)]
+
+def synthetic_categories(n: int, seed: int = 42) -> so.CategoryTable:
+    # n <= jumlah kategori bawaan: pakai kategori asli; selebihnya baris turunan dari kategori induk acak
+    rng = random.Random(seed)
+    builtin = so.CATEGORIES_BUILTIN
+    records = [{"name": c[0]} for c in builtin[:n]]
+    for i in range(len(records), n):
+        parent = rng.choice(builtin)
+        records.append({"name": f"{parent[0]} #{i:05d}", "category": parent[0],
+                        "weekly_sales": round(parent[3] * rng.uniform(0.05, 1.0), 1),
+                        "price": round(so.avg_price(parent[0]) * rng.uniform(0.6, 1.6))})
+    return so.compile_category_table(records)
+
+def use_tables(n_stores: int, n_categories: int, seed: int = 42):
+    so.set_stores(synthetic_stores(n_stores, seed) if n_stores != len(so.STORES_BUILTIN) else so.STORES_BUILTIN)
+    so.set_category_table(synthetic_categories(n_categories, seed))
+
+def timed(fn, repeat: int = 1) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+# =======================================================
+# BENCHMARK SOLVER: GREEDY vs EXACT
+# =======================================================
+def solver_inputs(days: List[date]) -> List[tuple]:
+    # Kandidat per (hari, toko) dihitung sekali, sehingga yang diukur hanya tahap pemilihan
+    inputs = []
+    for day in days:
+        events = so.day_events(day)
+        scales = so.store_scales()
+        for store in so.STORES:
+            table, order = so.store_candidates_scalar(day, store, events, scales.get(store["store_id"]))
+            inputs.append(([so.category_group(table.category[i]) for i in order],
+                           [table.incremental_profit[i] for i in order], so.max_promos_for(store)))
+    return inputs
+
+def bench_solvers(days: List[date], targets: List[int], repeat: int = 3) -> List[Dict]:
+    inputs = solver_inputs(days)
+    results = []
+    for target in targets:
+        for name, solver in so.SOLVERS.items():
+            best = float("inf"); profit = 0.0; promos = 0
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                picks = [solver(g, p, mp, target) for g, p, mp in inputs]
+                best = min(best, time.perf_counter() - t0)
+            for (g, p, mp), chosen in zip(inputs, picks):
+                profit += sum(p[i] for i in chosen); promos += len(chosen)
+            results.append({"target": target, "solver": name, "solves": len(inputs),
+                            "us_per_store": best / len(inputs) * 1e6, "profit": profit, "promos": promos})
+    return results
+
+def print_solver_results(results: List[Dict]):
+    print("Target".rjust(12) + "Solver".rjust(8) + "Solves".rjust(8) + "µs/toko".rjust(10) +
+          "Total Profit".rjust(20) + "Promos".rjust(8) + "vs greedy".rjust(11))
+    print("-"*77)
+    greedy = {r["target"]: r["profit"] for r in results if r["solver"] == "greedy"}
+    for r in results:
+        gain = (r["profit"] / greedy[r["target"]] - 1) * 100 if greedy.get(r["target"]) else 0.0
+        print(f"{r['target']:>12,}{r['solver']:>8}{r['solves']:>8}{r['us_per_store']:>10.1f}"
+              f"{so.format_idr(r['profit']):>20}{r['promos']:>8}{gain:>10.2f}%")
+
+# =======================================================
+# BENCHMARK GRID DISKON: TANGGA vs GRID HALUS
+# =======================================================
+def bench_discount_grids(days: List[date], target: int) -> List[Dict]:
+    results = []
+    for name in so.DISCOUNT_GRIDS:
+        so.set_discount_grid(name)
+        profit = 0.0; promos = 0; mix = {}
+        t0 = time.perf_counter()
+        for day in days:
+            for chosen in so.choose_day(day, target).values():
+                profit += sum(o.incremental_profit for o in chosen); promos += len(chosen)
+                for o in chosen:
+                    mix[o.promo_type] = mix.get(o.promo_type, 0) + 1
+        results.append({"grid": name, "slots": len(so.LADDER), "seconds": time.perf_counter() - t0,
+                        "profit": profit, "promos": promos, "mix": mix})
+    so.set_discount_grid("ladder")
+    return results
+
+def print_grid_results(results: List[Dict]):
+    print("Grid".rjust(8) + "Slot".rjust(6) + "Detik".rjust(9) + "Total Profit".rjust(20) + "Promos".rjust(8) +
+          "vs ladder".rjust(11) + "  Mix")
+    print("-"*80)
+    ladder = next(r["profit"] for r in results if r["grid"] == "ladder")
+    for r in results:
+        gain = (r["profit"] / ladder - 1) * 100 if ladder else 0.0
+        mix = ", ".join(f"{k} {v}" for k, v in sorted(r["mix"].items()))
+        print(f"{r['grid']:>8}{r['slots']:>6}{r['seconds']:>9.2f}{so.format_idr(r['profit']):>20}"
+              f"{r['promos']:>8}{gain:>10.2f}%  {mix}")
+
+# =======================================================
+# BENCHMARK SUITE & BASELINE
+# =======================================================
+BENCH_DAY = date(2025, 11, 11)
+
+def bench_case(n_stores: int, n_categories: int, horizon: int, workers: int, repeat: int) -> Dict:
+    use_tables(n_stores, n_categories)
+    store = so.STORES[0]
+    events = so.day_events(BENCH_DAY)
+    sample = so.CATEGORIES[:min(len(so.CATEGORIES), 2000)]
+    t_opts = timed(lambda: [so.compute_options_for_category(BENCH_DAY, store, c, events, 1_000_000)
+                            for c in sample], repeat)
+    result = {}
+    t_pick = timed(lambda: result.update(plan=so.pick_daily_plan(BENCH_DAY, 1_000_000)), repeat)
+    plan_rows, sum_rows, _ = result["plan"]
+    with tempfile.TemporaryDirectory() as tmp:
+        t_csv = timed(lambda: (so.write_csv(os.path.join(tmp, "plan.csv"), plan_rows),
+                               so.write_csv(os.path.join(tmp, "summary.csv"), sum_rows)), repeat)
+        days = so.horizon_days(BENCH_DAY, BENCH_DAY + timedelta(days=horizon - 1))
+        def full_run():
+            with so.open_sink(os.path.join(tmp, "plan.csv"), "plan") as plan_out, \
+                 so.open_sink(os.path.join(tmp, "summary.csv"), "summary") as sum_out:
+                so.plan_horizon(days, 1_000_000, workers, plan_out, sum_out)
+        t_run = timed(full_run, 1)
+    so.close_store_pool()
+    return {
+        "stores": n_stores, "categories": n_categories, "horizon": horizon,
+        "metrics": {
+            "compute_options_us_per_call": t_opts / len(sample) * 1e6,
+            "pick_daily_plan_s": t_pick,
+            "write_csv_s": t_csv,
+            "write_csv_rows_per_s": (len(plan_rows) + len(sum_rows)) / t_csv if t_csv else 0.0,
+            "full_run_s": t_run,
+            "full_run_s_per_day": t_run / horizon,
+        },
+    }
+
+def run_suite(stores: List[int], categories: List[int], horizons: List[int], workers: int, repeat: int) -> Dict:
+    cases = []
+    for n_s in stores:
+        for n_c in categories:
+            for h in horizons:
+                case = bench_case(n_s, n_c, h, workers, repeat)
+                m = case["metrics"]
+                print(f" stores={n_s:>5} categories={n_c:>6} horizon={h:>4} | "
+                      f"options {m['compute_options_us_per_call']:8.1f} µs/call | "
+                      f"pick {m['pick_daily_plan_s']*1000:9.1f} ms | csv {m['write_csv_s']*1000:7.1f} ms | "
+                      f"run {m['full_run_s']:8.2f} s")
+                cases.append(case)
+    return {
+        "version": 1, "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count(), "numpy": getattr(so.load_numpy(), "__version__", None),
+                        "engine": so.resolve_engine(), "solver": so.SOLVER, "workers": workers},
+        "cases": cases,
+    }
+
+def compare_baselines(old: Dict, new: Dict, threshold: float) -> int:
+    # Semua metrik waktu: naik = lebih lambat; metrik *_per_s: turun = lebih lambat
+    key = lambda c: (c["stores"], c["categories"], c["horizon"])
+    old_cases = {key(c): c for c in old["cases"]}
+    regressions = 0
+    print("Kasus".ljust(24) + "Metrik".ljust(30) + "Lama".rjust(14) + "Baru".rjust(14) + "Delta".rjust(10))
+    print("-"*92)
+    for case in new["cases"]:
+        base = old_cases.get(key(case))
+        if base is None: continue
+        label = "{}s/{}c/{}d".format(*key(case))
+        for metric, value in case["metrics"].items():
+            before = base["metrics"].get(metric)
+            if not before: continue
+            delta = (value / before - 1) * 100
+            worse = -delta if metric.endswith("_per_s") else delta
+            flag = "  REGRESI" if worse > threshold else ("  lebih cepat" if worse < -threshold else "")
+            regressions += worse > threshold
+            print(f"{label.ljust(24)}{metric.ljust(30)}{before:>14.4f}{value:>14.4f}{delta:>9.1f}%{flag}")
+    print(f"\n{regressions} regresi di atas ambang {threshold:.0f}%")
+    return regressions
+
+def int_list(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Sistem Promosi Otomatis Supermarket Jack")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("solver", help="Bandingkan runtime dan profit solver greedy vs exact")
+    p.add_argument("--start", type=str, default="2025-01-01", help="Tanggal awal (YYYY-MM-DD)")
+    p.add_argument("--days", type=int, default=30, help="Jumlah hari")
+    p.add_argument("--targets", type=str, default="1000000,3000000,5000000",
+                   help="Daftar target per toko, dipisah koma")
+    p = sub.add_parser("grid", help="Bandingkan profit & runtime tangga diskon vs grid halus")
+    p.add_argument("--start", type=str, default="2025-01-01", help="Tanggal awal (YYYY-MM-DD)")
+    p.add_argument("--days", type=int, default=30, help="Jumlah hari")
+    p.add_argument("--target", type=int, default=1_000_000, help="Target per toko")
+    p.add_argument("--engine", choices=["auto", "numpy", "scalar"], default="auto")
+    p = sub.add_parser("run", help="Jalankan benchmark suite dan simpan baseline JSON")
+    p.add_argument("--stores", type=str, default="7,100", help="Ukuran jaringan toko, contoh 7,100,2000")
+    p.add_argument("--categories", type=str, default="49,1000", help="Ukuran katalog, contoh 49,1000,20000")
+    p.add_argument("--horizons", type=str, default="1,30", help="Panjang horizon hari, contoh 1,30,365")
+    p.add_argument("--workers", type=int, default=1, help="Jumlah proses untuk run horizon")
+    p.add_argument("--repeat", type=int, default=3, help="Ulangan per pengukuran (diambil yang tercepat)")
+    p.add_argument("--engine", choices=["auto", "numpy", "scalar"], default="auto")
+    p.add_argument("--solver", choices=sorted(so.SOLVERS), default=so.SOLVER)
+    p.add_argument("--out", type=str, default="benchmark_baseline.json", help="File baseline JSON")
+    p = sub.add_parser("compare", help="Bandingkan dua baseline JSON")
+    p.add_argument("old", type=str)
+    p.add_argument("new", type=str)
+    p.add_argument("--threshold", type=float, default=10.0, help="Ambang regresi dalam persen")
+    args = parser.parse_args()
+    if args.command == "run":
+        so.ENGINE = so.resolve_engine(args.engine)
+        so.SOLVER = args.solver
+        so.STORE_WORKERS = max(1, args.workers)
+        report = run_suite(int_list(args.stores), int_list(args.categories), int_list(args.horizons),
+                           args.workers, args.repeat)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline disimpan: {args.out}")
+    elif args.command == "compare":
+        with open(args.old, encoding="utf-8") as f: old = json.load(f)
+        with open(args.new, encoding="utf-8") as f: new = json.load(f)
+        sys.exit(1 if compare_baselines(old, new, args.threshold) else 0)
+    elif args.command == "grid":
+        so.ENGINE = so.resolve_engine(args.engine)
+        start = date.fromisoformat(args.start)
+        print_grid_results(bench_discount_grids([start + timedelta(days=k) for k in range(args.days)], args.target))
+    elif args.command == "solver":
+        start = date.fromisoformat(args.start)
+        days = [start + timedelta(days=k) for k in range(args.days)]
+        targets = [int(t) for t in args.targets.split(",")]
+        print_solver_results(bench_solvers(days, targets))
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,26 @@
 import argparse
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import List, Dict, Tuple
-import csv, os, random
+from typing import List, Dict, Tuple, FrozenSet
+import csv, hashlib, json, math, os, random, sys, time
+from contextlib import contextmanager
+from array import array
+import multiprocessing
+from collections import OrderedDict
+
+# numpy opsional dan dimuat saat pertama dibutuhkan (load_numpy); tanpa numpy dipakai engine skalar
+np = None
+_NUMPY_MISSING = False
+
+def load_numpy():
+    global np, _NUMPY_MISSING
+    if np is None and not _NUMPY_MISSING:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            _NUMPY_MISSING = True
+    return np
 
 random.seed(42)
 
@@ -80,8 +98,7 @@ CATEGORIES = [
 # =======================================================
 # PARAMETER: HARGA, MARGIN, ELASTISITAS (berdasarkan harga rata-rata pasar Indonesia)
 # =======================================================
-def avg_price(category: str) -> int:
-    mapping = {
+AVG_PRICE = {
         "Beras": 18000, "Gula": 13000, "Garam": 2500, "Minyak Goreng": 15000, "Bihun": 7000,
         "Air Mineral": 3000, "Soda": 7000, "Minuman Isotonik": 9000, "Jus Kemasan": 8000,
         "Teh": 8000, "Kopi Bubuk": 22000, "Kopi Kemasan": 12000,
@@ -96,11 +113,12 @@ def avg_price(category: str) -> int:
         "Daging Segar": 35000, "Seafood Segar": 45000, "Sayur-Sayuran": 8000, 
         "Buah-Buahan": 12000, "Telur": 25000,
     }
-    return mapping.get(category, 12000)
 
-def realistic_margins(category: str) -> float:
-    # Struktur margin
-    margins = {
+def avg_price(category: str) -> int:
+    return AVG_PRICE.get(category, 12000)
+
+# Struktur margin
+MARGINS = {
         "Beras": 0.08, "Gula": 0.10, "Garam": 0.12, "Minyak Goreng": 0.15,
         "Air Mineral": 0.18, "Mie Instan": 0.20,
         "Soda": 0.22, "Minuman Isotonik": 0.25, "Jus Kemasan": 0.24, 
@@ -119,11 +137,12 @@ def realistic_margins(category: str) -> float:
         "Telur": 0.18,
         "Buah Kering": 0.42, "Bihun": 0.25
     }
-    return margins.get(category, 0.25)
 
-def realistic_elasticity(category: str, brands: int) -> float:
-    # Kategori elastisitas berdasarkan perilaku kategori
-    base_elasticity = {
+def realistic_margins(category: str) -> float:
+    return MARGINS.get(category, 0.25)
+
+# Kategori elastisitas berdasarkan perilaku kategori
+BASE_ELASTICITY = {
         "Beras": 0.3, "Gula": 0.35, "Garam": 0.25, "Minyak Goreng": 0.4,
         "Mie Instan": 0.6, "Bihun": 0.5,
         "Air Mineral": 0.7, "Soda": 0.9, "Teh": 0.6, "Kopi Kemasan": 0.8,
@@ -140,7 +159,9 @@ def realistic_elasticity(category: str, brands: int) -> float:
         "Penyedap Rasa": 0.4, "Kaldu Jamur": 0.6, "Selai": 0.8,
         "Sarden Kaleng": 0.6, "Kornet": 0.7, "Buah Kering": 1.0,
     }
-    base = base_elasticity.get(category, 0.8)
+
+def realistic_elasticity(category: str, brands: int) -> float:
+    base = BASE_ELASTICITY.get(category, 0.8)
     if brands > 20:
         brand_multiplier = 1.15
     elif brands > 15:
@@ -151,30 +172,233 @@ def realistic_elasticity(category: str, brands: int) -> float:
         brand_multiplier = 1.0
     return min(base * brand_multiplier, 1.5)
 
+# Trade support  berdasarkan kategori dan perilaku pemasok
+HIGH_SUPPORT = {"Sereal", "Biskuit", "Cokelat", "Susu Bubuk", 
+                "Kopi Bubuk", "Minuman Isotonik", "Soda", "Ice Cream"}
+MEDIUM_SUPPORT = {"Sirup", "Jus Kemasan", "Keripik", "Pasta", 
+                  "Mayones", "Saos", "Selai", "Buah Kering", "Permen"}
+LOW_SUPPORT = {"Nugget", "Seafood Segar", "Daging Segar", "Keju",
+               "Beras", "Gula", "Minyak Goreng", "Air Mineral"}
+# Diskon mulai dari ambang ini mendapat porsi trade support yang lebih tinggi
+TRADE_SUPPORT_STEP = 0.25
+
 def realistic_trade_support(category: str, discount: float) -> float:
-    # Trade support  berdasarkan kategori dan perilaku pemasok
-    high_support = {"Sereal", "Biskuit", "Cokelat", "Susu Bubuk", 
-                   "Kopi Bubuk", "Minuman Isotonik", "Soda", "Ice Cream"}
-    medium_support = {"Sirup", "Jus Kemasan", "Keripik", "Pasta", 
-                     "Mayones", "Saos", "Selai", "Buah Kering", "Permen"}
-    low_support = {"Nugget", "Seafood Segar", "Daging Segar", "Keju",
-                  "Beras", "Gula", "Minyak Goreng", "Air Mineral"}
-    if category in high_support:
-        return 0.35 if discount >= 0.25 else 0.30
-    elif category in medium_support:
-        return 0.25 if discount >= 0.25 else 0.20
-    elif category in low_support:
-        return 0.15 if discount >= 0.25 else 0.10
+    if category in HIGH_SUPPORT:
+        return 0.35 if discount >= TRADE_SUPPORT_STEP else 0.30
+    elif category in MEDIUM_SUPPORT:
+        return 0.25 if discount >= TRADE_SUPPORT_STEP else 0.20
+    elif category in LOW_SUPPORT:
+        return 0.15 if discount >= TRADE_SUPPORT_STEP else 0.10
     else:
         return 0.20
 
+TRADE_CATEGORIES = {
+    "Soda", "Minuman Isotonik", "Jus Kemasan", "Keripik", "Biskuit", "Cokelat",
+    "Sereal", "Susu Kemasan", "Yogurt", "Kopi Kemasan", "Kopi Bubuk", "Teh",
+    "Ice Cream", "Buah Kering", "Selai", "Sirup"
+}
+
 def trade_eligible(category: str, brands: int) -> bool:
     # Menentukan apakah sebuah kategori eligible untuk trade promotion
-    return (brands >= 8) or (category in {
-        "Soda", "Minuman Isotonik", "Jus Kemasan", "Keripik", "Biskuit", "Cokelat",
-        "Sereal", "Susu Kemasan", "Yogurt", "Kopi Kemasan", "Kopi Bubuk", "Teh",
-        "Ice Cream", "Buah Kering", "Selai", "Sirup"
-    })
+    return (brands >= 8) or (category in TRADE_CATEGORIES)
+
+# Kelompok kategori untuk batas keragaman promosi per toko
+CATEGORY_GROUPS = {
+    "Staples":     {"Beras","Gula","Garam","Minyak Goreng","Bihun","Pasta","Mie Instan"},
+    "Beverage":    {"Air Mineral","Soda","Minuman Isotonik","Jus Kemasan","Teh","Kopi Bubuk","Kopi Kemasan"},
+    "Snack":       {"Biskuit","Keripik","Permen","Gulali","Cokelat","Kuaci","Marshmallow","Makaroni","Roti","Sereal","Kacang"},
+    "DairyFrozen": {"Susu Bubuk","Susu Kemasan","Yogurt","Keju","Mentega","Krim","Ice Cream"},
+    "FrozenMeal":  {"Nugget","Kentang Goreng"},
+    "Fresh":       {"Daging Segar","Seafood Segar","Sayur-Sayuran","Buah-Buahan","Buah Kering","Telur"},
+    "Condiment":   {"Sirup","Saos","Kecap","Penyedap Rasa","Kaldu Jamur","Mayones","Selai","Kornet","Sarden Kaleng"},
+}
+GROUP_NAMES = list(CATEGORY_GROUPS) + ["Other"]
+_GROUP_OF = {cat: g for g, cats in CATEGORY_GROUPS.items() for cat in cats}
+
+def group_of(cat: str) -> str:
+    return _GROUP_OF.get(cat, "Other")
+
+# =======================================================
+# TABEL PARAMETER KATEGORI/SKU TERKOMPILASI
+# =======================================================
+# Kolom parameter numerik CategoryTable (fingerprint & kunci memo per baris)
+PARAM_COLUMNS = ("sku", "brands", "weekly_sales", "weekly_promos", "price", "margin", "elasticity",
+                 "support_lo", "support_hi", "eligible", "group")
+
+class CategoryTable:
+    # Parameter per baris (kategori atau SKU) disimpan sebagai kolom array bertipe;
+    # id integer = posisi baris, sehingga lookup cukup berupa akses indeks
+    def __init__(self):
+        self.names: List[str] = []          # label baris (kategori atau SKU)
+        self.parents: List[str] = []        # kategori induk (untuk default & grouping)
+        self.ids: Dict[str, int] = {}
+        self.sku = array("i")
+        self.brands = array("i")
+        self.weekly_sales = array("d")
+        self.weekly_promos = array("d")
+        self.price = array("d")
+        self.margin = array("d")
+        self.elasticity = array("d")
+        self.support_lo = array("d")        # porsi trade support untuk diskon < TRADE_SUPPORT_STEP
+        self.support_hi = array("d")        # porsi trade support untuk diskon >= TRADE_SUPPORT_STEP
+        self.eligible = array("b")
+        self.group = array("i")             # indeks ke GROUP_NAMES
+        self.suppliers: List[str] = []      # pemasok (opsional, untuk anggaran trade); tidak memengaruhi rencana
+        self._np = None
+        self._fingerprint = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getstate__(self):
+        state = dict(self.__dict__); state["_np"] = None
+        return state
+
+    def fingerprint(self) -> str:
+        # Hash isi tabel; berubah bila parameter apa pun berubah (dipakai sebagai kunci cache)
+        if self._fingerprint is None:
+            h = hashlib.sha256()
+            h.update("\x1f".join(self.names).encode()); h.update(b"\x1e")
+            h.update("\x1f".join(self.parents).encode())
+            for col in PARAM_COLUMNS:
+                h.update(col.encode()); h.update(getattr(self, col).tobytes())
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    def add(self, name: str, parent: str, sku: int, brands: int, weekly_sales: float, weekly_promos: float,
+            price: float, margin: float, elasticity: float, support_lo: float, support_hi: float,
+            eligible: bool, group: str, supplier: str = "") -> int:
+        if name in self.ids:
+            raise ValueError(f"baris kategori/SKU duplikat: {name}")
+        cid = self.ids[name] = len(self.names)
+        self.names.append(name); self.parents.append(parent); self.suppliers.append(supplier)
+        self.sku.append(int(sku)); self.brands.append(int(brands))
+        self.weekly_sales.append(float(weekly_sales)); self.weekly_promos.append(float(weekly_promos))
+        self.price.append(float(price)); self.margin.append(float(margin))
+        self.elasticity.append(float(elasticity))
+        self.support_lo.append(float(support_lo)); self.support_hi.append(float(support_hi))
+        self.eligible.append(1 if eligible else 0)
+        self.group.append(GROUP_NAMES.index(group) if group in GROUP_NAMES else len(GROUP_NAMES) - 1)
+        self._np = None
+        self._fingerprint = None
+        return cid
+
+    def trade_support(self, cid: int, discount: float) -> float:
+        return self.support_hi[cid] if discount >= TRADE_SUPPORT_STEP else self.support_lo[cid]
+
+    def param_rows(self) -> List[tuple]:
+        # Seluruh parameter per baris sebagai tuple (kunci memo per kategori)
+        cols = [self.names, self.parents] + [getattr(self, c) for c in PARAM_COLUMNS]
+        return list(zip(*cols))
+
+    def take(self, ids: List[int]) -> "CategoryTable":
+        # Sub-tabel berisi baris ids (urutan sesuai ids)
+        table = CategoryTable()
+        for i in ids:
+            table.add(self.names[i], self.parents[i], self.sku[i], self.brands[i], self.weekly_sales[i],
+                      self.weekly_promos[i], self.price[i], self.margin[i], self.elasticity[i], self.support_lo[i],
+                      self.support_hi[i], bool(self.eligible[i]), GROUP_NAMES[self.group[i]], self.suppliers[i])
+        return table
+
+    def rows(self) -> list:
+        # Format tuple lama (kategori, sku, merek, penjualan_mingguan, promosi_mingguan)
+        return [(self.names[i], self.sku[i], self.brands[i], self.weekly_sales[i], self.weekly_promos[i])
+                for i in range(len(self))]
+
+    def arrays(self) -> Dict[str, "np.ndarray"]:
+        # View numpy (zero-copy) atas kolom array; dibuat sekali per tabel
+        if self._np is None:
+            self._np = {k: np.frombuffer(getattr(self, k), dtype=float)
+                        for k in ("weekly_sales", "price", "margin", "elasticity", "support_lo", "support_hi")}
+            self._np["eligible"] = np.frombuffer(self.eligible, dtype=np.int8).astype(bool)
+            self._np["group"] = np.frombuffer(self.group, dtype=np.intc).astype(np.intp)
+        return self._np
+
+def default_category_params(category: str, brands: int) -> Dict:
+    # Parameter bawaan dari tabel realistis di atas
+    return {
+        "price": avg_price(category), "margin": realistic_margins(category),
+        "elasticity": realistic_elasticity(category, brands),
+        "trade_support_low": realistic_trade_support(category, 0.0),
+        "trade_support_high": realistic_trade_support(category, TRADE_SUPPORT_STEP),
+        "trade_eligible": trade_eligible(category, brands), "group": group_of(category),
+    }
+
+def compile_category_table(records: List[Dict]) -> CategoryTable:
+    # Setiap record minimal punya "name"; kolom lain opsional dan diwarisi dari kategori induk
+    # ("category") di CATEGORIES atau dari parameter bawaan
+    builtin = {c[0]: c for c in CATEGORIES_BUILTIN}
+    table = CategoryTable()
+    for rec in records:
+        name = str(rec["name"]).strip()
+        parent = str(rec.get("category") or name).strip()
+        base_row = builtin.get(parent)
+        def num(key, idx, cast, default=None):
+            v = rec.get(key)
+            if v not in (None, ""): return cast(v)
+            if base_row is not None: return base_row[idx]
+            if default is not None: return default
+            raise ValueError(f"{name}: kolom '{key}' wajib untuk kategori di luar CATEGORIES")
+        sku = num("sku_count", 1, int, 1)
+        brands = num("brands", 2, int, 1)
+        wk_sales = num("weekly_sales", 3, float)
+        wk_promos = num("weekly_promos", 4, float, 0)
+        params = default_category_params(parent, brands)
+        for key in ("price", "margin", "elasticity", "trade_support_low", "trade_support_high"):
+            if rec.get(key) not in (None, ""): params[key] = float(rec[key])
+        if rec.get("trade_eligible") not in (None, ""):
+            params["trade_eligible"] = str(rec["trade_eligible"]).strip().lower() in ("1", "true", "yes", "y", "ya")
+        if rec.get("group") not in (None, ""): params["group"] = str(rec["group"]).strip()
+        table.add(name, parent, sku, brands, wk_sales, wk_promos, params["price"], params["margin"],
+                  params["elasticity"], params["trade_support_low"], params["trade_support_high"],
+                  params["trade_eligible"], params["group"], str(rec.get("supplier") or "").strip())
+    return table
+
+def read_records(path: str) -> List[Dict]:
+    # CSV (header = nama kolom) atau JSON (list objek, atau objek dengan satu list di dalamnya)
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = next(v for v in data.values() if isinstance(v, list))
+        return data
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+CATEGORIES_BUILTIN = CATEGORIES
+PARAMS = compile_category_table([{"name": c[0]} for c in CATEGORIES])
+
+def set_category_table(table: CategoryTable):
+    global PARAMS, CATEGORIES
+    PARAMS = table
+    CATEGORIES = table.rows()
+
+def load_category_table(path: str) -> CategoryTable:
+    table = compile_category_table(read_records(path))
+    set_category_table(table)
+    return table
+
+# Kolom file tabel kategori; nama sama dengan yang dibaca compile_category_table
+CATEGORY_COLUMNS = ("name", "category", "sku_count", "brands", "weekly_sales", "weekly_promos", "price", "margin",
+                    "elasticity", "trade_support_low", "trade_support_high", "trade_eligible", "group", "supplier")
+
+def category_records(table: CategoryTable) -> List[Dict]:
+    return [{"name": table.names[i], "category": table.parents[i], "sku_count": table.sku[i],
+             "brands": table.brands[i], "weekly_sales": table.weekly_sales[i], "weekly_promos": table.weekly_promos[i],
+             "price": table.price[i], "margin": table.margin[i], "elasticity": table.elasticity[i],
+             "trade_support_low": table.support_lo[i], "trade_support_high": table.support_hi[i],
+             "trade_eligible": int(table.eligible[i]), "group": GROUP_NAMES[table.group[i]],
+             "supplier": table.suppliers[i]} for i in range(len(table))]
+
+def write_category_table(path: str, table: CategoryTable, extra: Dict[str, Dict] = None):
+    # Menulis tabel lengkap (bisa dibaca ulang dengan --categories); extra: kolom tambahan per nama baris
+    extra = extra or {}
+    extra_cols = sorted({k for cols in extra.values() for k in cols})
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(CATEGORY_COLUMNS) + extra_cols)
+        writer.writeheader()
+        for rec in category_records(table):
+            writer.writerow(dict(rec, **extra.get(rec["name"], {})))
 
 # =======================================================
 # KALENDER PROMOSI TOKO BERDASARKAN KALENDAR INDONESIA
@@ -222,7 +446,67 @@ def build_event_calendar(year: int) -> List[Event]:
                             ("Ice Cream","Nugget","Keripik","Permen","Minuman Isotonik")))
     return ev
 
+# Cache kalender per tahun (per proses) agar tidak dibangun ulang untuk setiap hari
+_EVENT_CALENDARS: Dict[int, List[Event]] = {}
+
+def cached_event_calendar(year: int) -> List[Event]:
+    events = _EVENT_CALENDARS.get(year)
+    if events is None:
+        events = _EVENT_CALENDARS[year] = build_event_calendar(year)
+    return events
+
+# Ringkasan event untuk satu tanggal (boost gabungan, kategori fokus, nama event aktif)
+@dataclass(frozen=True)
+class DayEvents:
+    boost: float
+    focus: Tuple[str, ...]
+    names: Tuple[str, ...]
+    focus_set: FrozenSet[str] = frozenset()
+
+    def is_focus(self, category: str) -> bool:
+        return bool(self.focus) and ("All" in self.focus_set or category in self.focus_set)
+
+NO_EVENTS = DayEvents(1.0, tuple(), tuple())
+
+# Indeks kalender per tahun: ordinal tanggal -> DayEvents (hanya hari yang punya event)
+_CALENDAR_INDEX: Dict[int, Dict[int, DayEvents]] = {}
+
+def calendar_index(year: int) -> Dict[int, DayEvents]:
+    index = _CALENDAR_INDEX.get(year)
+    if index is not None:
+        return index
+    acc: Dict[int, Tuple[float, List[str], List[str]]] = {}
+    for e in cached_event_calendar(year):
+        boost, focus, names = acc.get(e.day.toordinal(), (1.0, [], []))
+        acc[e.day.toordinal()] = (boost * e.boost, focus + list(e.focus), names + [e.name])
+    index = _CALENDAR_INDEX[year] = {
+        k: DayEvents(boost, tuple(focus), tuple(names), frozenset(focus))
+        for k, (boost, focus, names) in acc.items()
+    }
+    return index
+
+def day_events(day: date) -> DayEvents:
+    return calendar_index(day.year).get(day.toordinal(), NO_EVENTS)
+
+def calendar_range(start: date, end: date, only_events: bool = False) -> List[Tuple[date, DayEvents]]:
+    # Query rentang tanggal (inklusif); only_events=True hanya mengembalikan hari dengan event
+    out: List[Tuple[date, DayEvents]] = []
+    if only_events:
+        for year in range(start.year, end.year + 1):
+            index = calendar_index(year)
+            for k in sorted(index):
+                if start.toordinal() <= k <= end.toordinal():
+                    out.append((date.fromordinal(k), index[k]))
+        return out
+    for k in range(start.toordinal(), end.toordinal() + 1):
+        d = date.fromordinal(k)
+        out.append((d, calendar_index(d.year).get(k, NO_EVENTS)))
+    return out
+
 def event_boost_for_day(events: List[Event], day: date) -> Tuple[float, Tuple[str,...]]:
+    if events is _EVENT_CALENDARS.get(day.year):
+        ev = day_events(day)
+        return ev.boost, ev.focus
     boost = 1.0; focus=[]
     for e in events:
         if e.day == day:
@@ -235,6 +519,10 @@ def event_boost_for_day(events: List[Event], day: date) -> Tuple[float, Tuple[st
 # =======================================================
 @dataclass
 class PromoOption:
+    # __slots__: tanpa __dict__ per objek (hanya opsi terpilih yang dimaterialisasi)
+    __slots__ = ("category", "promo_type", "discount", "trade_support", "display_cost", "expected_units",
+                 "base_units", "price", "margin", "base_profit", "promo_profit", "discount_cost_net",
+                 "invest_cost", "incremental_profit", "roi")
     category: str
     promo_type: str           # "Trade" / "In-Store"
     discount: float           # 0.1 = 10%
@@ -251,6 +539,80 @@ class PromoOption:
     incremental_profit: float
     roi: float
 
+# Posisi kolom dalam tuple nilai opsi (urutan field PromoOption)
+INCR, ROI = 13, 14
+
+class OptionTable:
+    # Penyimpanan opsi berbasis kolom bertipe: satu baris per opsi, tanpa objek per opsi.
+    # PromoOption hanya dibuat lewat option(i) untuk baris yang benar-benar dipakai
+    __slots__ = ("store_id", "category", "is_trade", "display_cost", "discount", "trade_support",
+                 "expected_units", "base_units", "price", "margin", "base_profit", "promo_profit",
+                 "discount_cost_net", "invest_cost", "incremental_profit", "roi")
+    FLOAT_COLUMNS = ("discount", "trade_support", "expected_units", "base_units", "price", "margin",
+                     "base_profit", "promo_profit", "discount_cost_net", "invest_cost", "incremental_profit", "roi")
+
+    def __init__(self):
+        self.store_id = array("i")
+        self.category: List[str] = []
+        self.is_trade = array("b")
+        self.display_cost = array("i")
+        for col in self.FLOAT_COLUMNS:
+            setattr(self, col, array("d"))
+
+    def __len__(self) -> int:
+        return len(self.category)
+
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __setstate__(self, state):
+        for k, v in state.items(): setattr(self, k, v)
+
+    def append(self, store_id: int, v: tuple):
+        # v: tuple nilai dengan urutan field PromoOption
+        self.store_id.append(store_id)
+        self.category.append(v[0])
+        self.is_trade.append(1 if v[1] == "Trade" else 0)
+        self.discount.append(v[2]); self.trade_support.append(v[3]); self.display_cost.append(v[4])
+        self.expected_units.append(v[5]); self.base_units.append(v[6]); self.price.append(v[7])
+        self.margin.append(v[8]); self.base_profit.append(v[9]); self.promo_profit.append(v[10])
+        self.discount_cost_net.append(v[11]); self.invest_cost.append(v[12])
+        self.incremental_profit.append(v[13]); self.roi.append(v[14])
+
+    def append_option(self, store_id: int, o: PromoOption):
+        self.append(store_id, tuple(getattr(o, f) for f in PromoOption.__slots__))
+
+    def option(self, i: int) -> PromoOption:
+        return PromoOption(self.category[i], "Trade" if self.is_trade[i] else "In-Store", self.discount[i],
+                           self.trade_support[i], self.display_cost[i], self.expected_units[i],
+                           self.base_units[i], self.price[i], self.margin[i], self.base_profit[i],
+                           self.promo_profit[i], self.discount_cost_net[i], self.invest_cost[i],
+                           self.incremental_profit[i], self.roi[i])
+
+    @classmethod
+    def from_chosen(cls, chosen_by_store: Dict[int, List[PromoOption]]) -> "OptionTable":
+        table = cls()
+        for store_id, opts in chosen_by_store.items():
+            for o in opts: table.append_option(store_id, o)
+        return table
+
+    def by_store(self, store_ids=()) -> Dict[int, List[PromoOption]]:
+        # store_ids: toko yang tetap muncul (list kosong) walau tidak memilih promosi
+        out: Dict[int, List[PromoOption]] = {sid: [] for sid in store_ids}
+        for i in range(len(self)):
+            out.setdefault(self.store_id[i], []).append(self.option(i))
+        return out
+
+    def ranked(self) -> List[int]:
+        # Posisi baris urut (profit, roi) menurun, stabil seperti list.sort(reverse=True)
+        incr, roi = self.incremental_profit, self.roi
+        return sorted(range(len(self)), key=lambda i: (incr[i], roi[i]), reverse=True)
+
+    def plan_rows(self, day: date):
+        # Baris CSV dibangun (dan dibulatkan) hanya saat ditulis
+        for i in range(len(self)):
+            yield plan_row(day, self.store_id[i], self.option(i))
+
 def store_scale(store: dict, all_stores: List[dict]) -> float:
     # Menghitung faktor skala toko berdasarkan ukuran, jumlah SKU, dan karyawan
     avg_size = sum(s["size_m2"] for s in all_stores) / len(all_stores)
@@ -261,22 +623,99 @@ def store_scale(store: dict, all_stores: List[dict]) -> float:
     emp_idx  = (store["employees"] / avg_emp) ** 0.2
     return size_idx * sku_idx * emp_idx
 
+# Faktor skala semua toko dihitung sekali (satu lintasan) dan di-cache sampai tabel toko berubah.
+# STORES_VERSION dinaikkan oleh set_stores/load_stores; edit in-place wajib diikuti set_stores
+STORES_VERSION = 0
+_STORE_SCALES: Dict[int, float] = {}
+_STORE_SCALES_KEY = None
+
+def stores_key(stores: List[dict] = None) -> Tuple[int, int, int]:
+    # Kunci murah (O(1)) untuk semua cache turunan tabel toko
+    stores = STORES if stores is None else stores
+    return (STORES_VERSION, id(stores), len(stores))
+
+def store_scales(stores: List[dict] = None) -> Dict[int, float]:
+    global _STORE_SCALES, _STORE_SCALES_KEY
+    stores = STORES if stores is None else stores
+    key = stores_key(stores)
+    if key != _STORE_SCALES_KEY:
+        n = len(stores)
+        avg_size = sum(s["size_m2"] for s in stores) / n
+        avg_sku  = sum(s["sku_count"] for s in stores) / n
+        avg_emp  = sum(s["employees"] for s in stores) / n
+        _STORE_SCALES = {s["store_id"]: (s["size_m2"] / avg_size) ** 0.3 * (s["sku_count"] / avg_sku) ** 0.3
+                         * (s["employees"] / avg_emp) ** 0.2 for s in stores}
+        _STORE_SCALES_KEY = key
+    return _STORE_SCALES
+
+def store_scale_for(store: dict) -> float:
+    scale = store_scales().get(store["store_id"])
+    return scale if scale is not None else store_scale(store, STORES)
+
+STORES_BUILTIN = STORES
+STORE_FIELDS = ("store_id", "open_year", "size_m2", "sku_count", "employees")
+
+def set_stores(stores: List[dict]):
+    # Juga dipanggil ulang setelah mengedit isi STORES in-place agar cache turunan dihitung ulang
+    global STORES, STORES_VERSION
+    STORES = stores
+    STORES_VERSION += 1
+
+def load_stores(path: str) -> List[dict]:
+    # Master toko CSV/JSON dengan kolom store_id, open_year, size_m2, sku_count, employees
+    stores = []
+    for rec in read_records(path):
+        try:
+            stores.append({k: int(float(rec[k])) for k in STORE_FIELDS})
+        except KeyError as e:
+            raise ValueError(f"{path}: kolom {e} wajib ada di master toko")
+    if not stores:
+        raise ValueError(f"{path}: master toko kosong")
+    set_stores(stores)
+    return stores
+
 def cap(v, lo, hi):
     return max(lo, min(hi, v))
 
+IN_STORE_DISCOUNTS = [0.10, 0.15, 0.20]
+TRADE_DISCOUNTS    = [0.15, 0.20, 0.25]
+OPERATIONAL_OVERHEAD = 50_000
+TRAFFIC_BASE = 1.02
+
+def display_cost_for(discount: float) -> int:
+    return 120_000 if discount >= 0.25 else (100_000 if discount >= 0.20 else 80_000)
+
 def compute_options_for_category(day: date, store: dict, cat_row, events, target_store:int) -> List[PromoOption]:
+    return [PromoOption(*v) for v in option_values_for_category(day, store, cat_row, events)]
+
+def option_values_for_category(day: date, store: dict, cat_row, events, scale: float = None) -> List[tuple]:
+    # Sama dengan compute_options_for_category, tetapi tiap opsi berupa tuple nilai (tanpa objek).
+    # events: DayEvents hasil indeks kalender (cepat) atau list Event (scan linear)
+    # scale: faktor skala toko dari store_scales() bila pemanggil sudah memilikinya
     category, sku, brands, wk_sales, wk_promos = cat_row
-    price  = avg_price(category)
-    margin = realistic_margins(category)
-    elas   = realistic_elasticity(category, brands)
-    base_daily_units = (wk_sales / 7.0) * store_scale(store, STORES)
-    boost, focus = event_boost_for_day(events, day)
-    elas_focus = 0.15 if (focus and (("All" in focus) or (category in focus))) else 0.0
-    traffic_base = 1.02
-    in_store_discounts = [0.10, 0.15, 0.20]
-    trade_discounts    = [0.15, 0.20, 0.25] if trade_eligible(category, brands) else []
-    options: List[PromoOption] = []
-    OPERATIONAL_OVERHEAD = 50_000
+    cid = PARAMS.ids.get(category)
+    if cid is not None:
+        price, margin, elas = PARAMS.price[cid], PARAMS.margin[cid], PARAMS.elasticity[cid]
+        eligible = PARAMS.eligible[cid]
+        support = lambda d: PARAMS.trade_support(cid, d)
+        focus_name = PARAMS.parents[cid]
+    else:
+        price  = avg_price(category)
+        margin = realistic_margins(category)
+        elas   = realistic_elasticity(category, brands)
+        eligible = trade_eligible(category, brands)
+        support = lambda d: realistic_trade_support(category, d)
+        focus_name = category
+    base_daily_units = (wk_sales / 7.0) * (store_scale_for(store) if scale is None else scale)
+    if not isinstance(events, DayEvents):
+        boost, focus = event_boost_for_day(events, day)
+        events = DayEvents(boost, focus, tuple(), frozenset(focus))
+    boost = events.boost
+    elas_focus = 0.15 if events.is_focus(focus_name) else 0.0
+    traffic_base = TRAFFIC_BASE
+    in_store_discounts = IN_STORE_DISCOUNTS
+    trade_discounts    = TRADE_DISCOUNTS if eligible else []
+    options: List[tuple] = []
 
     def eval_option(discount: float, promo_type: str, trade_support_ratio: float, display_cost: int):
         uplift = (elas + elas_focus) * discount * 0.85
@@ -284,106 +723,385 @@ def compute_options_for_category(day: date, store: dict, cat_row, events, target
                      base_daily_units*0.95, base_daily_units*2.0)
         new_price = price * (1.0 - discount)
         base_profit  = base_daily_units * price * margin
-        trade_support_amount = realistic_trade_support(category, discount) if promo_type == "Trade" else 0.0
+        trade_support_amount = support(discount) if promo_type == "Trade" else 0.0
         trade_rebate = units * price * (trade_support_amount * discount)
         promo_profit = (units * new_price * margin) + trade_rebate - display_cost
         incr = promo_profit - base_profit
         discount_cost_net = (units * price * discount) - trade_rebate
         invest_cost = max(1.0, discount_cost_net + display_cost + OPERATIONAL_OVERHEAD)
         roi = incr / invest_cost
-        return PromoOption(category, promo_type, discount, trade_support_amount, display_cost,
-                           units, base_daily_units, price, margin,
-                           base_profit, promo_profit, discount_cost_net, invest_cost, incr, roi)
+        return (category, promo_type, discount, trade_support_amount, display_cost,
+                units, base_daily_units, price, margin,
+                base_profit, promo_profit, discount_cost_net, invest_cost, incr, roi)
 
     for d in in_store_discounts:
         options.append(eval_option(d, "In-Store", 0.0, 0))
     for d in trade_discounts:
-        sup  = realistic_trade_support(category, d)
-        disp = 120_000 if d >= 0.25 else (100_000 if d >= 0.20 else 80_000)
+        sup  = support(d)
+        disp = display_cost_for(d)
         options.append(eval_option(d, "Trade", sup, disp))
-    day_boost, _ = event_boost_for_day(events, day)
-    min_roi = 0.08 if day_boost >= 1.2 else 0.12
-    options = [o for o in options if o.incremental_profit > 0 and o.roi >= min_roi]
-    options.sort(key=lambda x: (x.incremental_profit, x.roi), reverse=True)
+    min_roi = 0.08 if boost >= 1.2 else 0.12
+    options = [o for o in options if o[INCR] > 0 and o[ROI] >= min_roi]
+    options.sort(key=lambda x: (x[INCR], x[ROI]), reverse=True)
     return options
 
+# =======================================================
+# ENGINE EVALUASI BATCH (NUMPY): TOKO × KATEGORI × TANGGA DISKON
+# =======================================================
+# Slot opsi mengikuti urutan jalur skalar: In-Store 10/15/20%, lalu Trade 15/20/25%
+LADDER = [(d, "In-Store") for d in IN_STORE_DISCOUNTS] + [(d, "Trade") for d in TRADE_DISCOUNTS]
+
+# Grid diskon: "ladder" = tangga asli; "fine" = 5%..40% per 1% untuk kedua tipe promo.
+# Titik tangga display cost (20%/25%) dan trade support (TRADE_SUPPORT_STEP) termasuk di grid,
+# sehingga sisi atas tiap lompatan fungsi tangga ikut dievaluasi
+FINE_DISCOUNTS = [round(k / 100, 2) for k in range(5, 41)]
+DISCOUNT_GRIDS = {
+    "ladder": (IN_STORE_DISCOUNTS, TRADE_DISCOUNTS),
+    "fine": (FINE_DISCOUNTS, FINE_DISCOUNTS),
+}
+DISCOUNT_GRID = "ladder"
+
+def set_discount_grid(name: str):
+    global DISCOUNT_GRID, IN_STORE_DISCOUNTS, TRADE_DISCOUNTS, LADDER
+    if name not in DISCOUNT_GRIDS:
+        raise ValueError(f"grid diskon tidak dikenal: {name}")
+    DISCOUNT_GRID = name
+    IN_STORE_DISCOUNTS, TRADE_DISCOUNTS = DISCOUNT_GRIDS[name]
+    LADDER = [(d, "In-Store") for d in IN_STORE_DISCOUNTS] + [(d, "Trade") for d in TRADE_DISCOUNTS]
+
+def evaluate_options_batch(stores: List[dict], table: CategoryTable, events: DayEvents) -> Dict[str, "np.ndarray"]:
+    # Rumus identik dengan eval_option (urutan operasi sama) agar hasilnya persis sama
+    cols = table.arrays()
+    price, margin, elas, wk_sales = cols["price"], cols["margin"], cols["elasticity"], cols["weekly_sales"]
+    focus_all = bool(events.focus) and "All" in events.focus_set
+    if focus_all or not events.focus:
+        elas_focus = np.full(len(table), 0.15 if focus_all else 0.0)
+    else:
+        elas_focus = np.array([0.15 if events.is_focus(n) else 0.0 for n in table.parents], dtype=float)
+    discount = np.array([d for d, _ in LADDER], dtype=float)
+    is_trade = np.array([t == "Trade" for _, t in LADDER], dtype=bool)
+    display  = np.array([display_cost_for(d) if t == "Trade" else 0 for d, t in LADDER], dtype=float)
+    trade_support = np.where(discount[None, :] >= TRADE_SUPPORT_STEP, cols["support_hi"][:, None],
+                             cols["support_lo"][:, None]) * is_trade[None, :]
+    scales = store_scales()
+    scale = np.array([scales[st["store_id"]] for st in stores], dtype=float)
+
+    base = (wk_sales[None, :] / 7.0) * scale[:, None]                      # (S, C)
+    base3 = base[:, :, None]
+    uplift = (elas + elas_focus)[:, None] * discount[None, :] * 0.85       # (C, K)
+    units = base3 * (1.0 + uplift)[None, :, :] * events.boost * TRAFFIC_BASE
+    units = np.maximum(base3*0.95, np.minimum(base3*2.0, units))
+    new_price = price[:, None] * (1.0 - discount[None, :])
+    base_profit = base * price[None, :] * margin[None, :]
+    trade_rebate = units * price[None, :, None] * (trade_support * discount[None, :])[None, :, :]
+    promo_profit = (units * new_price[None, :, :] * margin[None, :, None]) + trade_rebate - display
+    incr = promo_profit - base_profit[:, :, None]
+    discount_cost_net = (units * price[None, :, None] * discount) - trade_rebate
+    invest_cost = np.maximum(1.0, discount_cost_net + display + OPERATIONAL_OVERHEAD)
+    roi = incr / invest_cost
+    valid = (~is_trade[None, :] | cols["eligible"][:, None])[None, :, :]
+    min_roi = 0.08 if events.boost >= 1.2 else 0.12
+    ok = valid & (incr > 0) & (roi >= min_roi)
+    return {
+        "names": table.names, "price": price, "margin": margin,
+        "trade_support": trade_support, "base_units": base, "units": units,
+        "base_profit": base_profit, "promo_profit": promo_profit, "trade_rebate": trade_rebate,
+        "discount_cost_net": discount_cost_net, "invest_cost": invest_cost,
+        "incremental_profit": incr, "roi": roi, "ok": ok,
+    }
+
+def best_options_batch(batch: Dict) -> Tuple["np.ndarray", "np.ndarray"]:
+    # Opsi terbaik per (toko, kategori) = maksimum leksikografis (profit, roi), slot pertama jika seri
+    incr, roi, ok = batch["incremental_profit"], batch["roi"], batch["ok"]
+    best_incr = np.where(ok, incr, -np.inf).max(axis=-1)
+    tie = ok & (incr == best_incr[..., None])
+    best_roi = np.where(tie, roi, -np.inf).max(axis=-1)
+    tie &= (roi == best_roi[..., None])
+    return tie.argmax(axis=-1), ok.any(axis=-1)
+
+def option_from_batch(batch: Dict, s: int, c: int, k: int) -> PromoOption:
+    d, promo_type = LADDER[k]
+    return PromoOption(batch["names"][c], promo_type, d, float(batch["trade_support"][c, k]),
+                       display_cost_for(d) if promo_type == "Trade" else 0,
+                       float(batch["units"][s, c, k]), float(batch["base_units"][s, c]),
+                       float(batch["price"][c]), float(batch["margin"][c]),
+                       float(batch["base_profit"][s, c]), float(batch["promo_profit"][s, c, k]),
+                       float(batch["discount_cost_net"][s, c, k]), float(batch["invest_cost"][s, c, k]),
+                       float(batch["incremental_profit"][s, c, k]), float(batch["roi"][s, c, k]))
+
+# Batas elemen tensor per blok toko agar memori tetap terkendali untuk katalog besar
+BATCH_ELEMENTS = 2_000_000
+
+OPTION_FIELDS = ("incremental_profit", "roi", "units", "promo_profit", "discount_cost_net", "invest_cost")
+
+def best_option_arrays(batch: Dict) -> Dict[str, "np.ndarray"]:
+    # Nilai opsi terbaik per (toko, kategori) dari tensor batch (..., K)
+    best, has = best_options_batch(batch)
+    pick = lambda a: np.take_along_axis(a, best[..., None], axis=-1)[..., 0]
+    out = {f: pick(batch[f]) for f in OPTION_FIELDS}
+    out["slot"], out["has"] = best, has
+    out["trade_support"] = np.take_along_axis(np.broadcast_to(batch["trade_support"], batch["units"].shape),
+                                              best[..., None], axis=-1)[..., 0]
+    out["base_units"], out["base_profit"] = batch["base_units"], batch["base_profit"]
+    return out
+
+def best_options_for_stores(events: DayEvents) -> Dict[str, "np.ndarray"]:
+    # best_option_arrays untuk semua toko (S, C), dievaluasi per blok toko
+    block = max(1, BATCH_ELEMENTS // max(1, len(PARAMS) * len(LADDER)))
+    parts = [best_option_arrays(evaluate_options_batch(STORES[lo:lo+block], PARAMS, events))
+             for lo in range(0, len(STORES), block)]
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+def option_from_best(best: Dict, at, c: int) -> PromoOption:
+    # Opsi dari best_option_arrays pada indeks `at` (mis. (toko, kategori)) untuk kategori c
+    d, promo_type = LADDER[int(best["slot"][at])]
+    return PromoOption(PARAMS.names[c], promo_type, d, float(best["trade_support"][at]),
+                       display_cost_for(d) if promo_type == "Trade" else 0, float(best["units"][at]),
+                       float(best["base_units"][at]), PARAMS.price[c], PARAMS.margin[c],
+                       float(best["base_profit"][at]), float(best["promo_profit"][at]),
+                       float(best["discount_cost_net"][at]), float(best["invest_cost"][at]),
+                       float(best["incremental_profit"][at]), float(best["roi"][at]))
+
+def choose_batch(day: date, stores: List[dict], events: DayEvents, target_per_store: int) -> Dict[int, List[PromoOption]]:
+    table = PARAMS
+    groups = table.arrays()["group"]
+    chosen_by_store: Dict[int, List[PromoOption]] = {}
+    block = max(1, BATCH_ELEMENTS // max(1, len(table) * len(LADDER)))
+    for lo in range(0, len(stores), block):
+        block_stores = stores[lo:lo+block]
+        batch = evaluate_options_batch(block_stores, table, events)
+        best, has = best_options_batch(batch)
+        best_incr = np.take_along_axis(batch["incremental_profit"], best[..., None], axis=-1)[..., 0]
+        best_roi  = np.take_along_axis(batch["roi"], best[..., None], axis=-1)[..., 0]
+        cat_pos = np.arange(len(table))
+        for s, store in enumerate(block_stores):
+            with stage("candidate_sort"):
+                cats = cat_pos[has[s]]
+                # Urutan sama dengan sort stabil (profit, roi) menurun
+                order = cats[np.lexsort((cats, -best_roi[s, cats], -best_incr[s, cats]))]
+            picks = select_plan(groups[order].tolist(), best_incr[s, order].tolist(),
+                                  max_promos_for(store), target_per_store)
+            chosen_by_store[store["store_id"]] = [option_from_batch(batch, s, int(order[i]), int(best[s, order[i]]))
+                                                  for i in picks]
+    return chosen_by_store
+
 def format_idr(x: float) -> str:
     return "Rp{:,.0f}".format(x).replace(",", ".")
 
 # =======================================================
 # PERHITUNGAN PEMILIHAN RENCANA HARIAN PROMOSI
 # =======================================================
-def pick_daily_plan(day: date, target_per_store: int):
-    events = build_event_calendar(day.year)
-    plan_rows: List[Dict] = []
-    sum_rows: List[Dict]  = []
+# Engine evaluasi opsi: "numpy" (batch array), "scalar" (referensi/fallback), "auto" (numpy jika tersedia)
+ENGINE = "auto"
+
+def resolve_engine(engine: str = None) -> str:
+    engine = engine or ENGINE
+    if engine == "auto":
+        return "numpy" if load_numpy() is not None else "scalar"
+    if engine == "numpy" and load_numpy() is None:
+        raise RuntimeError("engine numpy membutuhkan paket numpy (pip install numpy)")
+    return engine
+
+def max_promos_for(store: dict) -> int:
+    base_promos = 3 + store["employees"] * 1.5
+    return min(12, int(base_promos))
+
+def category_group(category: str) -> int:
+    cid = PARAMS.ids.get(category)
+    return PARAMS.group[cid] if cid is not None else GROUP_NAMES.index(group_of(category))
+
+def select_greedy(groups: list, profits: List[float], max_promos: int, target_per_store: int) -> List[int]:
+    # Kandidat sudah urut (profit, roi) menurun; groups = id kelompok tiap kandidat.
+    # Hasil berupa posisi kandidat yang dipilih
+    group_counter: Dict[int,int] = {}
+    chosen: List[int] = []
+    for i, g in enumerate(groups):
+        if group_counter.get(g,0) >= 2: continue
+        chosen.append(i)
+        group_counter[g] = group_counter.get(g,0)+1
+        if len(chosen) >= max_promos: break
+    current_profit = sum(profits[i] for i in chosen)
+    if current_profit < 0.7 * target_per_store:
+        for i in range(len(chosen), len(groups)):
+            g = groups[i]
+            if group_counter.get(g,0) >= 3: continue
+            chosen.append(i)
+            group_counter[g]=group_counter.get(g,0)+1
+            if len(chosen) >= min(15, max_promos+3) or sum(profits[j] for j in chosen) >= target_per_store:
+                break
+    return chosen
+
+def _group_knapsack(groups: list, profits: List[float], group_cap: int, limit: int) -> List[int]:
+    # DP eksak: maksimalkan total profit dengan <= group_cap per kelompok dan <= limit promosi.
+    # Kandidat urut profit menurun, jadi pilihan terbaik k item dari satu kelompok = k teratas
+    by_group: Dict[int, List[int]] = {}
+    for i, g in enumerate(groups):
+        if profits[i] > 0: by_group.setdefault(g, []).append(i)
+    NEG = float("-inf")
+    dp = [0.0] + [NEG] * limit
+    trace = []
+    for g, members in by_group.items():
+        prefix = [0.0]
+        for i in members[:group_cap]:
+            prefix.append(prefix[-1] + profits[i])
+        new_dp = [NEG] * (limit + 1)
+        take = [0] * (limit + 1)
+        for c in range(limit + 1):
+            if dp[c] == NEG: continue
+            for k in range(min(len(prefix) - 1, limit - c) + 1):
+                v = dp[c] + prefix[k]
+                if v > new_dp[c+k]:
+                    new_dp[c+k] = v; take[c+k] = k
+        trace.append((members, take))
+        dp = new_dp
+    c = max(range(limit + 1), key=lambda j: dp[j])
+    chosen: List[int] = []
+    for members, take in reversed(trace):
+        k = take[c]
+        chosen.extend(members[:k])
+        c -= k
+    return sorted(chosen)
+
+def select_exact(groups: list, profits: List[float], max_promos: int, target_per_store: int) -> List[int]:
+    # Batasan sama dengan greedy: kelompok <= 2 & <= max_promos; bila profit < 0.7 x target
+    # dilonggarkan menjadi kelompok <= 3 & <= min(15, max_promos+3)
+    chosen = _group_knapsack(groups, profits, 2, max_promos)
+    if sum(profits[i] for i in chosen) < 0.7 * target_per_store:
+        chosen = _group_knapsack(groups, profits, 3, min(15, max_promos+3))
+    return chosen
+
+# Solver pemilihan: "exact" (DP kelompok x jumlah promosi, default) atau "greedy" (heuristik asli)
+SOLVER = "exact"
+SOLVERS = {"greedy": select_greedy, "exact": select_exact}
+
+def select_plan(groups: list, profits: List[float], max_promos: int, target_per_store: int) -> List[int]:
+    return SOLVERS[SOLVER](groups, profits, max_promos, target_per_store)
+
+def store_candidates_scalar(day: date, store: dict, events, scale: float = None) -> Tuple[OptionTable, List[int]]:
+    # Opsi terbaik per kategori sebagai baris OptionTable + urutan (profit, roi) menurun
+    table = OptionTable()
+    for cat in CATEGORIES:
+        opts = option_values_for_category(day, store, cat, events, scale)
+        if opts: table.append(store["store_id"], opts[0])
+    with stage("candidate_sort"):
+        order = table.ranked()
+    return table, order
+
+def choose_scalar(day: date, stores: List[dict], events, target_per_store: int) -> Dict[int, List[PromoOption]]:
     chosen_by_store: Dict[int, List[PromoOption]] = {}
+    scales = store_scales()
+    for store in stores:
+        table, order = store_candidates_scalar(day, store, events, scales.get(store["store_id"]))
+        picks = select_plan([category_group(table.category[i]) for i in order],
+                            [table.incremental_profit[i] for i in order], max_promos_for(store), target_per_store)
+        chosen_by_store[store["store_id"]] = [table.option(order[i]) for i in picks]
+    return chosen_by_store
+
+def plan_row(day: date, store_id: int, o: PromoOption) -> Dict:
+    return {
+        "date": day.isoformat(),
+        "store_id": store_id,
+        "promo_type": o.promo_type,
+        "category": o.category,
+        "discount_pct": round(o.discount*100),
+        "price_avg": int(o.price),
+        "margin_pct": round(o.margin*100,1),
+        "base_units": round(o.base_units,1),
+        "expected_units": round(o.expected_units,1),
+        "uplift_pct": round((o.expected_units/o.base_units - 1)*100, 1),
+        "base_profit": int(round(o.base_profit)),
+        "promo_profit": int(round(o.promo_profit)),
+        "discount_cost_net": int(round(o.discount_cost_net)),
+        "display_cost": o.display_cost,
+        "overhead": OPERATIONAL_OVERHEAD,
+        "invest_cost": int(round(o.invest_cost)),
+        "incremental_profit": int(round(o.incremental_profit)),
+        "roi": round(o.roi,3),
+        "trade_support_of_disc": round(o.trade_support*100,1) if o.promo_type == "Trade" else 0.0,
+    }
+
+def summary_row(day: date, store_id: int, max_promos: int, chosen: List[PromoOption]) -> Dict:
+    return {
+        "date": day.isoformat(),
+        "store_id": store_id,
+        "max_promos_allowed": max_promos,
+        "promos_scheduled": len(chosen),
+        "incremental_profit_total": int(round(sum(o.incremental_profit for o in chosen))),
+        "avg_roi": round(sum(o.roi for o in chosen)/len(chosen), 3) if chosen else 0.0
+    }
+
+# Loop per toko dijalankan paralel bila jumlah toko >= PARALLEL_STORE_MIN
+STORE_WORKERS = os.cpu_count() or 1
+PARALLEL_STORE_MIN = 200
+_STORE_POOL = None
+
+def choose_for_stores(day: date, stores: List[dict], events: DayEvents, target_per_store: int,
+                      engine: str = None) -> Dict[int, List[PromoOption]]:
+    if resolve_engine(engine) == "numpy":
+        return choose_batch(day, stores, events, target_per_store)
+    return choose_scalar(day, stores, events, target_per_store)
+
+def _choose_store_chunk(job):
+    day, lo, hi, target_per_store, engine = job
+    chosen = choose_for_stores(day, STORES[lo:hi], day_events(day), target_per_store, engine)
+    return OptionTable.from_chosen(chosen), worker_profile()
+
+def store_pool():
+    # Pool dibuat sekali dan dipakai ulang untuk hari-hari berikutnya
+    global _STORE_POOL
+    if _STORE_POOL is None:
+        _STORE_POOL = multiprocessing.Pool(processes=STORE_WORKERS, initializer=apply_planner_settings,
+                                           initargs=(planner_settings(),))
+    return _STORE_POOL
+
+def close_store_pool():
+    global _STORE_POOL
+    if _STORE_POOL is not None:
+        _STORE_POOL.close(); _STORE_POOL.join()
+        _STORE_POOL = None
 
+def choose_day(day: date, target_per_store: int, engine: str = None) -> Dict[int, List[PromoOption]]:
+    # Dengan --cache-dir, hasil dibaca dari cache bila input (event hari, toko, tabel, target) sama
+    if INCREMENTAL is not None:
+        return INCREMENTAL.choose_day(day, target_per_store)
+    if PLAN_CACHE is None:
+        return compute_day(day, target_per_store, engine)
+    key = plan_cache_key(day, target_per_store)
+    chosen_by_store = PLAN_CACHE.get(key)
+    if chosen_by_store is None:
+        chosen_by_store = compute_day(day, target_per_store, engine)
+        PLAN_CACHE.put(key, chosen_by_store)
+    return chosen_by_store
+
+def compute_day(day: date, target_per_store: int, engine: str = None) -> Dict[int, List[PromoOption]]:
+    if STORE_WORKERS > 1 and len(STORES) >= PARALLEL_STORE_MIN:
+        step = -(-len(STORES) // (STORE_WORKERS * 4))
+        jobs = [(day, lo, min(lo+step, len(STORES)), target_per_store, engine) for lo in range(0, len(STORES), step)]
+        chosen_by_store = {}
+        for (_, lo, hi, _, _), (part, prof) in zip(jobs, store_pool().imap(_choose_store_chunk, jobs)):
+            chosen_by_store.update(part.by_store(st["store_id"] for st in STORES[lo:hi]))
+            if prof: PROFILER.merge(prof)
+        return chosen_by_store
+    return choose_for_stores(day, STORES, day_events(day), target_per_store, engine)
+
+def summary_rows(day: date, chosen_by_store: Dict[int, List[PromoOption]]) -> List[Dict]:
+    return [summary_row(day, store["store_id"], max_promos_for(store), chosen_by_store[store["store_id"]])
+            for store in STORES]
+
+def pick_daily_plan(day: date, target_per_store: int, engine: str = None,
+                    plan_sink: "RowSink" = None, summary_sink: "RowSink" = None):
+    # Bila sink diberikan, baris langsung dialirkan ke sink per toko (list yang dikembalikan kosong)
+    plan_rows: List[Dict] = []
+    sum_rows: List[Dict]  = []
+    chosen_by_store = choose_day(day, target_per_store, engine)
     for store in STORES:
-        base_promos = 3 + store["employees"] * 1.5
-        max_promos = min(12, int(base_promos))
-        candidates: List[PromoOption] = []
-        for cat in CATEGORIES:
-            opts = compute_options_for_category(day, store, cat, events, target_per_store)
-            if opts: candidates.append(opts[0])
-        candidates.sort(key=lambda x: (x.incremental_profit, x.roi), reverse=True)
-        def group_of(cat: str) -> str:
-            if cat in {"Beras","Gula","Garam","Minyak Goreng","Bihun","Pasta","Mie Instan"}: return "Staples"
-            if cat in {"Air Mineral","Soda","Minuman Isotonik","Jus Kemasan","Teh","Kopi Bubuk","Kopi Kemasan"}: return "Beverage"
-            if cat in {"Biskuit","Keripik","Permen","Gulali","Cokelat","Kuaci","Marshmallow","Makaroni","Roti","Sereal","Kacang"}: return "Snack"
-            if cat in {"Susu Bubuk","Susu Kemasan","Yogurt","Keju","Mentega","Krim","Ice Cream"}: return "DairyFrozen"
-            if cat in {"Nugget","Kentang Goreng"}: return "FrozenMeal"
-            if cat in {"Daging Segar","Seafood Segar","Sayur-Sayuran","Buah-Buahan","Buah Kering","Telur"}: return "Fresh"
-            if cat in {"Sirup","Saos","Kecap","Penyedap Rasa","Kaldu Jamur","Mayones","Selai","Kornet","Sarden Kaleng"}: return "Condiment"
-            return "Other"
-        group_counter: Dict[str,int] = {}
-        chosen: List[PromoOption] = []
-        for opt in candidates:
-            g = group_of(opt.category)
-            if group_counter.get(g,0) >= 2: continue
-            chosen.append(opt)
-            group_counter[g] = group_counter.get(g,0)+1
-            if len(chosen) >= max_promos: break
-        current_profit = sum(o.incremental_profit for o in chosen)
-        if current_profit < 0.7 * target_per_store:
-            for opt in candidates[len(chosen):]:
-                g = group_of(opt.category)
-                if group_counter.get(g,0) >= 3: continue
-                chosen.append(opt)
-                group_counter[g]=group_counter.get(g,0)+1
-                if len(chosen) >= min(15, max_promos+3) or sum(o.incremental_profit for o in chosen) >= target_per_store:
-                    break
-        chosen_by_store[store["store_id"]] = chosen
-        for o in chosen:
-            plan_rows.append({
-                "date": day.isoformat(),
-                "store_id": store["store_id"],
-                "promo_type": o.promo_type,
-                "category": o.category,
-                "discount_pct": round(o.discount*100),
-                "price_avg": int(o.price),
-                "margin_pct": round(o.margin*100,1),
-                "base_units": round(o.base_units,1),
-                "expected_units": round(o.expected_units,1),
-                "uplift_pct": round((o.expected_units/o.base_units - 1)*100, 1),
-                "base_profit": int(round(o.base_profit)),
-                "promo_profit": int(round(o.promo_profit)),
-                "discount_cost_net": int(round(o.discount_cost_net)),
-                "display_cost": o.display_cost,
-                "overhead": 50_000,
-                "invest_cost": int(round(o.invest_cost)),
-                "incremental_profit": int(round(o.incremental_profit)),
-                "roi": round(o.roi,3),
-                "trade_support_of_disc": round(o.trade_support*100,1) if o.promo_type == "Trade" else 0.0,
-            })
-        sum_rows.append({
-            "date": day.isoformat(),
-            "store_id": store["store_id"],
-            "max_promos_allowed": max_promos,
-            "promos_scheduled": len(chosen),
-            "incremental_profit_total": int(round(sum(o.incremental_profit for o in chosen))),
-            "avg_roi": round(sum(o.roi for o in chosen)/len(chosen), 3) if chosen else 0.0
-        })
+        chosen = chosen_by_store[store["store_id"]]
+        rows = (plan_row(day, store["store_id"], o) for o in chosen)
+        if plan_sink is not None: plan_sink.write(rows)
+        else: plan_rows.extend(rows)
+        srow = summary_row(day, store["store_id"], max_promos_for(store), chosen)
+        if summary_sink is not None: summary_sink.write([srow])
+        else: sum_rows.append(srow)
     return plan_rows, sum_rows, chosen_by_store
 
 def write_csv(filename: str, rows: List[Dict]):
@@ -392,6 +1110,1601 @@ def write_csv(filename: str, rows: List[Dict]):
         writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
         writer.writeheader(); writer.writerows(rows)
 
+# =======================================================
+# CACHE RENCANA PERSISTEN (CONTENT-ADDRESSED)
+# =======================================================
+# Naikkan bila logika evaluasi/seleksi berubah agar entri cache lama tidak terpakai
+CACHE_VERSION = 1
+PLAN_CACHE = None
+_STORES_FP: Tuple[object, str] = (None, "")
+
+def stores_fingerprint() -> str:
+    # Satu versi tabel toko (stores_key) mengendalikan cache skala dan cache fingerprint sekaligus
+    global _STORES_FP
+    key = stores_key()
+    if _STORES_FP[0] != key:
+        blob = json.dumps([[s[k] for k in STORE_FIELDS] for s in STORES]).encode()
+        _STORES_FP = (key, hashlib.sha256(blob).hexdigest())
+    return _STORES_FP[1]
+
+def plan_cache_key(day: date, target_per_store: int) -> str:
+    # Rencana harian hanya bergantung pada event hari itu (boost & fokus), toko, tabel parameter,
+    # target dan aturan seleksi — bukan tanggalnya sendiri
+    ev = day_events(day)
+    material = [CACHE_VERSION, ev.boost, sorted(ev.focus_set), stores_fingerprint(), PARAMS.fingerprint(),
+                target_per_store, SOLVER, LADDER, OPERATIONAL_OVERHEAD, TRAFFIC_BASE, TRADE_SUPPORT_STEP]
+    return hashlib.sha256(json.dumps(material).encode()).hexdigest()
+
+class PlanCache:
+    # Satu file JSON per kunci; eviksi berdasarkan umur dan total ukuran direktori
+    def __init__(self, directory: str, max_bytes: int = 256 * 2**20, max_age_s: float = 30 * 86400):
+        self.directory, self.max_bytes, self.max_age_s = directory, max_bytes, max_age_s
+        self.hits = self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age_s:
+                os.remove(path); raise FileNotFoundError(path)
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {int(store_id): [PromoOption(*v) for v in opts] for store_id, opts in payload["stores"].items()}
+
+    def put(self, key: str, chosen_by_store: Dict[int, List[PromoOption]]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = {"version": CACHE_VERSION, "created": time.time(),
+                   "stores": {store_id: [[getattr(o, f) for f in PromoOption.__slots__] for o in opts]
+                              for store_id, opts in chosen_by_store.items()}}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def evict(self) -> int:
+        # Hapus entri kedaluwarsa, lalu entri tertua sampai total ukuran <= max_bytes
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        now, removed = time.time(), 0
+        entries.sort()
+        total = sum(e[1] for e in entries)
+        for mtime, size, path in entries:
+            if now - mtime <= self.max_age_s and total <= self.max_bytes: break
+            try:
+                os.remove(path); removed += 1; total -= size
+            except OSError:
+                pass
+        return removed
+
+# =======================================================
+# RE-PLANNING INKREMENTAL
+# =======================================================
+INCREMENTAL = None
+INCREMENTAL_VERSION = 3
+INCREMENTAL_MAX_DAYS = 400   # tanggal yang disimpan di state (yang paling lama tidak dipakai dibuang)
+
+class IncrementalPlanner:
+    # Opsi terbaik per sel (toko, kategori) di-memo di memori dengan kunci (baris parameter kategori, skala toko,
+    # profil event); saat tabel kategori/toko berubah hanya sel yang kuncinya berubah dievaluasi ulang. State
+    # (JSON) menyimpan pilihan terakhir per (tanggal, toko) beserta digest kandidatnya (hanya sel kandidat toko
+    # itu); seleksi hanya diulang untuk toko-hari yang kandidat, target, solver atau batas promosinya berubah,
+    # dan opsi yang dipakai ulang dibangun kembali dari sel (digest sama = nilai sama)
+    def __init__(self, max_days: int = INCREMENTAL_MAX_DAYS):
+        self.max_days = max_days
+        self.plans: Dict[str, Dict[str, list]] = {}   # tanggal -> {store_id: [digest, [[kategori, slot, profit]]]}
+        self.used: Dict[str, int] = {}                # tanggal -> nomor run terakhir yang memakainya
+        self.run = 1
+        self.changes: List[Dict] = []
+        self.stats = {"signatures": 0, "cells_evaluated": 0, "store_days": 0, "store_days_reselected": 0,
+                      "selections": 0, "evicted_days": 0}
+        self._cells: Dict[tuple, tuple] = {}               # profil event -> sel opsi terbaik (lihat _cells_*)
+        self._candidates: Dict[tuple, tuple] = {}          # profil event -> (versi tabel, kandidat per toko)
+        self._row_hash = (None, None)                      # (fingerprint tabel, hash per baris parameter)
+        self._picks: Dict[str, list] = {}                  # kunci kandidat -> pilihan (dalam run ini)
+        self._options: Dict[str, List[PromoOption]] = {}   # kunci kandidat -> opsi terpilih
+        self._context = None
+
+    def candidates(self, events: DayEvents) -> list:
+        # Per toko: (digest, kelompok, profit, indeks kategori, opsi per indeks kategori) untuk profil event ini
+        context = (tuple(LADDER), resolve_engine())
+        if context != self._context:
+            self._cells, self._candidates, self._picks, self._options, self._context = {}, {}, {}, {}, context
+        tables = (PARAMS.fingerprint(), stores_fingerprint())
+        sig = day_signature(events)
+        prev = self._candidates.get(sig)             # (tables, kandidat per toko)
+        if prev is not None and prev[0] == tables:
+            return prev[1]
+        self.stats["signatures"] += 1
+        rows = PARAMS.param_rows()
+        scales = store_scales()
+        scale = [scales[st["store_id"]] for st in STORES]
+        cached = []
+        if resolve_engine() == "numpy":
+            best, dirty = self._cells_numpy(sig, events, rows, scale)
+            groups = PARAMS.arrays()["group"]
+            if self._row_hash[0] != tables[0]:
+                self._row_hash = (tables[0], np.frombuffer(b"".join(hashlib.blake2b(repr(r).encode(), digest_size=8)
+                                                                   .digest() for r in rows), dtype=np.uint64))
+            row_hash = self._row_hash[1]
+            fields = OPTION_FIELDS + ("trade_support", "base_units", "base_profit", "slot")
+            cat_pos = np.arange(len(PARAMS))
+            option = lambda s, c: option_from_best(self._cells[sig][2], (s, c), c)
+            for s in range(len(STORES)):
+                if dirty is not None and not dirty[s]:
+                    # Tidak ada sel kandidat toko ini yang berubah: kandidat (dan digest) lama tetap berlaku
+                    cached.append(prev[1][s]); continue
+                cats = cat_pos[best["has"][s]]
+                order = cats[np.lexsort((cats, -best["roi"][s, cats], -best["incremental_profit"][s, cats]))]
+                # Digest hanya dari sel kandidat toko ini: posisi, hash baris parameter, dan nilai opsinya
+                h = hashlib.blake2b(order.tobytes(), digest_size=8)
+                h.update(row_hash[order].tobytes())
+                for f in fields: h.update(best[f][s, order].tobytes())
+                cached.append((h.hexdigest(), groups[order].tolist(), best["incremental_profit"][s, order].tolist(),
+                               order.tolist(), lambda c, s=s: option(s, c)))
+        else:
+            for store, values in zip(STORES, self._cells_scalar(sig, events, rows, scale)):
+                table = OptionTable()
+                for v in values: table.append(store["store_id"], v)
+                opts = [table.option(i) for i in table.ranked()]
+                by_cat = {PARAMS.ids[o.category]: o for o in opts}
+                groups = [category_group(o.category) for o in opts]
+                material = [(c, groups[i], tuple(getattr(o, f) for f in PromoOption.__slots__))
+                            for i, (c, o) in enumerate(by_cat.items())]
+                digest = hashlib.blake2b(repr(material).encode(), digest_size=8).hexdigest()
+                cached.append((digest, groups, [o.incremental_profit for o in opts], list(by_cat), by_cat.__getitem__))
+        self._candidates[sig] = (tables, cached)
+        return cached
+
+    def _cells_numpy(self, sig: tuple, events: DayEvents, rows: List[tuple], scale: List[float]):
+        # best_option_arrays (toko x kategori) untuk tabel saat ini; kolom/baris disalin dari memo profil ini bila
+        # baris parameter kategori / skala tokonya sudah pernah dievaluasi, sisanya dihitung ulang.
+        # Return (best, dirty): dirty = toko yang sel kandidatnya berubah (None = semua toko)
+        old = self._cells.get(sig)
+        if old is None or not old[0] or not old[1]:
+            best = best_options_for_stores(events)
+            self.stats["cells_evaluated"] += best["has"].size
+            self._cells[sig] = (rows, scale, best)
+            return best, None
+        old_rows, old_scale, best = old
+        col_of = {r: j for j, r in enumerate(old_rows)}
+        row_of = {x: i for i, x in enumerate(old_scale)}
+        cols = np.array([col_of.get(r, -1) for r in rows], dtype=np.intp)
+        at = np.array([row_of.get(x, -1) for x in scale], dtype=np.intp)
+        new_cols, new_rows = np.flatnonzero(cols < 0), np.flatnonzero(at < 0)
+        same_layout = (len(old_rows) == len(rows) and len(old_scale) == len(scale)
+                       and np.all((cols == np.arange(len(rows))) | (cols < 0))
+                       and np.all((at == np.arange(len(scale))) | (at < 0)))
+        if same_layout:
+            # Posisi sel tetap: hanya sel baru yang ditulis (in-place); toko kotor = punya sel baru yang
+            # menjadi / sebelumnya menjadi kandidat
+            dirty = (at < 0) | best["has"][:, new_cols].any(axis=1)
+        else:
+            best = {k: v[np.ix_(np.maximum(at, 0), np.maximum(cols, 0))] for k, v in best.items()}
+            dirty = None
+        if len(new_cols):
+            self._evaluate_cells(best, events, np.arange(len(STORES)), new_cols)
+        if len(new_rows):
+            self._evaluate_cells(best, events, new_rows, np.flatnonzero(cols >= 0))
+        if dirty is not None:
+            dirty |= best["has"][:, new_cols].any(axis=1)
+        self._cells[sig] = (rows, scale, best)
+        return best, dirty
+
+    def _evaluate_cells(self, best: Dict, events: DayEvents, at: "np.ndarray", cols: "np.ndarray"):
+        table = PARAMS.take(cols.tolist())
+        block = max(1, BATCH_ELEMENTS // max(1, len(table) * len(LADDER)))
+        for lo in range(0, len(at), block):
+            part = at[lo:lo+block]
+            fresh = best_option_arrays(evaluate_options_batch([STORES[i] for i in part], table, events))
+            for k, v in fresh.items():
+                best[k][np.ix_(part, cols)] = v
+        self.stats["cells_evaluated"] += len(at) * len(cols)
+
+    def _cells_scalar(self, sig: tuple, events: DayEvents, rows: List[tuple], scale: List[float]) -> List[list]:
+        # Per toko: nilai opsi terbaik tiap kategori yang punya opsi layak; memo {(baris, skala): nilai | None}
+        old = self._cells.get(sig, {})
+        cells, out = {}, []
+        for store, x in zip(STORES, scale):
+            values = []
+            for row, cat in zip(rows, CATEGORIES):
+                key = (row, x)
+                if key in old:
+                    v = old[key]
+                elif key in cells:
+                    v = cells[key]
+                else:
+                    opts = option_values_for_category(None, store, cat, events, x)
+                    v = opts[0] if opts else None
+                    self.stats["cells_evaluated"] += 1
+                cells[key] = v
+                if v is not None: values.append(v)
+            out.append(values)
+        self._cells[sig] = cells
+        return out
+
+    def choose_day(self, day: date, target_per_store: int) -> Dict[int, List[PromoOption]]:
+        iso = day.isoformat()
+        previous = self.plans.get(iso, {})
+        current: Dict[str, list] = {}
+        chosen_by_store: Dict[int, List[PromoOption]] = {}
+        ladder = {opt: k for k, opt in enumerate(LADDER)}
+        for store, (digest, groups, profits, cats, option) in zip(STORES, self.candidates(day_events(day))):
+            sid = store["store_id"]
+            key = f"{digest}:{target_per_store}:{SOLVER}:{max_promos_for(store)}"
+            prev = previous.get(str(sid))
+            self.stats["store_days"] += 1
+            # Kunci sama = kandidat & aturan seleksi sama, jadi pilihan dan opsinya bisa dipakai bersama
+            # antar-hari dengan profil event yang sama
+            opts = self._options.get(key)
+            if prev is not None and prev[0] == key:
+                picked = prev[1]
+            else:
+                picked = self._picks.get(key)
+                if picked is None:
+                    opts = [option(cats[i]) for i in select_plan(groups, profits, max_promos_for(store),
+                                                                 target_per_store)]
+                    picked = self._picks[key] = [[PARAMS.ids[o.category], ladder[(o.discount, o.promo_type)],
+                                                  int(round(o.incremental_profit))] for o in opts]
+                    self.stats["selections"] += 1
+                self.stats["store_days_reselected"] += 1
+                if prev is None or prev[1] != picked:
+                    self.changes.append(self._diff(day, sid, prev[1] if prev else None, picked))
+            if opts is None:
+                opts = [option(c) for c, _, _ in picked]
+            self._options[key] = opts
+            current[str(sid)] = [key, picked]
+            chosen_by_store[sid] = opts
+        self.plans[iso] = current
+        self.used[iso] = self.run
+        return chosen_by_store
+
+    @staticmethod
+    def _diff(day: date, store_id: int, before, after: List[list]) -> Dict:
+        # Entri [kategori, slot tangga, profit]; nama kategori dari tabel saat ini
+        name = lambda c: PARAMS.names[c] if c < len(PARAMS) else f"#{c}"
+        old = {v[0]: v for v in (before or [])}
+        new = {v[0]: v for v in after}
+        return {"date": day.isoformat(), "store_id": store_id, "new_plan": before is None,
+                "added": sorted(name(c) for c in set(new) - set(old)),
+                "removed": sorted(name(c) for c in set(old) - set(new)),
+                "modified": sorted(name(c) for c in set(new) & set(old) if new[c] != old[c]),
+                "profit_before": sum(v[2] for v in old.values()),
+                "profit_after": sum(v[2] for v in new.values())}
+
+    def prune(self):
+        # Simpan paling banyak max_days tanggal; yang dipakai pada run ini selalu dipertahankan
+        keep = sorted(self.plans, key=lambda d: (self.used.get(d, 0), d), reverse=True)
+        keep = set(keep[:max(self.max_days, sum(1 for d in self.used if self.used[d] == self.run))])
+        evicted = [d for d in self.plans if d not in keep]
+        for d in evicted:
+            del self.plans[d]
+            self.used.pop(d, None)
+        self.stats["evicted_days"] += len(evicted)
+
+    def save(self, path: str):
+        self.prune()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": INCREMENTAL_VERSION, "run": self.run, "plans": self.plans,
+                                "used": self.used}))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path: str, max_days: int = INCREMENTAL_MAX_DAYS) -> "IncrementalPlanner":
+        # File hilang, rusak, atau versi lain: mulai dari state kosong
+        planner = IncrementalPlanner(max_days)
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return planner
+        if isinstance(state, dict) and state.get("version") == INCREMENTAL_VERSION:
+            planner.plans, planner.used = state["plans"], state["used"]
+            planner.run = int(state["run"]) + 1
+        return planner
+
+def print_incremental_report(planner: IncrementalPlanner, limit: int = 20):
+    st = planner.stats
+    changed = [c for c in planner.changes if not c["new_plan"]]
+    print("\n" + "="*60)
+    print("RE-PLANNING INKREMENTAL")
+    print(f" Profil event dievaluasi: {st['signatures']} | Sel toko x kategori dihitung: {st['cells_evaluated']} | "
+          f"Toko-hari diseleksi ulang: {st['store_days_reselected']}/{st['store_days']} "
+          f"({st['selections']} seleksi unik)")
+    print(f" Rencana baru: {len(planner.changes) - len(changed)} | Rencana berubah: {len(changed)}")
+    for c in changed[:limit]:
+        parts = [f"+{x}" for x in c["added"]] + [f"-{x}" for x in c["removed"]] + [f"~{x}" for x in c["modified"]]
+        delta = c["profit_after"] - c["profit_before"]
+        print(f"  {c['date']} Toko {c['store_id']:>3}: {' '.join(parts)} (Δ {format_idr(delta)})")
+    if len(changed) > limit:
+        print(f"  ... dan {len(changed) - limit} rencana lain")
+
+# =======================================================
+# PENULISAN OUTPUT STREAMING (CSV / CSV.GZ / JSONL / SQLITE)
+# =======================================================
+# Mode tulis: overwrite (ganti isi), append (tambahkan ke histori), upsert (ganti baris tanggal yang sama)
+WRITE_MODES = ("overwrite", "append", "upsert")
+
+class RowSink:
+    # Antarmuka sink: write() menerima list atau iterator dict dan menulis secara bertahap
+    def __init__(self, path: str, mode: str = "overwrite"):
+        if mode not in WRITE_MODES:
+            raise ValueError(f"mode tulis tidak dikenal: {mode}")
+        self.path, self.mode = path, mode
+        self.rows_written = 0
+
+    def write(self, rows):
+        n = self._write_rows(iter(rows))
+        self.rows_written += n
+
+    def _write_rows(self, rows) -> int:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def _open_text(path: str, mode: str):
+    if path.endswith(".gz"):
+        import gzip
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, newline="", encoding="utf-8")
+
+class FileSink(RowSink):
+    # Dasar sink berbasis file. File baru dibuka saat baris pertama datang (tanpa baris = file lama utuh).
+    # Upsert: baris baru ditulis ke file sementara, lalu digabung dengan histori lama tanpa tanggal yang sama
+    def __init__(self, path: str, mode: str = "overwrite"):
+        super().__init__(path, mode)
+        self.f = None
+        self.dates = set()
+
+    def _target(self) -> str:
+        return self.path + ".new" + (".gz" if self.path.endswith(".gz") else "") if self.mode == "upsert" else self.path
+
+    def _write_rows(self, rows) -> int:
+        n = 0
+        for row in rows:
+            if self.f is None:
+                appending = self.mode == "append" and os.path.exists(self.path) and os.path.getsize(self.path) > 0
+                self.f = _open_text(self._target(), "a" if appending else "w")
+                self._start(row, appending)
+            if self.mode == "upsert":
+                self.dates.add(str(row["date"]))
+            self._emit(row)
+            n += 1
+        return n
+
+    def close(self):
+        if self.f is None: return
+        self.f.close(); self.f = None
+        if self.mode == "upsert":
+            self._merge_history()
+
+    def _merge_history(self):
+        new_path, tmp_path = self._target(), self.path + ".tmp" + (".gz" if self.path.endswith(".gz") else "")
+        self.f = _open_text(tmp_path, "w")
+        started = False
+        if os.path.exists(self.path):
+            for row in self._read(self.path):
+                if str(row.get("date")) in self.dates: continue
+                if not started: self._start(row, False); started = True
+                self._emit(row)
+        for row in self._read(new_path):
+            if not started: self._start(row, False); started = True
+            self._emit(row)
+        self.f.close(); self.f = None
+        os.replace(tmp_path, self.path)
+        os.remove(new_path)
+
+class CsvSink(FileSink):
+    def _start(self, first: Dict, appending: bool):
+        fieldnames = list(first.keys())
+        if appending:
+            with _open_text(self.path, "r") as f:
+                fieldnames = next(csv.reader(f), fieldnames)
+        self.writer = csv.DictWriter(self.f, fieldnames=fieldnames, restval="", extrasaction="ignore")
+        if not appending:
+            self.writer.writeheader()
+
+    def _emit(self, row: Dict):
+        self.writer.writerow(row)
+
+    def _read(self, path: str):
+        with _open_text(path, "r") as f:
+            yield from csv.DictReader(f)
+
+class JsonlSink(FileSink):
+    def _start(self, first: Dict, appending: bool):
+        pass
+
+    def _emit(self, row: Dict):
+        self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def _read(self, path: str):
+        with _open_text(path, "r") as f:
+            for line in f:
+                if line.strip(): yield json.loads(line)
+
+# Koneksi SQLite dipakai bersama oleh sink yang menulis ke file yang sama (plan & summary),
+# supaya transaksi batch keduanya tidak saling mengunci
+_SQLITE_CONNECTIONS: Dict[str, list] = {}
+
+def _sqlite_acquire(path: str):
+    key = os.path.abspath(path)
+    entry = _SQLITE_CONNECTIONS.get(key)
+    if entry is None:
+        import sqlite3
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        entry = _SQLITE_CONNECTIONS[key] = [conn, 0]
+    entry[1] += 1
+    return entry[0]
+
+def _sqlite_release(path: str):
+    key = os.path.abspath(path)
+    entry = _SQLITE_CONNECTIONS[key]
+    entry[1] -= 1
+    if entry[1] == 0:
+        entry[0].commit(); entry[0].close()
+        del _SQLITE_CONNECTIONS[key]
+
+class SqliteSink(RowSink):
+    # Bulk insert per batch dalam satu transaksi; indeks (date, store_id) dibuat otomatis
+    def __init__(self, path: str, table: str, mode: str = "overwrite", batch_size: int = 5000):
+        super().__init__(path, mode)
+        self.table, self.batch_size = table, batch_size
+        self.conn = _sqlite_acquire(path)
+        self.columns: List[str] = []
+        self.dates = set()
+        self.pending: List[tuple] = []
+
+    def _prepare(self, first: Dict):
+        cols = list(first.keys())
+        types = {int: "INTEGER", float: "REAL"}
+        if self.mode == "overwrite":
+            self.conn.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" (' +
+                          ", ".join(f'"{c}" {types.get(type(first[c]), "TEXT")}' for c in cols) + ")")
+        if {"date", "store_id"} <= set(cols):
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{self.table}_date_store" ON "{self.table}" (date, store_id)')
+        self.columns = cols
+        self.insert_sql = (f'INSERT INTO "{self.table}" (' + ", ".join(f'"{c}"' for c in cols) +
+                           ") VALUES (" + ", ".join("?" * len(cols)) + ")")
+
+    def _write_rows(self, rows) -> int:
+        n = 0
+        for row in rows:
+            if not self.columns: self._prepare(row)
+            if self.mode == "upsert" and row["date"] not in self.dates:
+                self._flush()
+                self.dates.add(row["date"])
+                self.conn.execute(f'DELETE FROM "{self.table}" WHERE date = ?', (row["date"],))
+            self.pending.append(tuple(row.get(c) for c in self.columns))
+            n += 1
+            if len(self.pending) >= self.batch_size: self._flush()
+        return n
+
+    def _flush(self):
+        if self.pending:
+            self.conn.executemany(self.insert_sql, self.pending)
+            self.pending = []
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is None: return
+        self._flush()
+        _sqlite_release(self.path); self.conn = None
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+def open_sink(path: str, table: str, mode: str = "overwrite") -> RowSink:
+    # Format dipilih dari ekstensi: .csv / .csv.gz / .jsonl / .jsonl.gz / .db|.sqlite|.sqlite3 (tabel = table)
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return SqliteSink(path, table, mode)
+    if path.lower().endswith((".jsonl", ".jsonl.gz")):
+        return JsonlSink(path, mode)
+    return CsvSink(path, mode)
+
+class TeeSink(RowSink):
+    # Meneruskan baris yang sama ke beberapa sink (mis. file plan + rollup analitik)
+    def __init__(self, sinks: List[RowSink]):
+        super().__init__(sinks[0].path, sinks[0].mode)
+        self.sinks = sinks
+
+    def _write_rows(self, rows) -> int:
+        rows = list(rows)
+        for sink in self.sinks: sink.write(rows)
+        return len(rows)
+
+    def close(self):
+        for sink in self.sinks: sink.close()
+
+# =======================================================
+# ROLLUP ANALITIK INKREMENTAL
+# =======================================================
+# Agregat baris plan per (dimensi, kunci, bulan) untuk dimensi store, category, group, type, week dan month.
+# Diperbarui per baris yang masuk (sebagai sink) dan disimpan ke JSON; query top-N hanya membaca agregat.
+# Kontribusi tiap tanggal juga disimpan per (dimensi, kunci): mode append melewati tanggal yang sudah ada,
+# mode upsert mengurangi kontribusi lama tanggal itu lalu menambahkan yang baru, mode overwrite mengosongkan
+# rollup. Histori juga bisa dibangun ulang dari file plan (--rollup-rebuild).
+ROLLUP_DIMENSIONS = ("store", "category", "group", "type", "week", "month")
+ROLLUP_MEASURES = ("count", "profit", "invest", "roi_sum", "uplift_sum", "trade", "base_profit")
+ROLLUP_VERSION = 2
+
+def row_group(category: str) -> str:
+    cid = PARAMS.ids.get(category)
+    return GROUP_NAMES[PARAMS.group[cid]] if cid is not None else group_of(category)
+
+class AnalyticsRollup(RowSink):
+    def __init__(self, path: str, mode: str = "append"):
+        super().__init__(path, mode)
+        self.cells: Dict[Tuple[str, str, str], List[float]] = {}
+        self.days: Dict[str, Dict[Tuple[str, str], List[float]]] = {}    # tanggal -> kontribusi per (dimensi, kunci)
+        self.dates = set()
+        self.new_dates = set()
+        self.skipped_rows = 0
+        self._groups: Dict[str, str] = {}
+        if mode != "overwrite" and path and os.path.exists(path):
+            self.load(path)
+
+    def load(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != ROLLUP_VERSION:
+            raise ValueError(f"{path}: versi rollup tidak didukung (bangun ulang dengan --rollup-rebuild)")
+        self.dates = set(state["dates"])
+        self.cells = {(c[0], c[1], c[2]): c[3:] for c in state["cells"]}
+        self.days = {day: {(c[0], c[1]): c[2:] for c in cells} for day, cells in state["days"].items()}
+
+    def save(self, path: str = None):
+        path = path or self.path
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": ROLLUP_VERSION, "measures": ROLLUP_MEASURES, "dates": sorted(self.dates),
+                       "cells": [[*k, *v] for k, v in sorted(self.cells.items())],
+                       "days": {day: [[*k, *v] for k, v in cells.items()] for day, cells in sorted(self.days.items())}},
+                      f)
+        os.replace(tmp, path)
+
+    def add(self, row: Dict):
+        day = str(row["date"])
+        if day in self.dates and day not in self.new_dates:
+            if self.mode != "upsert":
+                self.skipped_rows += 1
+                return
+            self.remove_day(day)
+        self.dates.add(day); self.new_dates.add(day)
+        contrib = self.days.setdefault(day, {})
+        d = date.fromisoformat(day)
+        iso = d.isocalendar()
+        month = day[:7]
+        category = row["category"]
+        group = self._groups.get(category)
+        if group is None:
+            group = self._groups[category] = row_group(category)
+        profit, invest = float(row["incremental_profit"]), float(row["invest_cost"])
+        values = (1, profit, invest, float(row["roi"]), float(row["uplift_pct"]),
+                  1 if row["promo_type"] == "Trade" else 0, float(row["base_profit"]))
+        for key in (("store", str(row["store_id"])), ("category", category), ("group", group),
+                    ("type", row["promo_type"]), ("week", f"{iso[0]}-W{iso[1]:02d}"), ("month", month)):
+            cell = self.cells.get((key[0], key[1], month))
+            if cell is None:
+                cell = self.cells[(key[0], key[1], month)] = [0.0] * len(ROLLUP_MEASURES)
+            for i, v in enumerate(values): cell[i] += v
+            part = contrib.get(key)
+            if part is None:
+                part = contrib[key] = [0.0] * len(ROLLUP_MEASURES)
+            for i, v in enumerate(values): part[i] += v
+
+    def remove_day(self, day: str):
+        # Kurangi kontribusi satu tanggal dari agregat; sel yang jumlah promonya habis dibuang
+        month = day[:7]
+        for (dim, key), part in self.days.pop(day, {}).items():
+            cell = self.cells.get((dim, key, month))
+            if cell is None: continue
+            for i, v in enumerate(part): cell[i] -= v
+            if cell[0] <= 0:
+                del self.cells[(dim, key, month)]
+        self.dates.discard(day)
+
+    def _write_rows(self, rows) -> int:
+        n = 0
+        for row in rows:
+            self.add(row); n += 1
+        return n
+
+    def close(self):
+        if self.path: self.save()
+
+    def rebuild(self, paths: List[str]):
+        # Satu lintasan streaming atas file plan CSV/CSV.GZ/JSONL; memori = jumlah sel agregat
+        self.cells, self.days, self.dates, self.new_dates = {}, {}, set(), set()
+        for path in paths:
+            with _open_text(path, "r") as f:
+                rows = (json.loads(line) for line in f if line.strip()) if ".jsonl" in path else csv.DictReader(f)
+                for row in rows: self.add(row)
+
+    def query(self, dimension: str, start_month: str = None, end_month: str = None) -> Dict[str, Dict]:
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"dimensi rollup tidak dikenal: {dimension}")
+        acc: Dict[str, List[float]] = {}
+        for (dim, key, month), cell in self.cells.items():
+            if dim != dimension: continue
+            if (start_month and month < start_month) or (end_month and month > end_month): continue
+            cur = acc.setdefault(key, [0.0] * len(ROLLUP_MEASURES))
+            for i, v in enumerate(cell): cur[i] += v
+        out = {}
+        for key, (count, profit, invest, roi_sum, uplift_sum, trade, base_profit) in acc.items():
+            out[key] = {"count": int(count), "profit": profit, "invest": invest,
+                        "roi": profit / invest if invest else 0.0, "mean_roi": roi_sum / count if count else 0.0,
+                        "uplift_pct": uplift_sum / count if count else 0.0,
+                        "trade_share": trade / count if count else 0.0, "base_profit": base_profit}
+        return out
+
+    def top(self, dimension: str, measure: str = "profit", n: int = 10,
+            start_month: str = None, end_month: str = None) -> List[Tuple[str, Dict]]:
+        result = self.query(dimension, start_month, end_month)
+        return sorted(result.items(), key=lambda kv: (-kv[1][measure], kv[0]))[:n]
+
+# =======================================================
+# PERENCANAAN MULTI-HARI (HORIZON)
+# =======================================================
+def horizon_days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=k) for k in range((end - start).days + 1)]
+
+def planner_settings() -> Dict:
+    # Pengaturan global planner yang harus ikut ke setiap worker proses
+    return {"ENGINE": ENGINE, "SOLVER": SOLVER, "PARAMS": PARAMS, "CATEGORIES": CATEGORIES, "STORES": STORES,
+            "_STORE_SCALES_KEY": None, "STORE_WORKERS": STORE_WORKERS, "PLAN_CACHE": PLAN_CACHE,
+            "DISCOUNT_GRID": DISCOUNT_GRID, "IN_STORE_DISCOUNTS": IN_STORE_DISCOUNTS,
+            "TRADE_DISCOUNTS": TRADE_DISCOUNTS, "LADDER": LADDER,
+            "PROFILING": PROFILER is not None}
+
+def apply_planner_settings(settings: Dict):
+    global _IN_WORKER
+    _IN_WORKER = True
+    profiling = settings.pop("PROFILING", False)
+    globals().update(settings)
+    resolve_engine()
+    if profiling:
+        enable_profiling()
+        PROFILER.take()
+
+def _plan_day_job(job: Tuple[date, int]):
+    # Opsi terpilih dikirim sebagai OptionTable kolom; baris CSV baru dibangun saat ditulis
+    day, target = job
+    chosen_by_store = choose_day(day, target)
+    return day, OptionTable.from_chosen(chosen_by_store), summary_rows(day, chosen_by_store), worker_profile()
+
+def plan_horizon(days: List[date], target_per_store: int, workers: int,
+                 plan_out: RowSink, sum_out: RowSink, on_day=None) -> int:
+    # Hari-hari dibagi ke process pool; hasil tiap hari langsung ditulis ke sink (tidak ditumpuk di memori)
+    jobs = [(d, target_per_store) for d in days]
+    grand = 0
+    pool = None
+    try:
+        if workers <= 1 or len(days) <= 1:
+            results = map(_plan_day_job, jobs)
+        else:
+            # Paralel di level hari; di dalam worker loop toko berjalan serial
+            settings = dict(planner_settings(), STORE_WORKERS=1)
+            pool = multiprocessing.Pool(processes=min(workers, len(days)),
+                                        initializer=apply_planner_settings, initargs=(settings,))
+            # Hari berurutan per chunk -> kalender tahun yang sama dipakai ulang dalam satu worker
+            chunksize = max(1, len(days) // (workers * 8))
+            results = pool.imap(_plan_day_job, jobs, chunksize=chunksize)
+        for day, chosen, sum_rows, prof in results:
+            if prof: PROFILER.merge(prof)
+            plan_out.write(chosen.plan_rows(day))
+            sum_out.write(sum_rows)
+            day_total = sum(r["incremental_profit_total"] for r in sum_rows)
+            grand += day_total
+            if on_day: on_day(day, sum_rows, day_total)
+    finally:
+        if pool is not None:
+            pool.close(); pool.join()
+    return grand
+
+# =======================================================
+# KELELAHAN PROMOSI & COOLDOWN (ROLLING HORIZON)
+# =======================================================
+# Batasan lintas hari per (toko, kategori): jeda setelah promosi, maksimum hari promo dalam 7 hari bergulir, dan
+# peluruhan uplift (decay^jumlah promo dalam fatigue window). Hari diproses berurutan; tabel opsi segar per profil
+# event di-cache, hanya pasangan (toko, kategori) yang terkena fatigue dievaluasi ulang, dan hasil seleksi toko
+# diambil dari memo bila profil event, kandidat tersedia dan status fatigue toko sama dengan keadaan yang pernah muncul.
+@dataclass
+class FatigueRules:
+    cooldown: int = 0              # hari jeda setelah kategori dipromosikan di toko yang sama
+    max_days_per_week: int = 7     # maksimum hari promo per kategori per toko dalam 7 hari bergulir
+    decay: float = 1.0             # multiplier uplift per promo sebelumnya dalam window
+    window: int = 7                # panjang window untuk decay (hari)
+
+    def active(self) -> bool:
+        return self.cooldown > 0 or self.max_days_per_week < 7 or self.decay < 1.0
+
+FATIGUE = FatigueRules()
+def pair_options_batch(events: DayEvents, s_idx: "np.ndarray", c_idx: "np.ndarray",
+                       uplift_scale: "np.ndarray") -> Dict[str, "np.ndarray"]:
+    # Seperti evaluate_options_batch, tetapi untuk daftar pasangan (toko, kategori) dengan uplift diskalakan
+    cols = PARAMS.arrays()
+    price, margin = cols["price"][c_idx], cols["margin"][c_idx]
+    focus = np.array([0.15 if events.is_focus(PARAMS.parents[c]) else 0.0 for c in c_idx])
+    discount = np.array([d for d, _ in LADDER], dtype=float)
+    is_trade = np.array([t == "Trade" for _, t in LADDER], dtype=bool)
+    display = np.array([display_cost_for(d) if t == "Trade" else 0 for d, t in LADDER], dtype=float)
+    trade_support = np.where(discount[None, :] >= TRADE_SUPPORT_STEP, cols["support_hi"][c_idx, None],
+                             cols["support_lo"][c_idx, None]) * is_trade[None, :]
+    scales = store_scales()
+    scale = np.array([scales[STORES[s]["store_id"]] for s in s_idx], dtype=float)
+    base = (cols["weekly_sales"][c_idx] / 7.0) * scale
+    base2 = base[:, None]
+    uplift = ((cols["elasticity"][c_idx] + focus) * uplift_scale)[:, None] * discount[None, :] * 0.85
+    units = np.maximum(base2*0.95, np.minimum(base2*2.0, base2 * (1.0 + uplift) * events.boost * TRAFFIC_BASE))
+    new_price = price[:, None] * (1.0 - discount[None, :])
+    base_profit = base * price * margin
+    trade_rebate = units * price[:, None] * (trade_support * discount[None, :])
+    promo_profit = (units * new_price * margin[:, None]) + trade_rebate - display
+    incr = promo_profit - base_profit[:, None]
+    discount_cost_net = (units * price[:, None] * discount) - trade_rebate
+    invest_cost = np.maximum(1.0, discount_cost_net + display + OPERATIONAL_OVERHEAD)
+    roi = incr / invest_cost
+    min_roi = 0.08 if events.boost >= 1.2 else 0.12
+    ok = (~is_trade[None, :] | cols["eligible"][c_idx, None]) & (incr > 0) & (roi >= min_roi)
+    return {"trade_support": trade_support, "base_units": base, "units": units, "base_profit": base_profit,
+            "promo_profit": promo_profit, "discount_cost_net": discount_cost_net, "invest_cost": invest_cost,
+            "incremental_profit": incr, "roi": roi, "ok": ok}
+
+class RollingPlanner:
+    def __init__(self, rules: FatigueRules, target_per_store: int, memo_limit: int = 200_000):
+        if resolve_engine() != "numpy":
+            raise RuntimeError("batasan fatigue/cooldown membutuhkan engine numpy")
+        self.rules, self.target, self.memo_limit = rules, target_per_store, memo_limit
+        S, C = len(STORES), len(PARAMS)
+        self.depth = max(7, rules.cooldown, rules.window)
+        self.history = np.zeros((self.depth, S, C), dtype=bool)     # ring buffer promo per hari
+        self.pos = 0
+        self.fresh: Dict[tuple, Dict] = {}
+        self.memo: Dict[tuple, "np.ndarray"] = {}                  # memo seleksi -> kategori terpilih
+        self.stats = {"days": 0, "solved": 0, "reused": 0, "blocked": 0, "fatigued": 0}
+
+    def recent(self, days: int) -> "np.ndarray":
+        # Jumlah hari promo per (toko, kategori) dalam `days` hari terakhir
+        if days <= 0:
+            return np.zeros(self.history.shape[1:], dtype=np.int32)
+        idx = [(self.pos - 1 - k) % self.depth for k in range(days)]
+        return self.history[idx].sum(axis=0, dtype=np.int32)
+
+    def fresh_options(self, events: DayEvents) -> Dict[str, "np.ndarray"]:
+        sig = day_signature(events)
+        cached = self.fresh.get(sig)
+        if cached is None:
+            cached = self.fresh[sig] = best_options_for_stores(events)
+        return cached
+
+    def plan_day(self, day: date) -> Dict[int, List[PromoOption]]:
+        rules = self.rules
+        events = day_events(day)
+        sig = day_signature(events)
+        fresh = self.fresh_options(events)
+        blocked = np.zeros(fresh["has"].shape, dtype=bool)
+        if rules.cooldown > 0:
+            blocked |= self.recent(rules.cooldown) > 0
+        if rules.max_days_per_week < 7:
+            blocked |= self.recent(7) >= rules.max_days_per_week
+        has = fresh["has"] & ~blocked
+        incr, roi = fresh["incremental_profit"], fresh["roi"]
+        count = self.recent(rules.window) if rules.decay < 1.0 else None
+        patched: Dict[Tuple[int, int], int] = {}
+        pair = None
+        if count is not None:
+            s_idx, c_idx = np.nonzero(has & (count > 0))
+            if len(s_idx):
+                pair = best_option_arrays(pair_options_batch(events, s_idx, c_idx,
+                                                             rules.decay ** count[s_idx, c_idx]))
+                incr, roi, has = incr.copy(), roi.copy(), has.copy()
+                incr[s_idx, c_idx], roi[s_idx, c_idx] = pair["incremental_profit"], pair["roi"]
+                has[s_idx, c_idx] = pair["has"]
+                patched = {(int(s), int(c)): i for i, (s, c) in enumerate(zip(s_idx, c_idx))}
+        self.stats["blocked"] += int((fresh["has"] & blocked).sum())
+        self.stats["fatigued"] += len(patched)
+        groups = PARAMS.arrays()["group"]
+        cat_pos = np.arange(len(PARAMS))
+        today = np.zeros(has.shape, dtype=bool)
+        chosen_by_store: Dict[int, List[PromoOption]] = {}
+        for s, store in enumerate(STORES):
+            # Kunci memo seleksi: profil event + kandidat tersedia + status fatigue toko ini
+            key = (sig, s, has[s].tobytes(), count[s].tobytes() if count is not None else b"")
+            picks = self.memo.get(key)
+            if picks is None:
+                cats = cat_pos[has[s]]
+                order = cats[np.lexsort((cats, -roi[s, cats], -incr[s, cats]))]
+                picks = order[np.asarray(select_plan(groups[order].tolist(), incr[s, order].tolist(),
+                                                     max_promos_for(store), self.target), dtype=np.intp)]
+                if len(self.memo) >= self.memo_limit: self.memo.clear()
+                self.memo[key] = picks
+                self.stats["solved"] += 1
+            else:
+                self.stats["reused"] += 1
+            today[s, picks] = True
+            chosen_by_store[store["store_id"]] = [
+                option_from_best(fresh, (s, int(c)), int(c)) if (s, int(c)) not in patched
+                else option_from_best(pair, patched[(s, int(c))], int(c)) for c in picks]
+        self.history[self.pos] = today
+        self.pos = (self.pos + 1) % self.depth
+        self.stats["days"] += 1
+        return chosen_by_store
+
+def plan_rolling_horizon(days: List[date], target_per_store: int, rules: FatigueRules,
+                         plan_out: RowSink, sum_out: RowSink, on_day=None) -> Tuple[int, Dict]:
+    # Serial per hari (keputusan hari ini memengaruhi batasan hari berikutnya), vektor per toko
+    planner = RollingPlanner(rules, target_per_store)
+    grand = 0
+    for day in days:
+        chosen_by_store = planner.plan_day(day)
+        plan_out.write(OptionTable.from_chosen(chosen_by_store).plan_rows(day))
+        rows = summary_rows(day, chosen_by_store)
+        sum_out.write(rows)
+        day_total = sum(r["incremental_profit_total"] for r in rows)
+        grand += day_total
+        if on_day: on_day(day, rows, day_total)
+    return grand, planner.stats
+
+# =======================================================
+# PENCARIAN HARI TERBAIK (RANKING PROFIT JARINGAN)
+# =======================================================
+# Rencana harian hanya bergantung pada (boost, kategori fokus), jadi hari dengan event identik dievaluasi sekali.
+# Batas atas per boost: fokus "All" (elastisitas maksimum) dan seleksi DP dengan batasan longgar
+# (kelompok <= 3, <= min(15, max_promos+3)) tanpa target. Unit, profit dan ROI tiap opsi naik monoton terhadap
+# boost & elastisitas, sehingga batas ini juga berlaku untuk semua hari dengan boost lebih kecil.
+def day_signature(events: DayEvents) -> Tuple[float, Tuple[str, ...]]:
+    return events.boost, tuple(sorted(events.focus_set))
+
+def store_best_profits(day: date, stores: List[dict], events: DayEvents):
+    # (toko, kelompok, profit) opsi terbaik per kategori, urut (profit, roi) menurun
+    if resolve_engine() == "numpy":
+        groups = PARAMS.arrays()["group"]
+        block = max(1, BATCH_ELEMENTS // max(1, len(PARAMS) * len(LADDER)))
+        for lo in range(0, len(stores), block):
+            block_stores = stores[lo:lo+block]
+            batch = evaluate_options_batch(block_stores, PARAMS, events)
+            best, has = best_options_batch(batch)
+            best_incr = np.take_along_axis(batch["incremental_profit"], best[..., None], axis=-1)[..., 0]
+            best_roi  = np.take_along_axis(batch["roi"], best[..., None], axis=-1)[..., 0]
+            cat_pos = np.arange(len(PARAMS))
+            for s, store in enumerate(block_stores):
+                cats = cat_pos[has[s]]
+                order = cats[np.lexsort((cats, -best_roi[s, cats], -best_incr[s, cats]))]
+                yield store, groups[order].tolist(), best_incr[s, order].tolist()
+    else:
+        scales = store_scales()
+        for store in stores:
+            table, order = store_candidates_scalar(day, store, events, scales.get(store["store_id"]))
+            yield store, [category_group(table.category[i]) for i in order], [table.incremental_profit[i] for i in order]
+
+def chain_profit_bound(day: date, boost: float) -> float:
+    events = DayEvents(boost, ("All",), tuple(), frozenset(("All",)))
+    total = 0.0
+    for store, groups, profits in store_best_profits(day, STORES, events):
+        limit = min(15, max_promos_for(store) + 3)
+        total += sum(profits[i] for i in _group_knapsack(groups, profits, 3, limit))
+    return total
+
+def _day_total_job(job: Tuple[date, int]):
+    day, target = job
+    chosen_by_store = choose_day(day, target)
+    return day, sum(o.incremental_profit for chosen in chosen_by_store.values() for o in chosen), worker_profile()
+
+def find_best_days(days: List[date], target_per_store: int, top_k: int, workers: int) -> Tuple[List[Tuple[date, float]], Dict]:
+    by_sig: Dict[tuple, List[date]] = {}
+    for day in days:
+        by_sig.setdefault(day_signature(day_events(day)), []).append(day)
+    # Boost terbesar dievaluasi lebih dulu agar ambang top-k cepat naik
+    sigs = sorted(by_sig, key=lambda sg: (-sg[0], by_sig[sg][0]))
+    profits: Dict[tuple, float] = {}
+    bounds: Dict[float, float] = {}
+    stats = {"days": len(days), "signatures": len(sigs), "evaluated": 0, "bounds": 0, "pruned_days": 0}
+
+    def kth_best() -> float:
+        counted = 0
+        for sg in sorted(profits, key=profits.get, reverse=True):
+            counted += len(by_sig[sg])
+            if counted >= top_k:
+                return profits[sg]
+        return float("-inf")
+
+    pool = None
+    try:
+        if workers > 1 and len(sigs) > 1:
+            settings = dict(planner_settings(), STORE_WORKERS=1)
+            pool = multiprocessing.Pool(processes=min(workers, len(sigs)),
+                                        initializer=apply_planner_settings, initargs=(settings,))
+        step = max(1, workers)
+        i = 0
+        while i < len(sigs):
+            threshold = kth_best()
+            boost = sigs[i][0]
+            if threshold > float("-inf"):
+                if boost not in bounds:
+                    bounds[boost] = chain_profit_bound(by_sig[sigs[i]][0], boost)
+                    stats["bounds"] += 1
+                if bounds[boost] < threshold:
+                    stats["pruned_days"] = sum(len(by_sig[sg]) for sg in sigs[i:])
+                    break
+            batch = sigs[i:i+step]
+            jobs = [(by_sig[sg][0], target_per_store) for sg in batch]
+            results = pool.map(_day_total_job, jobs) if pool is not None else map(_day_total_job, jobs)
+            for sg, (_, total, prof) in zip(batch, results):
+                if prof: PROFILER.merge(prof)
+                profits[sg] = total
+            stats["evaluated"] += len(batch)
+            i += len(batch)
+    finally:
+        if pool is not None:
+            pool.close(); pool.join()
+    ranked = sorted(((d, profits[sg]) for sg in profits for d in by_sig[sg]), key=lambda x: (-x[1], x[0]))
+    return ranked[:top_k], stats
+
+# =======================================================
+# ANGGARAN TRADE PEMASOK (ALOKASI TERKOPEL LINTAS TOKO & HARI)
+# =======================================================
+# Anggaran per pemasok atau per kategori induk per bulan membatasi total dana pemasok (trade rebate + display
+# cost opsi Trade) di seluruh jaringan. Diselesaikan dengan relaksasi Lagrange: tiap anggaran-bulan punya
+# pengali lambda >= 0, nilai opsi menjadi profit - lambda x dana pemasok, subproblem per toko diselesaikan
+# independen (paralel per blok toko) dan lambda diperbarui dengan metode subgradien.
+@dataclass
+class TradeBudget:
+    kind: str        # "supplier" atau "category"
+    key: str
+    month: str       # "YYYY-MM"; kosong = berlaku untuk setiap bulan
+    amount: float
+
+def load_trade_budgets(path: str) -> List[TradeBudget]:
+    # CSV/JSON dengan kolom supplier ATAU category, budget, dan month (opsional)
+    budgets = []
+    for rec in read_records(path):
+        supplier = str(rec.get("supplier") or "").strip()
+        category = str(rec.get("category") or "").strip()
+        if bool(supplier) == bool(category):
+            raise ValueError(f"{path}: setiap baris anggaran butuh tepat satu dari kolom supplier/category")
+        if rec.get("budget") in (None, ""):
+            raise ValueError(f"{path}: kolom 'budget' wajib ada")
+        budgets.append(TradeBudget("supplier" if supplier else "category", supplier or category,
+                                   str(rec.get("month") or "").strip(), float(rec["budget"])))
+    return budgets
+
+def budget_mask(budget: TradeBudget) -> "np.ndarray":
+    keys = PARAMS.suppliers if budget.kind == "supplier" else PARAMS.parents
+    return np.array([k == budget.key for k in keys], dtype=bool)
+
+def choose_with_penalty(day: date, stores: List[dict], events: DayEvents, penalty: "np.ndarray",
+                        target_per_store: int, materialize: bool = False):
+    # Subproblem Lagrange per toko; penalty = lambda per baris kategori. Dengan penalty nol hasilnya sama
+    # dengan choose_batch. Return: (opsi terpilih per toko | None, dana pemasok (toko x kategori), profit asli per toko)
+    table = PARAMS
+    groups = table.arrays()["group"]
+    display = np.array([display_cost_for(d) if t == "Trade" else 0 for d, t in LADDER], dtype=float)
+    funded_by_cat = np.zeros((len(stores), len(table)))
+    profit = np.zeros(len(stores))
+    chosen_by_store: Dict[int, List[PromoOption]] = {}
+    block = max(1, BATCH_ELEMENTS // max(1, len(table) * len(LADDER)))
+    cat_pos = np.arange(len(table))
+    for lo in range(0, len(stores), block):
+        block_stores = stores[lo:lo+block]
+        batch = evaluate_options_batch(block_stores, table, events)
+        funded = batch["trade_rebate"] + display
+        value = batch["incremental_profit"] - penalty[None, :, None] * funded
+        best, has = best_options_batch({"incremental_profit": value, "roi": batch["roi"],
+                                        "ok": batch["ok"] & (value > 0)})
+        pick = lambda a: np.take_along_axis(a, best[..., None], axis=-1)[..., 0]
+        best_val, best_roi = pick(value), pick(batch["roi"])
+        best_incr, best_funded = pick(batch["incremental_profit"]), pick(funded)
+        for s, store in enumerate(block_stores):
+            cats = cat_pos[has[s]]
+            order = cats[np.lexsort((cats, -best_roi[s, cats], -best_val[s, cats]))]
+            picks = order[np.asarray(select_plan(groups[order].tolist(), best_val[s, order].tolist(),
+                                                 max_promos_for(store), target_per_store), dtype=np.intp)]
+            funded_by_cat[lo + s, picks] = best_funded[s, picks]
+            profit[lo + s] = best_incr[s, picks].sum()
+            if materialize:
+                chosen_by_store[store["store_id"]] = [option_from_batch(batch, s, int(c), int(best[s, c]))
+                                                      for c in picks]
+    return (chosen_by_store if materialize else None), funded_by_cat, profit
+
+def _budget_chunk_job(job):
+    # Return per unit x toko: profit dan dana pemasok yang sudah dipetakan ke kendala (mask x bulan unit)
+    lo, hi, unit_days, penalties, mask, in_month, target_per_store, materialize = job
+    stores = STORES[lo:hi]
+    spend = np.zeros((len(unit_days), len(stores), len(mask)))
+    profit = np.zeros((len(unit_days), len(stores)))
+    tables = []
+    for u, day in enumerate(unit_days):
+        chosen, funded, profit[u] = choose_with_penalty(day, stores, day_events(day), penalties[u],
+                                                        target_per_store, materialize)
+        spend[u] = (funded @ mask.T) * in_month[:, u]
+        if materialize: tables.append(OptionTable.from_chosen(chosen))
+    return spend, profit, tables
+
+# Iterasi subgradien berhenti lebih awal bila perubahan lambda terbesar di bawah ambang ini, atau bila
+# solusi subproblem berulang (lambda hanya berayun di sekitar titik patah yang sama)
+LAMBDA_TOL = 1e-4
+
+def allocate_trade_budgets(days: List[date], budgets: List[TradeBudget], target_per_store: int,
+                           workers: int, iterations: int = 40):
+    if resolve_engine() != "numpy":
+        raise RuntimeError("alokasi anggaran trade membutuhkan engine numpy")
+    # Unit = (bulan, profil event): semua hari dalam satu unit punya subproblem identik
+    by_unit: Dict[tuple, List[date]] = {}
+    for day in days:
+        by_unit.setdefault((day.strftime("%Y-%m"), day_signature(day_events(day))), []).append(day)
+    units = list(by_unit)
+    unit_days = [by_unit[u][0] for u in units]
+    weight = np.array([len(by_unit[u]) for u in units], dtype=float)
+    months = sorted({u[0] for u in units})
+    # Kendala = anggaran x bulan dalam horizon
+    cons = [(b, m) for b in budgets for m in months if not b.month or b.month == m]
+    mask = np.array([budget_mask(b) for b, _ in cons], dtype=float).reshape(len(cons), len(PARAMS))
+    in_month = np.array([[u[0] == m for u in units] for _, m in cons], dtype=float).reshape(len(cons), len(units))
+    amount = np.array([b.amount for b, _ in cons], dtype=float)
+    step = -(-len(STORES) // max(1, workers * 2))
+    chunks = [(lo, min(lo + step, len(STORES))) for lo in range(0, len(STORES), step)]
+    pool = None
+    if workers > 1 and len(chunks) > 1:
+        settings = dict(planner_settings(), STORE_WORKERS=1)
+        pool = multiprocessing.Pool(processes=min(workers, len(chunks)),
+                                    initializer=apply_planner_settings, initargs=(settings,))
+
+    def solve(lam: "np.ndarray", materialize: bool = False):
+        # Per hari tiap unit: profit per toko (U, S), dana pemasok per toko per kendala (U, S, J),
+        # dan opsi terpilih per unit bila materialize
+        penalties = np.einsum("j,ju,jc->uc", lam, in_month, mask)
+        jobs = [(lo, hi, unit_days, penalties, mask, in_month, target_per_store, materialize) for lo, hi in chunks]
+        results = list(pool.map(_budget_chunk_job, jobs) if pool is not None else map(_budget_chunk_job, jobs))
+        chosen: List[Dict[int, List[PromoOption]]] = [{} for _ in units]
+        for (lo, hi), (_, _, t) in zip(chunks, results):
+            for u, part in enumerate(t):
+                chosen[u].update(part.by_store(st["store_id"] for st in STORES[lo:hi]))
+        return (np.concatenate([r[1] for r in results], axis=1), np.concatenate([r[0] for r in results], axis=1),
+                chosen)
+
+    def totals(sol) -> Tuple[float, "np.ndarray"]:
+        return float(weight @ sol[0].sum(axis=1)), np.einsum("u,usj->j", weight, sol[1])
+
+    try:
+        lam = np.zeros(len(cons))
+        sols = [solve(lam, materialize=True)]
+        free_profit, spent = totals(sols[0])
+        t = 0
+        moved: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}               # (unit, toko) -> [(level, jumlah hari)]
+        if np.all(spent <= amount):
+            # Semua anggaran terpenuhi tanpa penalti: rencana bebas langsung dipakai, tanpa iterasi Lagrange
+            best, remaining = lam, amount - spent
+        else:
+            best, best_profit = None, float("-inf")
+            seen = [spent]                                                     # pengeluaran subproblem per iterasi
+            while t < iterations or best is None:
+                t += 1
+                if t <= iterations:
+                    # Subgradien ternormalisasi ke [-1, 1]: naik bila anggaran terlampaui, turun (min 0) bila tersisa
+                    g = (spent - amount) / np.maximum(np.maximum(amount, spent), 1.0)
+                    prev, lam = lam, np.maximum(0.0, lam + 0.5 / np.sqrt(t) * g)
+                    if best is not None and np.abs(lam - prev).max() < LAMBDA_TOL:
+                        break                                               # multiplier sudah tidak bergerak
+                elif t <= iterations + 60:
+                    # Belum ada iterasi layak: naikkan lambda kendala yang masih terlampaui sampai layak
+                    over = spent > amount
+                    lam[over] = np.maximum(lam[over] * 2, 0.05)
+                else:
+                    raise RuntimeError("anggaran trade tidak dapat dipenuhi")
+                profit, spent = totals(solve(lam))
+                if np.all(spent <= amount) and profit > best_profit:
+                    best, best_profit = lam.copy(), profit
+                # Lambda berayun di antara dua solusi diskret yang sama: iterasi berikutnya tidak memberi solusi baru
+                if best is not None and len(seen) >= 2 and np.array_equal(spent, seen[-2]):
+                    break
+                seen.append(spent)
+            # Pemulihan primal: untuk lambda yang sama semua hari dalam satu unit identik, sehingga sisa anggaran
+            # diisi dengan memindahkan toko-hari ke solusi lambda lebih kecil (rasio profit/anggaran terbaik dulu)
+            levels = [best] + [best * f for f in (0.75, 0.5, 0.25, 0.0)]
+            sols = [solve(best, materialize=True)]
+            remaining = amount - totals(sols[0])[1]
+            n_stores = len(STORES)
+            free_days = np.repeat(weight[:, None], n_stores, axis=1)       # hari per (unit, toko) masih di level 0
+            moves = []
+            for li in range(1, len(levels)):
+                sols.append(solve(levels[li]))
+                gain = sols[li][0] - sols[0][0]                             # (U, S)
+                cost = sols[li][1] - sols[0][1]                             # (U, S, J)
+                ratio = gain / np.maximum(1e-9, (np.maximum(cost, 0) / np.maximum(amount, 1.0)).sum(axis=-1))
+                for u, st in zip(*np.nonzero(gain > 0)):
+                    moves.append((ratio[u, st], li, u, st))
+            used = set()
+            for _, li, u, st in sorted(moves, reverse=True):
+                if free_days[u, st] == 0: continue
+                cost = sols[li][1][u, st] - sols[0][1][u, st]
+                pos = cost > 0
+                n = free_days[u, st] if not pos.any() else \
+                    min(free_days[u, st], np.floor(remaining[pos] / cost[pos]).min())
+                if n <= 0: continue
+                free_days[u, st] -= n
+                remaining -= n * cost
+                moved.setdefault((u, st), []).append((li, int(n)))
+                used.add(li)
+            for li in sorted(used):
+                sols[li] = solve(levels[li], materialize=True)
+    finally:
+        if pool is not None:
+            pool.close(); pool.join()
+    plans: Dict[date, Dict[int, List[PromoOption]]] = {d: {} for d in days}
+    profit = 0.0
+    for u, unit in enumerate(units):
+        for st, store in enumerate(STORES):
+            sid = store["store_id"]
+            # Hari awal unit memakai level yang dipindahkan, sisanya level 0 (lambda terbaik)
+            day_levels = [li for li, n in moved.get((u, st), []) for _ in range(n)]
+            day_levels += [0] * (len(by_unit[unit]) - len(day_levels))
+            for day, li in zip(by_unit[unit], day_levels):
+                plans[day][sid] = sols[li][2][u].get(sid, [])
+                profit += float(sols[li][0][u, st])
+    spent = amount - remaining
+    report = {"free_profit": free_profit, "profit": profit, "iterations": t,
+              "constraints": [{"kind": b.kind, "key": b.key, "month": m, "budget": b.amount,
+                               "spent": float(spent[j]), "lambda": float(best[j])} for j, (b, m) in enumerate(cons)]}
+    return plans, report
+
+# =======================================================
+# SIMULASI RISIKO MONTE CARLO
+# =======================================================
+# Elastisitas (per kategori), boost event (per draw) dan unit dasar (per toko x kategori) diambil sebagai
+# multiplier lognormal ber-mean 1 di sekitar estimasi titik; rencana terpilih dievaluasi untuk semua draw
+# sekaligus sebagai array (blok draw x opsi). Opsional: optimasi ulang per draw (informasi sempurna), seleksi
+# per toko juga dihitung sebagai array untuk semua draw x toko dalam satu blok.
+SIM_ELEMENTS = 2_000_000
+
+def _lognormal(rng, sd: float, shape) -> "np.ndarray":
+    if sd <= 0: return np.ones(shape)
+    return rng.lognormal(-0.5 * sd * sd, sd, shape)
+
+def _sim_outcome(base, price, margin, elas, disc, support, display, boost):
+    # Rumus eval_option dalam bentuk array (broadcast); return (incremental profit, invest cost, roi).
+    # Unit = base x faktor uplift ter-clip (base > 0), jadi suku per opsi dihitung dulu pada array kecil
+    # (draw x kategori x slot) dan array besar (x toko) hanya dikalikan sekali per besaran
+    lift = np.clip((1.0 + elas * disc * 0.85) * boost * TRAFFIC_BASE, 0.95, 2.0)
+    value = base * price
+    incr = value * (lift * ((1.0 - disc) * margin + support * disc) - margin) - display
+    invest = value * (lift * disc * (1.0 - support))
+    invest += display + OPERATIONAL_OVERHEAD
+    np.maximum(invest, 1.0, out=invest)
+    return incr, invest, incr / invest
+
+def plan_profit_batch(profit, roi, has, groups, max_promos, target_per_store: int) -> "np.ndarray":
+    # select_plan dalam bentuk array untuk banyak baris sekaligus (mis. draw x toko): kandidat diurutkan
+    # seperti seleksi per toko, lalu hanya total profit terpilih per baris yang dihitung
+    lead, C = profit.shape[:-1], profit.shape[-1]
+    profit, roi, has = (a.reshape(-1, C) for a in (profit, roi, has))
+    max_promos = np.broadcast_to(max_promos, lead).reshape(-1)
+    cats = np.broadcast_to(np.arange(C), profit.shape)
+    order = np.lexsort((cats, -roi, -profit, ~has), axis=-1)
+    p = np.take_along_axis(profit, order, axis=-1)
+    ok = np.take_along_axis(has, order, axis=-1)
+    solve = _knapsack_total_batch if SOLVER == "exact" else _greedy_total_batch
+    return solve(p, groups[order], ok, max_promos, target_per_store).reshape(lead)
+
+def _greedy_total_batch(p, g, ok, max_promos, target_per_store: int) -> "np.ndarray":
+    # Sama dengan select_greedy (termasuk pelonggaran bila profit < 0.7 x target), satu kolom per langkah
+    N, C = p.shape
+    rows = np.arange(N)
+    counts = np.zeros((N, int(g.max(initial=0)) + 1), dtype=np.intp)
+    n, total = np.zeros(N, dtype=np.intp), np.zeros(N)
+    for j in range(C):
+        take = ok[:, j] & (n < max_promos) & (counts[rows, g[:, j]] < 2)
+        counts[rows, g[:, j]] += take; n += take; total += np.where(take, p[:, j], 0.0)
+    start, limit = n.copy(), np.minimum(15, max_promos + 3)
+    alive = total < 0.7 * target_per_store
+    for j in range(C):
+        take = alive & ok[:, j] & (j >= start) & (counts[rows, g[:, j]] < 3)
+        counts[rows, g[:, j]] += take; n += take; total += np.where(take, p[:, j], 0.0)
+        alive &= ~(take & ((n >= limit) | (total >= target_per_store)))
+    return total
+
+def _knapsack_total_batch(p, g, ok, max_promos, target_per_store: int) -> "np.ndarray":
+    # Sama dengan select_exact: DP kelompok x jumlah promosi, vektor per baris
+    def best(group_cap, limit):
+        L = int(limit.max(initial=0))
+        dp = np.full((len(p), L + 1), -np.inf)
+        dp[:, 0] = 0.0
+        pos = np.where(ok & (p > 0), p, 0.0)
+        for grp in np.unique(g[ok]):
+            top = -np.sort(-np.where(g == grp, pos, 0.0), axis=-1)[:, :group_cap]
+            prefix = np.cumsum(top, axis=-1)
+            new = dp.copy()
+            for k in range(1, min(group_cap, L, prefix.shape[1]) + 1):
+                new[:, k:] = np.maximum(new[:, k:], dp[:, :L+1-k] + prefix[:, k-1:k])
+            dp = new
+        dp[np.arange(L + 1)[None, :] > limit[:, None]] = -np.inf
+        return dp.max(axis=-1)
+    first = best(2, max_promos)
+    return np.where(first < 0.7 * target_per_store, best(3, np.minimum(15, max_promos + 3)), first)
+
+def simulate_plan(day: date, chosen_by_store: Dict[int, List[PromoOption]], draws: int, seed: int = 42,
+                  elas_sd: float = 0.25, boost_sd: float = 0.05, noise_sd: float = 0.15,
+                  reoptimize: bool = False, target_per_store: int = 1_000_000) -> Dict:
+    if load_numpy() is None:
+        raise RuntimeError("simulasi Monte Carlo membutuhkan paket numpy (pip install numpy)")
+    events = day_events(day)
+    cols = PARAMS.arrays()
+    S, C = len(STORES), len(PARAMS)
+    scales = store_scales()
+    store_pos = {st["store_id"]: i for i, st in enumerate(STORES)}
+    base_nominal = (cols["weekly_sales"][None, :] / 7.0) * np.array([scales[st["store_id"]] for st in STORES])[:, None]
+    elas_focus = np.array([0.15 if events.is_focus(n) else 0.0 for n in PARAMS.parents])
+    picked = [(store_pos[sid], PARAMS.ids[o.category], o) for sid in chosen_by_store for o in chosen_by_store[sid]]
+    s_p = np.array([p[0] for p in picked], dtype=np.intp)
+    c_p = np.array([p[1] for p in picked], dtype=np.intp)
+    opt = lambda f: np.array([f(p[2]) for p in picked], dtype=float)
+    disc, price, margin = opt(lambda o: o.discount), opt(lambda o: o.price), opt(lambda o: o.margin)
+    support = opt(lambda o: o.trade_support if o.promo_type == "Trade" else 0.0)
+    display = opt(lambda o: o.display_cost)
+    if reoptimize:
+        l_disc = np.array([d for d, _ in LADDER])
+        l_trade = np.array([t == "Trade" for _, t in LADDER])
+        l_display = np.array([display_cost_for(d) if t == "Trade" else 0 for d, t in LADDER], dtype=float)
+        l_support = np.where(l_disc[None, :] >= TRADE_SUPPORT_STEP, cols["support_hi"][:, None],
+                             cols["support_lo"][:, None]) * l_trade[None, :]
+        valid = ~l_trade[None, :] | cols["eligible"][:, None]
+        min_roi = 0.08 if events.boost >= 1.2 else 0.12
+        groups = cols["group"]
+        max_promos = np.array([max_promos_for(st) for st in STORES])
+    rng = np.random.default_rng(seed)
+    out = {k: [] for k in ("store_incr", "store_invest", "cat_incr", "cat_invest", "reopt_store_incr")}
+    block = max(1, SIM_ELEMENTS // max(1, S * C * (len(LADDER) if reoptimize else 1)))
+    for lo in range(0, draws, block):
+        B = min(block, draws - lo)
+        elas_m = _lognormal(rng, elas_sd, (B, C))
+        boost_m = _lognormal(rng, boost_sd, (B, 1))
+        noise = _lognormal(rng, noise_sd, (B, S, C))
+        base = base_nominal[None, :, :] * noise                                      # (B, S, C)
+        elas = cols["elasticity"][None, :] * elas_m + elas_focus[None, :]           # (B, C)
+        incr, invest, _ = _sim_outcome(base[:, s_p, c_p], price, margin, elas[:, c_p], disc, support, display,
+                                       events.boost * boost_m)
+        row = np.arange(B)[:, None]
+        agg = lambda v, idx, n: np.bincount((row * n + idx).ravel(), weights=v.ravel(), minlength=B * n).reshape(B, n)
+        out["store_incr"].append(agg(incr, s_p, S)); out["store_invest"].append(agg(invest, s_p, S))
+        out["cat_incr"].append(agg(incr, c_p, C)); out["cat_invest"].append(agg(invest, c_p, C))
+        if reoptimize:
+            # Slot ladder di sumbu pertama (K, B, S, C) agar tiap slot array kontigu; opsi terbaik per
+            # (draw, toko, kategori) = maksimum (profit, roi) seperti best_options_batch. roi >= min_roi > 0
+            # dengan invest >= 1 sudah berarti profit > 0
+            r_incr, _, r_roi = _sim_outcome(base[None], cols["price"][None, None, None, :],
+                                            cols["margin"][None, None, None, :], elas[None, :, None, :],
+                                            l_disc[:, None, None, None], l_support.T[:, None, None, :],
+                                            l_display[:, None, None, None], events.boost * boost_m[None, :, :, None])
+            best_incr, best_roi = np.full((B, S, C), -np.inf), np.full((B, S, C), -np.inf)
+            for k in range(len(LADDER)):
+                ok = valid[:, k] & (r_roi[k] >= min_roi)
+                better = ok & ((r_incr[k] > best_incr) | ((r_incr[k] == best_incr) & (r_roi[k] > best_roi)))
+                best_incr = np.where(better, r_incr[k], best_incr)
+                best_roi = np.where(better, r_roi[k], best_roi)
+            has = best_incr > -np.inf
+            out["reopt_store_incr"].append(plan_profit_batch(best_incr, best_roi, has, groups, max_promos,
+                                                             target_per_store))
+    res = {k: np.concatenate(v) for k, v in out.items() if v}
+    res["planned_store_incr"] = np.bincount(s_p, weights=opt(lambda o: o.incremental_profit), minlength=S)
+    res["planned_cat_incr"] = np.bincount(c_p, weights=opt(lambda o: o.incremental_profit), minlength=C)
+    res["stores"] = [st["store_id"] for st in STORES]
+    res["categories"] = sorted(set(int(c) for c in c_p))
+    return res
+
+SIM_PERCENTILES = (10, 50, 90)
+
+def simulation_rows(day: date, sim: Dict) -> List[Dict]:
+    # Satu baris per toko, per kategori, dan total jaringan: P10/P50/P90 profit incremental & ROI, P(rugi)
+    def row(level, store_id, category, planned, incr, invest):
+        q = np.percentile(incr, SIM_PERCENTILES)
+        r = np.percentile(incr / invest, SIM_PERCENTILES)
+        return {"date": day.isoformat(), "level": level, "store_id": store_id, "category": category,
+                "planned_incremental": int(round(planned)),
+                **{f"incr_p{p}": int(round(v)) for p, v in zip(SIM_PERCENTILES, q)},
+                **{f"roi_p{p}": round(float(v), 3) for p, v in zip(SIM_PERCENTILES, r)},
+                "prob_loss": round(float((incr < 0).mean()), 4)}
+    rows = [row("chain", 0, "", sim["planned_store_incr"].sum(), sim["store_incr"].sum(axis=1),
+                sim["store_invest"].sum(axis=1))]
+    active = sim["store_invest"].any(axis=0)
+    rows += [row("store", sid, "", sim["planned_store_incr"][s], sim["store_incr"][:, s], sim["store_invest"][:, s])
+             for s, sid in enumerate(sim["stores"]) if active[s]]
+    rows += [row("category", 0, PARAMS.names[c], sim["planned_cat_incr"][c], sim["cat_incr"][:, c],
+                 sim["cat_invest"][:, c]) for c in sim["categories"]]
+    return rows
+
+def print_simulation_report(sim: Dict, rows: List[Dict], draws: int, seed: int):
+    print("\n" + "="*60)
+    print(f"SIMULASI RISIKO MONTE CARLO ({draws:,} draw, seed {seed})")
+    print("="*60)
+    header = (f"{'Level':<10}{'Toko/Kategori':<20}{'Rencana':>15}{'P10':>15}{'P50':>15}{'P90':>15}"
+              f"{'ROI P10':>9}{'ROI P50':>9}{'ROI P90':>9}{'P(rugi)':>9}")
+    print(header)
+    print("-"*len(header))
+    for r in rows:
+        label = f"Toko {r['store_id']}" if r["level"] == "store" else (r["category"] or "Jaringan")
+        print(f"{r['level']:<10}{label[:19]:<20}{format_idr(r['planned_incremental']):>15}"
+              f"{format_idr(r['incr_p10']):>15}{format_idr(r['incr_p50']):>15}{format_idr(r['incr_p90']):>15}"
+              f"{r['roi_p10']:>9.3f}{r['roi_p50']:>9.3f}{r['roi_p90']:>9.3f}{r['prob_loss']*100:>8.1f}%")
+    if "reopt_store_incr" in sim:
+        plan, reopt = sim["store_incr"].sum(axis=1), sim["reopt_store_incr"].sum(axis=1)
+        q = np.percentile(reopt, SIM_PERCENTILES)
+        print("-"*len(header))
+        print("Optimasi ulang per draw (informasi sempurna): "
+              + " | ".join(f"P{p} {format_idr(v)}" for p, v in zip(SIM_PERCENTILES, q)))
+        print(f"Rata-rata nilai re-optimasi vs rencana: {format_idr((reopt - plan).mean())}")
+
+# =======================================================
+# KALIBRASI ELASTISITAS & BASELINE DARI DATA POS
+# =======================================================
+# Satu baris POS = unit terjual satu kategori di satu toko pada satu tanggal dengan satu harga
+# (kolom date, store_id, category, price, units). File CSV dibagi ke rentang byte, tiap rentang dibaca lewat
+# mmap di process pool dan diringkas menjadi statistik cukup regresi log-log per kunci; memori hanya
+# bergantung pada jumlah kunci, bukan ukuran file. File .gz dibaca streaming per blok baris.
+CALIBRATION_CHUNK_BYTES = 32 * 2**20
+CALIBRATION_GZ_LINES = 500_000
+POS_COLUMNS = ("store_id", "category", "price", "units")
+
+def _new_stats() -> list:
+    # n, jumlah x, y, xx, xy, yy (x = ln harga, y = ln unit), harga maksimum, baris dengan unit <= 0
+    return [0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0]
+
+def _accumulate_pos(lines, idx: Tuple[int, ...], per_store: bool, stats: Dict):
+    i_store, i_cat, i_price, i_units = idx
+    log = math.log
+    for f in csv.reader(lines):
+        if len(f) <= max(idx): continue
+        try:
+            price, units = float(f[i_price]), float(f[i_units])
+            cat = f[i_cat].strip()
+            keys = (cat, (cat, int(f[i_store]))) if per_store else (cat,)
+        except ValueError:
+            continue
+        if price <= 0: continue
+        if units <= 0:
+            for key in keys:
+                st = stats.get(key) or stats.setdefault(key, _new_stats())
+                st[7] += 1
+            continue
+        x, y = log(price), log(units)
+        for key in keys:
+            st = stats.get(key)
+            if st is None: st = stats[key] = _new_stats()
+            st[0] += 1; st[1] += x; st[2] += y; st[3] += x*x; st[4] += x*y; st[5] += y*y
+            if price > st[6]: st[6] = price
+
+def _merge_stats(into: Dict, part: Dict):
+    for key, st in part.items():
+        cur = into.get(key)
+        if cur is None:
+            into[key] = st; continue
+        for k in (0, 1, 2, 3, 4, 5, 7): cur[k] += st[k]
+        cur[6] = max(cur[6], st[6])
+
+def pos_header(path: str) -> Tuple[Tuple[int, ...], int]:
+    # Indeks kolom wajib dan panjang header (byte)
+    opener = _open_text if path.endswith(".gz") else (lambda p, m: open(p, m, encoding="utf-8-sig", newline=""))
+    with opener(path, "r") as f:
+        header = f.readline()
+    cols = [c.strip().lstrip("\ufeff").lower() for c in next(csv.reader([header]))]
+    missing = [c for c in POS_COLUMNS if c not in cols]
+    if missing:
+        raise ValueError(f"{path}: kolom {', '.join(missing)} wajib ada di data POS")
+    return tuple(cols.index(c) for c in POS_COLUMNS), len(header.encode("utf-8"))
+
+def _calibrate_range(job):
+    import mmap
+    path, lo, hi, idx, per_store = job
+    stats: Dict = {}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Baris menjadi milik rentang tempat baris itu dimulai
+        if mm[lo-1:lo] != b"\n":
+            nl = mm.find(b"\n", lo); lo = len(mm) if nl < 0 else nl + 1
+        if hi < len(mm) and mm[hi-1:hi] != b"\n":
+            nl = mm.find(b"\n", hi); hi = len(mm) if nl < 0 else nl + 1
+        data = mm[lo:hi] if hi > lo else b""
+    _accumulate_pos(data.decode("utf-8").splitlines(), idx, per_store, stats)
+    return stats
+
+def calibrate_pos(paths: List[str], workers: int, per_store: bool = False) -> Dict:
+    stats: Dict = {}
+    jobs = []
+    for path in paths:
+        idx, header_len = pos_header(path)
+        if path.endswith(".gz"):
+            with _open_text(path, "r") as f:
+                f.readline()
+                while True:
+                    lines = [line for _, line in zip(range(CALIBRATION_GZ_LINES), f)]
+                    if not lines: break
+                    part: Dict = {}
+                    _accumulate_pos(lines, idx, per_store, part)
+                    _merge_stats(stats, part)
+            continue
+        size = os.path.getsize(path)
+        jobs += [(path, lo, min(lo + CALIBRATION_CHUNK_BYTES, size), idx, per_store)
+                 for lo in range(header_len, size, CALIBRATION_CHUNK_BYTES)]
+    if workers > 1 and len(jobs) > 1:
+        with multiprocessing.Pool(processes=min(workers, len(jobs))) as pool:
+            for part in pool.imap_unordered(_calibrate_range, jobs):
+                _merge_stats(stats, part)
+    else:
+        for job in jobs:
+            _merge_stats(stats, _calibrate_range(job))
+    return stats
+
+def fit_demand(st: list, min_obs: int) -> Dict:
+    # ln(unit) = a + e ln(harga). Parameter model: uplift = elasticity x diskon x 0.85 dan (1-d)^e ~ 1 - e d,
+    # sehingga elasticity = -e / 0.85. Baseline = unit harian pada harga reguler (harga maksimum teramati)
+    n, sx, sy, sxx, sxy, syy, p_max, zeros = st
+    if n < max(2, min_obs):
+        return None
+    var_x = n * sxx - sx * sx
+    var_y = n * syy - sy * sy
+    if var_x <= 1e-12 * max(1.0, n * sxx):
+        return None
+    e = (n * sxy - sx * sy) / var_x
+    a = (sy - e * sx) / n
+    r2 = (n * sxy - sx * sy) ** 2 / (var_x * var_y) if var_y > 0 else 0.0
+    return {"obs": n, "zero_rows": zeros, "loglog_elasticity": e, "elasticity": max(0.0, -e / 0.85),
+            "baseline_daily_units": math.exp(a + e * math.log(p_max)), "price_ref": p_max, "r2": r2}
+
+def calibrated_table(stats: Dict, min_obs: int) -> Tuple[CategoryTable, Dict[str, Dict]]:
+    # Tabel aktif diperbarui (weekly_sales, price, elasticity) untuk kategori yang fit-nya valid;
+    # kategori POS baru ditambahkan sebagai baris baru
+    fits = {k: fit_demand(st, min_obs) for k, st in stats.items() if isinstance(k, str)}
+    records = category_records(PARAMS)
+    known = {r["name"] for r in records}
+    records += [{"name": k} for k in sorted(fits) if fits[k] and k not in known]
+    extra = {}
+    for rec in records:
+        fit = fits.get(rec["name"])
+        if not fit: continue
+        rec.update(weekly_sales=round(fit["baseline_daily_units"] * 7, 3), price=round(fit["price_ref"], 2),
+                   elasticity=round(fit["elasticity"], 4))
+        extra[rec["name"]] = {"calib_obs": fit["obs"], "calib_r2": round(fit["r2"], 4),
+                              "calib_loglog_elasticity": round(fit["loglog_elasticity"], 4)}
+    return compile_category_table(records), extra
+
+def store_calibration_rows(stats: Dict, min_obs: int) -> List[Dict]:
+    rows = []
+    for key in sorted(k for k in stats if isinstance(k, tuple)):
+        fit = fit_demand(stats[key], min_obs)
+        if fit:
+            rows.append({"store_id": key[1], "category": key[0], "obs": fit["obs"],
+                         "elasticity": round(fit["elasticity"], 4),
+                         "baseline_daily_units": round(fit["baseline_daily_units"], 3),
+                         "price_ref": round(fit["price_ref"], 2), "r2": round(fit["r2"], 4)})
+    return rows
+
+# =======================================================
+# PROFILING PER TAHAP
+# =======================================================
+class StageProfiler:
+    # Mencatat wall time (inklusif), jumlah panggilan dan selisih blok memori per tahap
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+
+    def record(self, name: str, wall: float, blocks: int):
+        st = self.stages.get(name)
+        if st is None:
+            st = self.stages[name] = [0, 0.0, 0]
+        st[0] += 1; st[1] += wall; st[2] += blocks
+
+    @contextmanager
+    def stage(self, name: str):
+        b0 = sys.getallocatedblocks(); t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0, sys.getallocatedblocks() - b0)
+
+    def take(self) -> Dict[str, List[float]]:
+        # Snapshot lalu reset (dipakai worker untuk mengirim statistik ke proses induk)
+        out, self.stages = self.stages, {}
+        return out
+
+    def merge(self, stages: Dict[str, List[float]]):
+        for name, (calls, wall, blocks) in (stages or {}).items():
+            st = self.stages.setdefault(name, [0, 0.0, 0])
+            st[0] += calls; st[1] += wall; st[2] += blocks
+
+    def report(self, total_wall: float) -> Dict:
+        stages = {
+            name: {"calls": int(calls), "wall_s": round(wall, 6),
+                   "mean_us": round(wall / calls * 1e6, 3) if calls else 0.0,
+                   "pct_of_total": round(wall / total_wall * 100, 2) if total_wall else 0.0,
+                   "alloc_blocks": int(blocks)}
+            for name, (calls, wall, blocks) in sorted(self.stages.items(), key=lambda x: -x[1][1])
+        }
+        return {"version": 1, "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "argv": sys.argv[1:], "python": sys.version.split()[0], "engine": resolve_engine(),
+                "solver": SOLVER, "stores": len(STORES), "categories": len(PARAMS),
+                "total_wall_s": round(total_wall, 6), "wall_is_inclusive": True, "stages": stages}
+
+PROFILER = None
+
+_IN_WORKER = False
+
+class _NullStage:
+    def __enter__(self): return None
+    def __exit__(self, *exc): return False
+
+NULL_STAGE = _NullStage()
+
+def stage(name: str):
+    # Blok tahap inline; tanpa --profile hanya mengembalikan context kosong
+    return PROFILER.stage(name) if PROFILER is not None else NULL_STAGE
+
+# Fungsi hot-path yang dibungkus saat profiling aktif (nama fungsi -> nama tahap)
+PROFILED_FUNCTIONS = {
+    "build_event_calendar": "build_event_calendar",
+    "calendar_index": "calendar_index",
+    "event_boost_for_day": "event_boost_for_day",
+    "option_values_for_category": "compute_options_for_category",
+    "evaluate_options_batch": "evaluate_options_batch",
+    "best_options_batch": "best_options_batch",
+    "select_plan": "selection",
+    "pick_daily_plan": "pick_daily_plan",
+    "plan_row": "plan_row",
+    "write_csv": "write_csv",
+    "print_console_details": "print_console_details",
+    "print_category_performance_analysis": "print_category_performance_analysis",
+    "print_optimization_summary": "print_optimization_summary",
+}
+
+def _profiled(fn, name: str):
+    def wrapper(*args, **kwargs):
+        with PROFILER.stage(name):
+            return fn(*args, **kwargs)
+    wrapper.__wrapped__ = fn
+    wrapper.__name__ = fn.__name__
+    return wrapper
+
+def enable_profiling():
+    # Fungsi dibungkus lewat globals modul, jadi tanpa --profile tidak ada overhead sama sekali
+    global PROFILER
+    if PROFILER is None:
+        PROFILER = StageProfiler()
+    g = globals()
+    for fn_name, stage_name in PROFILED_FUNCTIONS.items():
+        if not hasattr(g[fn_name], "__wrapped__"):
+            g[fn_name] = _profiled(g[fn_name], stage_name)
+    if not hasattr(RowSink.write, "__wrapped__"):
+        RowSink.write = _profiled(RowSink.write, "write_csv")
+
+def worker_profile():
+    # Hanya worker pool yang mengirim statistiknya; proses induk mencatat langsung
+    return PROFILER.take() if PROFILER is not None and _IN_WORKER else None
+
+def write_profile_report(path: str, total_wall: float):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(PROFILER.report(total_wall), f, indent=2)
+
 # =======================================================
 # OUTPUT
 # =======================================================
@@ -403,8 +2716,8 @@ def print_console_details(day: date, sum_rows: List[Dict], chosen_by_store: Dict
         print(f" Toko {r['store_id']:>2} | Promos: {r['promos_scheduled']:>2}/{r['max_promos_allowed']:>2} | "
               f"Incremental: {format_idr(r['incremental_profit_total'])} | Avg ROI: {r['avg_roi']}")
     print("-"*100)
-    print(f" TOTAL (7 toko) Incremental Profit: {format_idr(grand)}")
-    print(f" Average per Store: {format_idr(grand/7)} | Target was: {format_idr(1_000_000)}")
+    print(f" TOTAL ({len(sum_rows)} toko) Incremental Profit: {format_idr(grand)}")
+    print(f" Average per Store: {format_idr(grand/max(1, len(sum_rows)))} | Target was: {format_idr(1_000_000)}")
     print("="*100)
     for store_id in sorted(chosen_by_store.keys()):
         chosen = sorted(chosen_by_store[store_id], key=lambda o: (o.incremental_profit, o.roi), reverse=True)
@@ -440,7 +2753,7 @@ def print_console_details(day: date, sum_rows: List[Dict], chosen_by_store: Dict
         print(f"  Mix: {trade_count} Trade + {instore_count} In-Store | Target Achievement: {tot_incr/1_000_000:.1f}x")
 
 # Analisis performa kategori
-def print_category_performance_analysis(chosen_by_store: Dict[int, List[PromoOption]]):
+def category_performance(chosen_by_store: Dict[int, List[PromoOption]]) -> Dict[str, Dict]:
     category_stats = {}
     for store_id, promos in chosen_by_store.items():
         for promo in promos:
@@ -464,6 +2777,10 @@ def print_category_performance_analysis(chosen_by_store: Dict[int, List[PromoOpt
             stats['avg_profit'] = stats['total_profit'] / stats['count']
             stats['avg_roi'] = stats['total_roi'] / stats['count']
             stats['avg_uplift'] = stats['avg_uplift'] / stats['count']
+    return category_stats
+
+def print_category_performance_analysis(chosen_by_store: Dict[int, List[PromoOption]]):
+    category_stats = category_performance(chosen_by_store)
     sorted_categories = sorted(category_stats.items(), key=lambda x: x[1]['total_profit'], reverse=True)
     print("\n" + "="*100)
     print("ANALISIS PERFORMANCE KATEGORI")
@@ -480,12 +2797,22 @@ def print_category_performance_analysis(chosen_by_store: Dict[int, List[PromoOpt
               f"{stats['avg_uplift']:>10.1f}% "
               f"{trade_instore:>13}")
 
-def print_optimization_summary(day: date, chosen_by_store: Dict[int, List[PromoOption]]):
+def optimization_summary(chosen_by_store: Dict[int, List[PromoOption]]) -> Dict:
     total_campaigns = sum(len(promos) for promos in chosen_by_store.values())
-    total_profit = sum(sum(p.incremental_profit for p in promos) for promos in chosen_by_store.values())
-    total_investment = sum(sum(p.invest_cost for p in promos) for promos in chosen_by_store.values())
     trade_campaigns = sum(sum(1 for p in promos if p.promo_type == "Trade") for promos in chosen_by_store.values())
-    instore_campaigns = total_campaigns - trade_campaigns
+    return {
+        "total_campaigns": total_campaigns,
+        "trade_campaigns": trade_campaigns,
+        "instore_campaigns": total_campaigns - trade_campaigns,
+        "total_profit": sum(sum(p.incremental_profit for p in promos) for promos in chosen_by_store.values()),
+        "total_investment": sum(sum(p.invest_cost for p in promos) for promos in chosen_by_store.values()),
+    }
+
+def print_optimization_summary(day: date, chosen_by_store: Dict[int, List[PromoOption]]):
+    summary = optimization_summary(chosen_by_store)
+    total_campaigns, trade_campaigns = summary["total_campaigns"], summary["trade_campaigns"]
+    instore_campaigns = summary["instore_campaigns"]
+    total_profit, total_investment = summary["total_profit"], summary["total_investment"]
     print("\n" + "="*100)
     print("RINGKASAN OPTIMASI & INSIGHTS")
     print("="*100)
@@ -496,40 +2823,509 @@ def print_optimization_summary(day: date, chosen_by_store: Dict[int, List[PromoO
     print(f"Average Profit per Campaign: {format_idr(total_profit/total_campaigns)}")
     print(f"Cost per Rupiah Earned: Rp {total_investment/total_profit:.2f}")
 
+# =======================================================
+# MODE SERVER (JSON-LINES VIA STDIO / TCP)
+# =======================================================
+# Tabel toko/kategori, kalender per tahun dan rencana yang sudah dihitung tetap hangat di memori proses.
+# Satu request per baris JSON: {"id": .., "op": "plan"|"summary"|"analytics"|"stats"|"ping",
+# "date": "YYYY-MM-DD", "target": 1000000, "store_id": 3 (opsional)}; satu respons per baris dengan id yang sama.
+# Perhitungan rencana (CPU-bound) dijalankan di process pool; request yang sama sedang dihitung cukup ditunggu.
+SERVER_OPS = ("plan", "summary", "analytics", "stats", "ping")
+
+def _server_plan_job(job: Tuple[date, int]) -> OptionTable:
+    day, target = job
+    return OptionTable.from_chosen(choose_day(day, target))
+
+class PlanServer:
+    def __init__(self, workers: int = 1, cache_size: int = 4096):
+        self.workers, self.cache_size = workers, cache_size
+        self.plans: "OrderedDict[str, Dict[int, List[PromoOption]]]" = OrderedDict()
+        self.pending: Dict[str, "asyncio.Future"] = {}
+        self.executor = None
+        self.stats = {"requests": 0, "errors": 0, "cache_hits": 0, "computed": 0}
+
+    def start(self):
+        import concurrent.futures
+        if self.workers > 1:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, initializer=apply_planner_settings,
+                initargs=(dict(planner_settings(), STORE_WORKERS=1),))
+        else:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        # Kalender tahun berjalan & berikutnya dibangun di muka
+        for year in (date.today().year, date.today().year + 1):
+            calendar_index(year)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    async def chosen(self, day: date, target: int) -> Dict[int, List[PromoOption]]:
+        # Kunci konten: hari berbeda dengan event identik memakai rencana yang sama
+        key = plan_cache_key(day, target)
+        plan = self.plans.get(key)
+        if plan is not None:
+            self.plans.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return plan
+        import asyncio
+        fut = self.pending.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = self.pending[key] = loop.run_in_executor(self.executor, _server_plan_job, (day, target))
+            try:
+                table = await fut
+            finally:
+                del self.pending[key]
+            plan = self.plans[key] = table.by_store(st["store_id"] for st in STORES)
+            self.stats["computed"] += 1
+            while len(self.plans) > self.cache_size:
+                self.plans.popitem(last=False)
+            return plan
+        # Hasil diambil dari future, bukan dari cache: entri bisa sudah tergusur LRU saat penunggu bangun
+        table = await asyncio.shield(fut)
+        return table.by_store(st["store_id"] for st in STORES)
+
+    async def handle(self, request: Dict) -> Dict:
+        op = request.get("op", "plan")
+        if op not in SERVER_OPS:
+            raise ValueError(f"op tidak dikenal: {op}")
+        if op == "ping":
+            return {"pong": True}
+        if op == "stats":
+            return dict(self.stats, cached_plans=len(self.plans), in_flight=len(self.pending))
+        day = date.fromisoformat(request["date"])
+        target = int(request.get("target", 1_000_000))
+        chosen_by_store = await self.chosen(day, target)
+        store_id = request.get("store_id")
+        if store_id is not None:
+            store_id = int(store_id)
+            if store_id not in chosen_by_store:
+                raise ValueError(f"store_id tidak dikenal: {store_id}")
+            chosen_by_store = {store_id: chosen_by_store[store_id]}
+        if op == "plan":
+            return {"rows": [plan_row(day, sid, o) for sid, opts in chosen_by_store.items() for o in opts]}
+        if op == "summary":
+            stores = [st for st in STORES if st["store_id"] in chosen_by_store]
+            return {"rows": [summary_row(day, st["store_id"], max_promos_for(st), chosen_by_store[st["store_id"]])
+                             for st in stores]}
+        return {"categories": category_performance(chosen_by_store),
+                "summary": optimization_summary(chosen_by_store)}
+
+    async def respond(self, line: bytes, write):
+        self.stats["requests"] += 1
+        rid = None
+        try:
+            request = json.loads(line)
+            rid = request.get("id")
+            response = {"id": rid, "ok": True, "result": await self.handle(request)}
+        except Exception as e:
+            self.stats["errors"] += 1
+            response = {"id": rid, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        write((json.dumps(response) + "\n").encode())
+
+    async def serve_stream(self, reader, write):
+        # Tiap baris diproses sebagai task tersendiri: request lambat tidak menahan request berikutnya
+        import asyncio
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line: break
+            if not line.strip(): continue
+            task = asyncio.ensure_future(self.respond(line, write))
+            tasks.add(task); task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+async def _serve_stdio(server: PlanServer):
+    import asyncio
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2**20)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    out = sys.stdout.buffer
+    def write(data: bytes):
+        out.write(data); out.flush()
+    await server.serve_stream(reader, write)
+
+async def _serve_tcp(server: PlanServer, host: str, port: int):
+    import asyncio
+    async def client(reader, writer):
+        try:
+            await server.serve_stream(reader, writer.write)
+            await writer.drain()
+        finally:
+            writer.close()
+    tcp = await asyncio.start_server(client, host, port, limit=2**20)
+    print(f"Server JSON-lines aktif di {host}:{port}", file=sys.stderr, flush=True)
+    async with tcp:
+        await tcp.serve_forever()
+
+def run_server(args):
+    # --serve stdio | --serve tcp:HOST:PORT
+    import asyncio
+    server = PlanServer(args.workers, args.serve_cache)
+    server.start()
+    try:
+        if args.serve == "stdio":
+            asyncio.run(_serve_stdio(server))
+        else:
+            _, host, port = args.serve.split(":")
+            asyncio.run(_serve_tcp(server, host or "127.0.0.1", int(port)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+# =======================================================
+# MODE BATCH NON-INTERAKTIF (plan / summary / analytics)
+# =======================================================
+# Jalur ramping untuk cron/orkestrasi: tanpa header/format_idr di console, numpy hanya dimuat bila engine-nya dipakai,
+# banyak job (tanggal, target) dari satu manifest dalam satu proses, dan rencana dengan kunci konten sama
+# (event, toko, tabel, target, aturan seleksi) dihitung sekali lalu dipakai ulang oleh job lain.
+BATCH_COMMANDS = ("plan", "summary", "analytics")
+BATCH_HELP = {"plan": "Tulis rencana promo & ringkasan per toko",
+              "summary": "Tulis ringkasan per toko saja",
+              "analytics": "Tulis analisis kategori & total per job"}
+# auto: bila (rencana unik × toko × kategori × tangga) <= batas ini, engine skalar lebih cepat daripada impor numpy
+BATCH_SCALAR_ELEMENTS = 40_000
+
+def read_manifest(path: str, default_target: int) -> List[Tuple[date, int]]:
+    # CSV berkolom date[,target] atau JSONL {"date": .., "target": ..}; "-" = stdin; target kosong = --target
+    f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        lines = [ln for ln in f.read().splitlines() if ln.strip()]
+    finally:
+        if f is not sys.stdin: f.close()
+    if lines and lines[0].lstrip().startswith("{"):
+        records = [json.loads(ln) for ln in lines]
+    else:
+        records = list(csv.DictReader(lines))
+        if records and "date" not in records[0]:
+            raise SystemExit(f"manifest {path}: kolom 'date' tidak ditemukan")
+    jobs = []
+    for r in records:
+        target = r.get("target")
+        jobs.append((date.fromisoformat(str(r["date"]).strip()),
+                     int(float(target)) if target not in (None, "") else default_target))
+    return jobs
+
+def batch_engine(engine: str, jobs: List[Tuple[date, int]]) -> str:
+    # Hasil engine skalar & numpy identik, jadi auto cukup memilih yang lebih murah untuk ukuran batch ini
+    if engine != "auto":
+        return resolve_engine(engine)
+    plans = len({(day_signature(day_events(d)), t) for d, t in jobs})
+    if plans * len(STORES) * len(PARAMS) * len(LADDER) <= BATCH_SCALAR_ELEMENTS:
+        return "scalar"
+    return resolve_engine(engine)
+
+def batch_plans(jobs: List[Tuple[date, int]], workers: int = 1):
+    # (tanggal, target, rencana) sesuai urutan manifest
+    keys = [plan_cache_key(d, t) for d, t in jobs]
+    plans: Dict[str, Dict[int, List[PromoOption]]] = {}
+    unique = {}
+    for job, key in zip(jobs, keys):
+        unique.setdefault(key, job)
+    if workers > 1 and len(unique) > 1:
+        settings = dict(planner_settings(), STORE_WORKERS=1)
+        with multiprocessing.Pool(processes=min(workers, len(unique)), initializer=apply_planner_settings,
+                                  initargs=(settings,)) as pool:
+            for key, table in zip(unique, pool.imap(_server_plan_job, unique.values())):
+                plans[key] = table.by_store(st["store_id"] for st in STORES)
+    for (day, target), key in zip(jobs, keys):
+        plan = plans.get(key)
+        if plan is None:
+            plan = plans[key] = choose_day(day, target)
+        yield day, target, plan
+
+def analytics_rows(day: date, target: int, chosen_by_store: Dict[int, List[PromoOption]]) -> List[Dict]:
+    # Satu baris per kategori + satu baris total (versi tabel dari --analytics)
+    invest: Dict[str, float] = {}
+    for promos in chosen_by_store.values():
+        for p in promos:
+            invest[p.category] = invest.get(p.category, 0.0) + p.invest_cost
+    def row(level, category, st, total_invest):
+        return {"date": day.isoformat(), "target": target, "level": level, "category": category,
+                "campaigns": st["count"], "trade_campaigns": st["trade_vs_instore"]["Trade"],
+                "instore_campaigns": st["trade_vs_instore"]["In-Store"],
+                "total_profit": int(round(st["total_profit"])), "total_investment": int(round(total_invest)),
+                "avg_profit": int(round(st["avg_profit"])), "avg_roi": round(st["avg_roi"], 3),
+                "avg_uplift_pct": round(st["avg_uplift"], 1)}
+    stats = category_performance(chosen_by_store)
+    summary = optimization_summary(chosen_by_store)
+    n = summary["total_campaigns"]
+    total = {"count": n, "trade_vs_instore": {"Trade": summary["trade_campaigns"],
+                                              "In-Store": summary["instore_campaigns"]},
+             "total_profit": summary["total_profit"], "avg_profit": summary["total_profit"] / n if n else 0.0,
+             "avg_roi": sum(st["total_roi"] for st in stats.values()) / n if n else 0.0,
+             "avg_uplift": sum(st["avg_uplift"] * st["count"] for st in stats.values()) / n if n else 0.0}
+    rows = [row("total", "", total, summary["total_investment"])]
+    rows += [row("category", cat, st, invest[cat])
+             for cat, st in sorted(stats.items(), key=lambda x: x[1]["total_profit"], reverse=True)]
+    return rows
+
+def batch_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="supermarket_optimizer.py",
+                                     description="Mode batch non-interaktif Supermarket Jack (tanpa output console)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in BATCH_COMMANDS:
+        p = sub.add_parser(name, help=BATCH_HELP[name])
+        p.add_argument("--date", action="append", default=[], help="Tanggal job (YYYY-MM-DD); boleh diulang")
+        p.add_argument("--manifest", type=str, default=None,
+                       help="File job: CSV (date,target) atau JSONL; '-' = stdin")
+        p.add_argument("--target", type=int, default=1_000_000, help="Target default per toko (IDR)")
+        if name == "plan":
+            p.add_argument("--plan-out", type=str, default="promotion_plan_optimized.csv", help="Output rencana")
+            p.add_argument("--summary-out", type=str, default="promotion_summary_optimized.csv",
+                           help="Output ringkasan per toko")
+            p.add_argument("--rollup", type=str, default=None, metavar="JSON",
+                           help="Rollup analitik inkremental: baris plan ikut diagregasi ke file JSON ini")
+        else:
+            default = "promotion_summary_optimized.csv" if name == "summary" else "promotion_analytics.csv"
+            p.add_argument("--out", type=str, default=default, help="File output (CSV/JSONL/SQLite)")
+        p.add_argument("--write-mode", choices=WRITE_MODES, default="overwrite")
+        p.add_argument("--workers", type=int, default=1, help="Jumlah proses untuk rencana unik")
+        p.add_argument("--store-workers", type=int, default=STORE_WORKERS)
+        p.add_argument("--categories", type=str, default=None)
+        p.add_argument("--stores", type=str, default=None)
+        p.add_argument("--engine", choices=["auto", "numpy", "scalar"], default="auto")
+        p.add_argument("--solver", choices=sorted(SOLVERS), default=SOLVER)
+        p.add_argument("--discount-grid", choices=sorted(DISCOUNT_GRIDS), default=DISCOUNT_GRID)
+        p.add_argument("--cache-dir", type=str, default=None)
+        p.add_argument("--cache-max-mb", type=float, default=256)
+        p.add_argument("--cache-max-age-days", type=float, default=30)
+    return parser
+
+def run_batch(argv: List[str]) -> int:
+    global ENGINE
+    args = batch_parser().parse_args(argv)
+    configure_planner(args)
+    jobs = [(date.fromisoformat(d), args.target) for d in args.date]
+    if args.manifest:
+        jobs += read_manifest(args.manifest, args.target)
+    if not jobs:
+        raise SystemExit("mode batch membutuhkan --date atau --manifest")
+    ENGINE = batch_engine(args.engine, jobs)
+    try:
+        if args.command == "plan":
+            with open_output_sinks(args) as (plan_out, sum_out):
+                for day, target, plan in batch_plans(jobs, args.workers):
+                    plan_out.write(OptionTable.from_chosen(plan).plan_rows(day))
+                    sum_out.write(summary_rows(day, plan))
+        else:
+            table = "summary" if args.command == "summary" else "analytics"
+            with open_sink(args.out, table, args.write_mode) as out:
+                for day, target, plan in batch_plans(jobs, args.workers):
+                    out.write(summary_rows(day, plan) if table == "summary" else analytics_rows(day, target, plan))
+    finally:
+        close_store_pool()
+        if PLAN_CACHE is not None:
+            PLAN_CACHE.evict()
+    return 0
+
+def configure_planner(args):
+    # Pengaturan bersama CLI lama & mode batch (engine di-resolve terpisah oleh pemanggil)
+    global SOLVER, STORE_WORKERS, PLAN_CACHE
+    SOLVER = args.solver
+    set_discount_grid(args.discount_grid)
+    if args.categories:
+        load_category_table(args.categories)
+    if args.stores:
+        load_stores(args.stores)
+    STORE_WORKERS = max(1, args.store_workers)
+    if args.cache_dir:
+        PLAN_CACHE = PlanCache(args.cache_dir, int(args.cache_max_mb * 2**20), args.cache_max_age_days * 86400)
+
 def main():
-    parser = argparse.ArgumentParser(description="Sistem Promosi Otomatis Supermarket Jack")
+    if len(sys.argv) > 1 and sys.argv[1] in BATCH_COMMANDS:
+        return run_batch(sys.argv[1:])
+    global ENGINE, SOLVER, STORE_WORKERS, PLAN_CACHE, INCREMENTAL, FATIGUE
+    epilog = ("mode batch non-interaktif (subcommand sebagai argumen pertama, tanpa output console):\n"
+              + "".join(f"  {name:<10} {BATCH_HELP[name]}\n" for name in BATCH_COMMANDS)
+              + "contoh: supermarket_optimizer.py plan --manifest jobs.csv | bantuan: supermarket_optimizer.py plan --help")
+    parser = argparse.ArgumentParser(description="Sistem Promosi Otomatis Supermarket Jack", epilog=epilog,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
     parser.add_argument("--date", type=str, default=None, help="Tanggal rencana (YYYY-MM-DD). Contoh: 2025-11-11")
     parser.add_argument("--target", type=int, default=1_000_000, help="Target minimal profit harian per toko (IDR)")
     parser.add_argument("--topn", type=int, default=8, help="Cetak TOP-N kampanye per toko ke console")
     parser.add_argument("--no_details", action="store_true", help="Jika diset, tidak menampilkan detail console")
     parser.add_argument("--analytics", action="store_true", help="Tampilkan analisis kategori dan insights")
+    parser.add_argument("--start", type=str, default=None, help="Mode horizon: tanggal awal (YYYY-MM-DD)")
+    parser.add_argument("--end", type=str, default=None, help="Mode horizon: tanggal akhir inklusif (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=None, help="Mode horizon: jumlah hari mulai dari --start (default hari ini)")
+    parser.add_argument("--cooldown", type=int, default=0, metavar="N",
+                        help="Mode horizon: jeda N hari sebelum kategori yang sama dipromosikan lagi di toko yang sama")
+    parser.add_argument("--max-promo-days-week", type=int, default=7, metavar="K",
+                        help="Mode horizon: maksimum hari promo per kategori per toko dalam 7 hari bergulir")
+    parser.add_argument("--fatigue-decay", type=float, default=1.0,
+                        help="Mode horizon: multiplier uplift per promo sebelumnya dalam --fatigue-window (mis. 0.85)")
+    parser.add_argument("--fatigue-window", type=int, default=7, help="Jendela hari untuk --fatigue-decay")
+    parser.add_argument("--find-best-days", type=int, default=None, metavar="K",
+                        help="Ranking K hari terbaik menurut total profit jaringan dalam jendela --start/--end/--days "
+                             "(default 365 hari mulai hari ini)")
+    parser.add_argument("--trade-budgets", type=str, default=None, metavar="FILE",
+                        help="Batas dana trade pemasok per supplier/kategori per bulan (CSV/JSON) untuk horizon "
+                             "--start/--end/--days (default 30 hari)")
+    parser.add_argument("--budget-iters", type=int, default=40, help="Iterasi subgradien alokasi anggaran trade")
+    parser.add_argument("--simulate", type=int, default=0, metavar="N",
+                        help="Simulasi risiko Monte Carlo N draw atas rencana satu hari (butuh numpy)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed acak simulasi")
+    parser.add_argument("--sim-elas-sd", type=float, default=0.25, help="Sigma lognormal elastisitas per kategori")
+    parser.add_argument("--sim-boost-sd", type=float, default=0.05, help="Sigma lognormal boost event")
+    parser.add_argument("--sim-noise-sd", type=float, default=0.15, help="Sigma lognormal unit dasar per toko x kategori")
+    parser.add_argument("--sim-reoptimize", action="store_true", help="Optimasi ulang rencana di setiap draw")
+    parser.add_argument("--sim-out", type=str, default=None, help="File output persentil simulasi (CSV/JSONL/SQLite)")
+    parser.add_argument("--calibrate", type=str, nargs="+", default=None, metavar="POS_CSV",
+                        help="Kalibrasi elastisitas & baseline dari file POS (date,store_id,category,price,units)")
+    parser.add_argument("--calibrate-out", type=str, default="categories_calibrated.csv",
+                        help="File tabel kategori hasil kalibrasi")
+    parser.add_argument("--calibrate-store-out", type=str, default=None,
+                        help="Opsional: fit per toko x kategori (CSV/JSONL/SQLite)")
+    parser.add_argument("--calibrate-min-obs", type=int, default=30, help="Minimum observasi per kunci untuk fit")
+    parser.add_argument("--serve", type=str, default=None, metavar="stdio|tcp:HOST:PORT",
+                        help="Mode server JSON-lines (op: plan, summary, analytics, stats, ping)")
+    parser.add_argument("--serve-cache", type=int, default=4096, help="Jumlah rencana harian yang disimpan di memori server")
+    parser.add_argument("--rollup", type=str, default=None, metavar="JSON",
+                        help="Rollup analitik inkremental: baris plan ikut diagregasi ke file JSON ini")
+    parser.add_argument("--rollup-rebuild", type=str, nargs="+", default=None, metavar="PLAN_FILE",
+                        help="Bangun ulang rollup dari file plan (CSV/CSV.GZ/JSONL) dalam satu lintasan")
+    parser.add_argument("--rollup-top", choices=ROLLUP_DIMENSIONS, default=None,
+                        help="Query top-N (--topn) dari rollup untuk dimensi ini")
+    parser.add_argument("--rollup-by", choices=("profit", "invest", "count", "roi", "mean_roi", "uplift_pct",
+                                                "trade_share"), default="profit", help="Ukuran pengurutan query rollup")
+    parser.add_argument("--rollup-from", type=str, default=None, help="Bulan awal query (YYYY-MM)")
+    parser.add_argument("--rollup-to", type=str, default=None, help="Bulan akhir query inklusif (YYYY-MM)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Jumlah proses untuk mode horizon")
+    parser.add_argument("--categories", type=str, default=None,
+                        help="File CSV/JSON parameter kategori atau SKU (menggantikan tabel bawaan)")
+    parser.add_argument("--stores", type=str, default=None,
+                        help="File CSV/JSON master toko (store_id, open_year, size_m2, sku_count, employees)")
+    parser.add_argument("--store-workers", type=int, default=STORE_WORKERS,
+                        help=f"Jumlah proses untuk loop per toko (aktif bila toko >= {PARALLEL_STORE_MIN})")
+    parser.add_argument("--engine", choices=["auto", "numpy", "scalar"], default="auto",
+                        help="Engine evaluasi opsi: numpy (batch) atau scalar (referensi)")
+    parser.add_argument("--solver", choices=sorted(SOLVERS), default=SOLVER,
+                        help="Pemilihan promosi per toko: exact (DP optimal, default) atau greedy (heuristik)")
+    parser.add_argument("--discount-grid", choices=sorted(DISCOUNT_GRIDS), default=DISCOUNT_GRID,
+                        help="Grid diskon: ladder (10/15/20%% & 15/20/25%%) atau fine (5%%-40%% per 1%%)")
+    parser.add_argument("--plan-out", type=str, default="promotion_plan_optimized.csv",
+                        help="Output rencana: .csv, .csv.gz, .jsonl(.gz) atau .db/.sqlite (SQLite)")
+    parser.add_argument("--summary-out", type=str, default="promotion_summary_optimized.csv",
+                        help="Output ringkasan per toko (format sama seperti --plan-out)")
+    parser.add_argument("--sqlite", type=str, default=None, metavar="DB",
+                        help="Tulis rencana & ringkasan ke satu database SQLite (tabel plan & summary)")
+    parser.add_argument("--write-mode", choices=WRITE_MODES, default="overwrite",
+                        help="overwrite (default), append ke histori, atau upsert per tanggal")
+    parser.add_argument("--cache-dir", type=str, default=None, metavar="DIR",
+                        help="Aktifkan cache rencana persisten di DIR (mis. .plan_cache)")
+    parser.add_argument("--cache-max-mb", type=float, default=256, help="Batas ukuran cache (MB)")
+    parser.add_argument("--cache-max-age-days", type=float, default=30, help="Umur maksimum entri cache (hari)")
+    parser.add_argument("--incremental", type=str, default=None, metavar="STATE",
+                        help="Re-planning inkremental: rencana per toko-hari disimpan di file STATE (JSON) antar-run")
+    parser.add_argument("--incremental-max-days", type=int, default=INCREMENTAL_MAX_DAYS,
+                        help="Jumlah tanggal maksimum di state inkremental (yang paling lama tidak dipakai dibuang)")
+    parser.add_argument("--profile", type=str, default=None, metavar="FILE",
+                        help="Tulis laporan profiling per tahap (JSON) ke FILE")
+    parser.add_argument("--pstats", type=str, default=None, metavar="FILE",
+                        help="Tulis dump cProfile/pstats ke FILE")
     args = parser.parse_args()
+    try:
+        ENGINE = resolve_engine(args.engine)
+    except RuntimeError as e:
+        parser.error(str(e))
+    if args.trade_budgets and ENGINE != "numpy":
+        parser.error("--trade-budgets membutuhkan engine numpy (jangan pakai --engine scalar)")
+    if args.simulate and load_numpy() is None:
+        parser.error("--simulate membutuhkan paket numpy (pip install numpy)")
+    FATIGUE = FatigueRules(max(0, args.cooldown), args.max_promo_days_week, args.fatigue_decay,
+                           max(1, args.fatigue_window))
+    if FATIGUE.active():
+        flags = "--cooldown/--max-promo-days-week/--fatigue-decay"
+        if run_mode(args) != "horizon":
+            parser.error(f"{flags} hanya berlaku di mode horizon (--start/--end/--days)")
+        if ENGINE != "numpy":
+            parser.error(f"{flags} membutuhkan engine numpy (jangan pakai --engine scalar)")
+        if args.cache_dir or args.incremental:
+            parser.error(f"{flags} tidak bisa digabung dengan --cache-dir/--incremental")
+    configure_planner(args)
+    if args.sqlite:
+        args.plan_out = args.summary_out = args.sqlite
+    if args.incremental:
+        # Memo berada di proses ini, jadi perencanaan berjalan serial
+        INCREMENTAL = IncrementalPlanner.load(args.incremental, max(1, args.incremental_max_days))
+        args.workers = STORE_WORKERS = 1
+    try:
+        if args.profile or args.pstats:
+            return run_profiled(args)
+        return run(args)
+    finally:
+        if PLAN_CACHE is not None:
+            PLAN_CACHE.evict()
+        if INCREMENTAL is not None:
+            print_incremental_report(INCREMENTAL)
+            INCREMENTAL.save(args.incremental)
+
+def run_mode(args) -> str:
+    if args.rollup and (args.rollup_rebuild or args.rollup_top):
+        return "rollup"
+    if args.serve:
+        return "serve"
+    if args.calibrate:
+        return "calibrate"
+    if args.trade_budgets:
+        return "trade_budgets"
+    if args.find_best_days:
+        return "find_best_days"
+    if args.start or args.end or args.days:
+        return "horizon"
+    return "day"
+
+def run(args):
+    return {"rollup": run_rollup, "serve": run_server, "calibrate": run_calibration,
+            "trade_budgets": run_trade_budgets, "find_best_days": run_find_best_days,
+            "horizon": run_horizon, "day": run_day}[run_mode(args)](args)
+
+def run_profiled(args):
+    # --profile: laporan JSON per tahap; --pstats: dump cProfile untuk analisis lebih detail
+    import cProfile
+    enable_profiling()
+    cprof = cProfile.Profile() if args.pstats else None
+    t0 = time.perf_counter()
+    if cprof: cprof.enable()
+    try:
+        return run(args)
+    finally:
+        if cprof:
+            cprof.disable(); cprof.dump_stats(args.pstats)
+        total = time.perf_counter() - t0
+        if args.profile:
+            write_profile_report(args.profile, total)
+            print(f"Laporan profiling: {args.profile}")
+        if args.pstats:
+            print(f"Dump pstats: {args.pstats}")
+
+def run_day(args):
     if args.date:
         day = datetime.strptime(args.date, "%Y-%m-%d").date()
     else:
         today = date.today()
-        cands = []
-        for k in range(0, 30):
-            d = today + timedelta(days=k)
-            boost, _ = event_boost_for_day(build_event_calendar(d.year), d)
-            cands.append((boost, d))
-        cands.sort(reverse=True, key=lambda x: x[0])
-        day = cands[0][1]
+        cands = calendar_range(today, today + timedelta(days=29))
+        day = max(cands, key=lambda x: x[1].boost)[0]
     print("\n" + "="*60)
     print("#Sistem Promosi Otomatis untuk Supermarket Jack")
     print("="*60)
     print("Tanggal rencana:", day.isoformat())
     print("Target minimal incremental profit per toko:", f"{format_idr(args.target)}")
-    events = build_event_calendar(day.year)
-    boost, focus_cats = event_boost_for_day(events, day)
+    ev = day_events(day)
+    boost, focus_cats = ev.boost, ev.focus
     if boost > 1.0:
-        active_events = [e.name for e in events if e.day == day]
-        print(f"Event boost: {boost:.2f}x - {', '.join(active_events)}")
+        print(f"Event boost: {boost:.2f}x - {', '.join(ev.names)}")
         if focus_cats and "All" not in focus_cats:
             print(f"Focus categories: {', '.join(focus_cats)}")
     plan_rows, sum_rows, chosen_by_store = pick_daily_plan(day, args.target)
-    write_csv("promotion_plan_optimized.csv", plan_rows)
-    write_csv("promotion_summary_optimized.csv", sum_rows)
+    close_store_pool()
+    with open_output_sinks(args) as (plan_out, sum_out):
+        plan_out.write(plan_rows)
+        sum_out.write(sum_rows)
     if not args.no_details:
         print_console_details(day, sum_rows, chosen_by_store, args.topn)
         if args.analytics:
@@ -537,8 +3333,169 @@ def main():
             print_optimization_summary(day, chosen_by_store)
     else:
         total = sum(r["incremental_profit_total"] for r in sum_rows)
-        print(f"\nTotal profit incremental (7 toko): {format_idr(total)}")
-        print("File yang dibuat: promotion_plan_optimized.csv & promotion_summary_optimized.csv")
+        print(f"\nTotal profit incremental ({len(sum_rows)} toko): {format_idr(total)}")
+        print(f"File yang dibuat: {output_names(args)}")
+    if args.simulate:
+        sim = simulate_plan(day, chosen_by_store, args.simulate, args.seed, args.sim_elas_sd, args.sim_boost_sd,
+                            args.sim_noise_sd, args.sim_reoptimize, args.target)
+        sim_rows = simulation_rows(day, sim)
+        print_simulation_report(sim, sim_rows, args.simulate, args.seed)
+        if args.sim_out:
+            with open_sink(args.sim_out, "simulation", args.write_mode) as sink:
+                sink.write(sim_rows)
+            print(f"File simulasi: {args.sim_out}")
+
+@contextmanager
+def open_output_sinks(args):
+    plan_out = open_sink(args.plan_out, "plan", args.write_mode)
+    if getattr(args, "rollup", None):
+        # Rollup selalu upsert: --write-mode hanya berlaku untuk file plan, tanggal yang ditulis diganti di rollup
+        plan_out = TeeSink([plan_out, AnalyticsRollup(args.rollup, "upsert")])
+    try:
+        sum_out = open_sink(args.summary_out, "summary", args.write_mode)
+        try:
+            yield plan_out, sum_out
+        finally:
+            sum_out.close()
+    finally:
+        plan_out.close()
+
+def output_names(args) -> str:
+    if args.plan_out == args.summary_out:
+        return f"{args.plan_out} (tabel plan & summary)"
+    return f"{args.plan_out} & {args.summary_out}"
+
+def horizon_window(args, default_days: int = 1) -> Tuple[date, date]:
+    start = datetime.strptime(args.start, "%Y-%m-%d").date() if args.start else date.today()
+    if args.end:
+        end = datetime.strptime(args.end, "%Y-%m-%d").date()
+    else:
+        end = start + timedelta(days=(args.days or default_days) - 1)
+    if end < start:
+        raise SystemExit("--end harus sama atau setelah --start")
+    return start, end
+
+def run_horizon(args):
+    start, end = horizon_window(args)
+    days = horizon_days(start, end)
+    print("\n" + "="*60)
+    print("#Sistem Promosi Otomatis untuk Supermarket Jack — Mode Horizon")
+    print("="*60)
+    print(f"Horizon: {start.isoformat()} s/d {end.isoformat()} ({len(days)} hari, {args.workers} worker)")
+    print("Target minimal incremental profit per toko:", f"{format_idr(args.target)}")
+    def on_day(day, sum_rows, day_total):
+        if not args.no_details:
+            print(f" {day.isoformat()} | Toko: {len(sum_rows):>3} | Incremental: {format_idr(day_total)}")
+    stats = None
+    with open_output_sinks(args) as (plan_out, sum_out):
+        if FATIGUE.active():
+            grand, stats = plan_rolling_horizon(days, args.target, FATIGUE, plan_out, sum_out, on_day)
+        else:
+            grand = plan_horizon(days, args.target, args.workers, plan_out, sum_out, on_day)
+    print("-"*60)
+    if stats:
+        print(f"Fatigue: cooldown {FATIGUE.cooldown} hari | maks {FATIGUE.max_days_per_week} hari/minggu | "
+              f"decay {FATIGUE.decay:g} ({FATIGUE.window} hari)")
+        print(f"Opsi diblokir: {stats['blocked']} | Opsi dievaluasi ulang (fatigue): {stats['fatigued']} | "
+              f"Seleksi toko dihitung: {stats['solved']} | Dari memo seleksi: {stats['reused']}")
+    print(f"Total profit incremental ({len(days)} hari): {format_idr(grand)}")
+    print(f"File yang dibuat: {output_names(args)}")
+
+def run_find_best_days(args):
+    start, end = horizon_window(args, default_days=365)
+    days = horizon_days(start, end)
+    print("\n" + "="*60)
+    print("#Sistem Promosi Otomatis untuk Supermarket Jack — Pencarian Hari Terbaik")
+    print("="*60)
+    print(f"Jendela: {start.isoformat()} s/d {end.isoformat()} ({len(days)} hari, {args.workers} worker)")
+    print("Target minimal incremental profit per toko:", f"{format_idr(args.target)}")
+    ranked, stats = find_best_days(days, args.target, args.find_best_days, args.workers)
+    print(f"Profil event unik: {stats['signatures']} | Dievaluasi: {stats['evaluated']} | "
+          f"Batas atas dihitung: {stats['bounds']} | Hari dipangkas: {stats['pruned_days']}")
+    print("-"*60)
+    print("Rank  Tanggal     Hari       Boost  Profit Jaringan      Event")
+    for rank, (day, total) in enumerate(ranked, 1):
+        ev = day_events(day)
+        print(f"{rank:>4}  {day.isoformat()}  {day.strftime('%A'):<9} {ev.boost:>6.2f}  "
+              f"{format_idr(total):>18}   {', '.join(ev.names) or '-'}")
+
+def run_trade_budgets(args):
+    start, end = horizon_window(args, default_days=30)
+    days = horizon_days(start, end)
+    budgets = load_trade_budgets(args.trade_budgets)
+    print("\n" + "="*60)
+    print("#Sistem Promosi Otomatis untuk Supermarket Jack — Anggaran Trade Pemasok")
+    print("="*60)
+    print(f"Horizon: {start.isoformat()} s/d {end.isoformat()} ({len(days)} hari, {args.workers} worker)")
+    print(f"Anggaran: {len(budgets)} baris dari {args.trade_budgets}")
+    plans, report = allocate_trade_budgets(days, budgets, args.target, args.workers, args.budget_iters)
+    with open_output_sinks(args) as (plan_out, sum_out):
+        for day in days:
+            plan_out.write(OptionTable.from_chosen(plans[day]).plan_rows(day))
+            sum_out.write(summary_rows(day, plans[day]))
+    print("-"*60)
+    print(f"{'Anggaran':<28}{'Bulan':>8}{'Budget':>18}{'Terpakai':>18}{'Util':>7}{'Lambda':>8}")
+    for c in report["constraints"]:
+        util = c["spent"] / c["budget"] * 100 if c["budget"] else 0.0
+        print(f"{(c['kind'] + ':' + c['key'])[:27]:<28}{c['month']:>8}{format_idr(c['budget']):>18}"
+              f"{format_idr(c['spent']):>18}{util:>6.0f}%{c['lambda']:>8.3f}")
+    print("-"*60)
+    lost = report["free_profit"] - report["profit"]
+    print(f"Profit tanpa batas anggaran : {format_idr(report['free_profit'])}")
+    print(f"Profit dengan batas anggaran: {format_idr(report['profit'])} (selisih {format_idr(lost)}, "
+          f"{report['iterations']} iterasi)")
+    print(f"File yang dibuat: {output_names(args)}")
+
+def run_calibration(args):
+    print("\n" + "="*60)
+    print("#Sistem Promosi Otomatis untuk Supermarket Jack — Kalibrasi dari Data POS")
+    print("="*60)
+    t0 = time.perf_counter()
+    size = sum(os.path.getsize(p) for p in args.calibrate)
+    stats = calibrate_pos(args.calibrate, args.workers, per_store=bool(args.calibrate_store_out))
+    cat_stats = {k: st for k, st in stats.items() if isinstance(k, str)}
+    rows = sum(st[0] + st[7] for st in cat_stats.values())
+    print(f"File: {len(args.calibrate)} ({size / 2**20:,.1f} MB) | Baris: {rows:,} | "
+          f"Waktu baca: {time.perf_counter() - t0:.2f} s ({args.workers} worker)")
+    table, extra = calibrated_table(stats, args.calibrate_min_obs)
+    write_category_table(args.calibrate_out, table, extra)
+    skipped = sorted(k for k in cat_stats if k not in extra)
+    print(f"Kategori terkalibrasi: {len(extra)} | Dilewati (data kurang/harga tidak bervariasi): {len(skipped)}")
+    print(f"{'Kategori':<22}{'Obs':>10}{'Elastisitas':>13}{'Unit/hari':>11}{'Harga ref':>14}{'R2':>7}")
+    for name in sorted(extra):
+        i = table.ids[name]
+        print(f"{name[:21]:<22}{extra[name]['calib_obs']:>10,}{table.elasticity[i]:>13.3f}"
+              f"{table.weekly_sales[i] / 7:>11.2f}{format_idr(table.price[i]):>14}{extra[name]['calib_r2']:>7.3f}")
+    print(f"Tabel kategori: {args.calibrate_out} (pakai dengan --categories)")
+    if args.calibrate_store_out:
+        with open_sink(args.calibrate_store_out, "calibration") as sink:
+            sink.write(store_calibration_rows(stats, args.calibrate_min_obs))
+        print(f"Kalibrasi per toko: {args.calibrate_store_out}")
+
+def month_arg(text: str) -> str:
+    # YYYY-MM atau YYYY-MM-DD -> YYYY-MM (rollup beresolusi bulan)
+    return text[:7] if text else None
+
+def run_rollup(args):
+    # Rebuild tidak membaca rollup lama (termasuk file versi sebelumnya)
+    rollup = AnalyticsRollup(args.rollup, "overwrite" if args.rollup_rebuild else "append")
+    if args.rollup_rebuild:
+        t0 = time.perf_counter()
+        rollup.rebuild(args.rollup_rebuild)
+        rollup.save()
+        print(f"Rollup dibangun ulang dari {len(args.rollup_rebuild)} file: {len(rollup.dates)} hari, "
+              f"{len(rollup.cells):,} sel ({time.perf_counter() - t0:.2f} s) -> {args.rollup}")
+    if args.rollup_top:
+        start, end = month_arg(args.rollup_from), month_arg(args.rollup_to)
+        t0 = time.perf_counter()
+        top = rollup.top(args.rollup_top, args.rollup_by, args.topn, start, end)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"\nTop {args.topn} {args.rollup_top} menurut {args.rollup_by} "
+              f"({start or 'awal'} s/d {end or 'akhir'}, {elapsed:.1f} ms)")
+        print(f"{'Kunci':<22}{'Promo':>8}{'Profit':>20}{'Investasi':>20}{'ROI':>7}{'Avg ROI':>9}{'Uplift%':>9}{'Trade%':>8}")
+        for key, m in top:
+            print(f"{key[:21]:<22}{m['count']:>8,}{format_idr(m['profit']):>20}{format_idr(m['invest']):>20}"
+                  f"{m['roi']:>7.2f}{m['mean_roi']:>9.2f}{m['uplift_pct']:>9.1f}{m['trade_share']*100:>7.0f}%")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
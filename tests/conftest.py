@@ -0,0 +1,21 @@
+import os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import supermarket_optimizer as so
+
+# Global planner yang diubah oleh test dikembalikan setelah setiap test
+PLANNER_GLOBALS = ("ENGINE", "SOLVER", "PARAMS", "CATEGORIES", "STORES", "STORE_WORKERS", "PLAN_CACHE",
+                   "INCREMENTAL", "DISCOUNT_GRID", "IN_STORE_DISCOUNTS", "TRADE_DISCOUNTS", "LADDER", "FATIGUE")
+
+requires_numpy = pytest.mark.skipif(so.load_numpy() is None, reason="numpy tidak terpasang")
+
+@pytest.fixture(autouse=True)
+def planner_state():
+    saved = {k: getattr(so, k) for k in PLANNER_GLOBALS if hasattr(so, k)}
+    yield so
+    so.close_store_pool()
+    for k, v in saved.items():
+        setattr(so, k, v)
@@ -0,0 +1,63 @@
+import csv
+import json
+import sys
+
+import pytest
+
+import supermarket_optimizer as so
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["supermarket_optimizer.py", *argv])
+    return so.main()
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def test_batch_plan_matches_legacy_cli(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    run_main(monkeypatch, "--date", "2025-11-11", "--no_details", "--plan-out", "legacy_plan.csv",
+             "--summary-out", "legacy_sum.csv")
+    run_main(monkeypatch, "plan", "--date", "2025-11-11", "--plan-out", "batch_plan.csv",
+             "--summary-out", "batch_sum.csv")
+    assert read_csv("batch_plan.csv") == read_csv("legacy_plan.csv")
+    assert read_csv("batch_sum.csv") == read_csv("legacy_sum.csv")
+
+@pytest.mark.parametrize("text", [
+    "date,target\n2025-11-11,\n2025-11-12,2000000\n",
+    '{"date": "2025-11-11"}\n{"date": "2025-11-12", "target": 2000000}\n',
+])
+def test_read_manifest_csv_and_jsonl(tmp_path, text):
+    path = tmp_path / "jobs.txt"
+    path.write_text(text)
+    jobs = so.read_manifest(str(path), 1_000_000)
+    assert [(d.isoformat(), t) for d, t in jobs] == [("2025-11-11", 1_000_000), ("2025-11-12", 2_000_000)]
+
+def test_manifest_without_date_column(tmp_path):
+    path = tmp_path / "jobs.csv"
+    path.write_text("day,target\n2025-11-11,1\n")
+    with pytest.raises(SystemExit):
+        so.read_manifest(str(path), 1_000_000)
+
+def test_batch_analytics_and_summary(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "jobs.jsonl").write_text('{"date": "2025-11-11"}\n{"date": "2025-03-15", "target": 2000000}\n')
+    run_main(monkeypatch, "analytics", "--manifest", "jobs.jsonl", "--out", "a.jsonl")
+    rows = [json.loads(line) for line in open("a.jsonl", encoding="utf-8")]
+    totals = [r for r in rows if r["level"] == "total"]
+    assert [(r["date"], r["target"]) for r in totals] == [("2025-11-11", 1_000_000), ("2025-03-15", 2_000_000)]
+    for t in totals:
+        cats = [r for r in rows if r["level"] == "category" and r["date"] == t["date"]]
+        assert sum(r["campaigns"] for r in cats) == t["campaigns"]
+    run_main(monkeypatch, "summary", "--manifest", "jobs.jsonl", "--out", "s.csv")
+    assert len(read_csv("s.csv")) == 2 * len(so.STORES)
+
+def test_batch_requires_jobs(monkeypatch):
+    with pytest.raises(SystemExit):
+        run_main(monkeypatch, "plan")
+
+def test_legacy_help_lists_batch_subcommands(monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        run_main(monkeypatch, "--help")
+    out = capsys.readouterr().out
+    assert all(f"  {name} " in out for name in so.BATCH_COMMANDS)
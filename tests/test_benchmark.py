@@ -0,0 +1,31 @@
+import benchmark_optimizer as bench
+import supermarket_optimizer as so
+
+def test_synthetic_generators_are_deterministic():
+    assert bench.synthetic_stores(50) == bench.synthetic_stores(50)
+    assert bench.synthetic_stores(50, seed=1) != bench.synthetic_stores(50)
+    stores = bench.synthetic_stores(50)
+    assert [s["store_id"] for s in stores] == list(range(1, 51))
+    table = bench.synthetic_categories(300)
+    assert len(table) == 300 and table.fingerprint() == bench.synthetic_categories(300).fingerprint()
+    assert table.names[:len(so.CATEGORIES_BUILTIN)] == [c[0] for c in so.CATEGORIES_BUILTIN]
+    assert set(table.parents) <= {c[0] for c in so.CATEGORIES_BUILTIN}
+
+def test_bench_case_reports_metrics():
+    case = bench.bench_case(20, 60, 2, 1, 1)
+    assert (case["stores"], case["categories"], case["horizon"]) == (20, 60, 2)
+    assert len(so.STORES) == 20 and len(so.PARAMS) == 60
+    assert all(v > 0 for v in case["metrics"].values())
+
+def baseline(**metrics):
+    return {"cases": [{"stores": 7, "categories": 49, "horizon": 1, "metrics": metrics}]}
+
+def test_compare_baselines_flags_regressions(capsys):
+    old = baseline(pick_daily_plan_s=1.0, write_csv_rows_per_s=1000.0, full_run_s=2.0)
+    assert bench.compare_baselines(old, baseline(pick_daily_plan_s=1.05, write_csv_rows_per_s=990.0,
+                                                 full_run_s=1.0), 10) == 0
+    assert bench.compare_baselines(old, baseline(pick_daily_plan_s=1.5, write_csv_rows_per_s=500.0,
+                                                 full_run_s=2.0), 10) == 2
+    assert "REGRESI" in capsys.readouterr().out
+    other = {"cases": [{"stores": 100, "categories": 49, "horizon": 1, "metrics": {"full_run_s": 99.0}}]}
+    assert bench.compare_baselines(old, other, 10) == 0
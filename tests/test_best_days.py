@@ -0,0 +1,37 @@
+from datetime import date
+
+import pytest
+
+import supermarket_optimizer as so
+
+def brute_force(days, target, top_k):
+    totals = []
+    for day in days:
+        _, sum_rows, _ = so.pick_daily_plan(day, target)
+        totals.append((day, sum(r["incremental_profit_total"] for r in sum_rows)))
+    return sorted(totals, key=lambda x: (-x[1], x[0]))[:top_k]
+
+@pytest.mark.parametrize("solver", ["greedy", "exact"])
+@pytest.mark.parametrize("start,end,top_k", [
+    (date(2025, 3, 20), date(2025, 4, 20), 5),
+    (date(2025, 10, 1), date(2025, 12, 31), 8),
+])
+def test_ranking_matches_brute_force(solver, start, end, top_k):
+    so.SOLVER = solver
+    days = so.horizon_days(start, end)
+    ranked, stats = so.find_best_days(days, 1_000_000, top_k, 1)
+    expected = brute_force(days, 1_000_000, top_k)
+    assert [d for d, _ in ranked] == [d for d, _ in expected]
+    assert [p for _, p in ranked] == pytest.approx([p for _, p in expected], abs=len(so.STORES))
+    assert stats["evaluated"] <= stats["signatures"] < len(days)
+
+def test_parallel_ranking_matches_serial():
+    days = so.horizon_days(date(2025, 1, 1), date(2025, 12, 31))
+    serial, _ = so.find_best_days(days, 1_000_000, 10, 1)
+    parallel, _ = so.find_best_days(days, 1_000_000, 10, 2)
+    assert parallel == serial
+
+def test_large_window_prunes_event_free_days():
+    days = so.horizon_days(date(2025, 1, 1), date(2025, 12, 31))
+    _, stats = so.find_best_days(days, 1_000_000, 3, 1)
+    assert stats["pruned_days"] > 0 and stats["evaluated"] < stats["signatures"]
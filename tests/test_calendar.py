@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+import pytest
+
+import supermarket_optimizer as so
+
+@pytest.mark.parametrize("year", [2025, 2026, 2027])
+def test_index_matches_linear_scan(year):
+    events = list(so.build_event_calendar(year))        # salinan: event_boost_for_day memakai scan linear
+    day = date(year, 1, 1)
+    while day.year == year:
+        ev = so.day_events(day)
+        boost, focus = so.event_boost_for_day(events, day)
+        assert ev.boost == pytest.approx(boost)
+        assert ev.focus == focus
+        assert ev.names == tuple(e.name for e in events if e.day == day)
+        day += timedelta(days=1)
+
+def test_calendar_is_cached_per_year():
+    assert so.cached_event_calendar(2025) is so.cached_event_calendar(2025)
+    assert so.calendar_index(2025) is so.calendar_index(2025)
+    assert so.day_events(date(2025, 1, 3)) is so.NO_EVENTS
+
+def test_calendar_range_across_years():
+    start, end = date(2025, 12, 20), date(2026, 1, 10)
+    full = so.calendar_range(start, end)
+    assert [d for d, _ in full] == [start + timedelta(days=k) for k in range((end - start).days + 1)]
+    only = so.calendar_range(start, end, only_events=True)
+    assert only == [(d, ev) for d, ev in full if ev is not so.NO_EVENTS]
+    assert (date(2025, 12, 25), so.day_events(date(2025, 12, 25))) in only
+
+def test_focus_lookup():
+    lebaran = so.day_events(date(2025, 4, 2))
+    assert lebaran.is_focus("Susu Bubuk")
+    ramadan = so.day_events(date(2025, 3, 10))
+    assert ramadan.is_focus("Sirup") and not ramadan.is_focus("Susu Bubuk")
+    assert not so.NO_EVENTS.is_focus("Sirup")
@@ -0,0 +1,67 @@
+import gzip
+import math
+
+import pytest
+
+import supermarket_optimizer as so
+
+TRUE = {"Soda": (-1.7, 4.0), "Teh": (-0.85, 3.0)}       # kategori -> (elastisitas log-log, ln unit pada harga 1)
+PRICES = (8000, 9000, 10000)
+
+def write_pos(path, stores=(1, 2, 3), days=20):
+    lines = ["date,store_id,category,price,units"]
+    for d in range(days):
+        for sid in stores:
+            for cat, (e, a) in TRUE.items():
+                price = PRICES[(d + sid) % len(PRICES)]
+                units = math.exp(a + e * math.log(price)) * (1 + 0.1 * sid)
+                lines.append(f"2025-01-{d + 1:02d},{sid},{cat},{price},{units:.6f}")
+    lines.append("2025-01-01,1,Soda,9000,0")
+    text = "\n".join(lines) + "\n"
+    path.write_text(text)
+    return text
+
+def test_recovers_elasticity_and_baseline(tmp_path):
+    path = tmp_path / "pos.csv"
+    write_pos(path)
+    stats = so.calibrate_pos([str(path)], 1)
+    assert stats["Soda"][7] == 1
+    fit = so.fit_demand(stats["Teh"], 30)
+    assert fit["loglog_elasticity"] == pytest.approx(-0.85, abs=0.05)
+    assert fit["elasticity"] == pytest.approx(1.0, abs=0.06)
+    assert fit["price_ref"] == max(PRICES)
+    assert so.fit_demand(stats["Teh"], 10_000) is None
+
+def test_chunked_parallel_and_gzip_match(tmp_path, monkeypatch):
+    path = tmp_path / "pos.csv"
+    text = write_pos(path)
+    whole = so.calibrate_pos([str(path)], 1, per_store=True)
+    monkeypatch.setattr(so, "CALIBRATION_CHUNK_BYTES", 300)
+    monkeypatch.setattr(so, "CALIBRATION_GZ_LINES", 7)
+    gz = tmp_path / "pos.csv.gz"
+    with gzip.open(gz, "wt", encoding="utf-8") as f:
+        f.write(text)
+    for stats in (so.calibrate_pos([str(path)], 1, per_store=True), so.calibrate_pos([str(path)], 2, per_store=True),
+                  so.calibrate_pos([str(gz)], 1, per_store=True)):
+        assert set(stats) == set(whole)
+        for key in whole:
+            assert stats[key] == pytest.approx(whole[key])
+
+def test_calibrated_table_and_store_rows(tmp_path):
+    path = tmp_path / "pos.csv"
+    write_pos(path)
+    stats = so.calibrate_pos([str(path)], 1, per_store=True)
+    table, extra = so.calibrated_table(stats, 30)
+    assert set(extra) == set(TRUE)
+    assert table.elasticity[table.ids["Teh"]] == pytest.approx(1.0, abs=0.06)
+    assert table.price[table.ids["Soda"]] == max(PRICES)
+    untouched = next(n for n in so.PARAMS.names if n not in TRUE)
+    assert table.elasticity[table.ids[untouched]] == so.PARAMS.elasticity[so.PARAMS.ids[untouched]]
+    rows = so.store_calibration_rows(stats, 10)
+    assert {(r["store_id"], r["category"]) for r in rows} == {(s, c) for s in (1, 2, 3) for c in TRUE}
+
+def test_missing_pos_column(tmp_path):
+    path = tmp_path / "pos.csv"
+    path.write_text("date,store_id,category,units\n2025-01-01,1,Soda,3\n")
+    with pytest.raises(ValueError, match="price"):
+        so.calibrate_pos([str(path)], 1)
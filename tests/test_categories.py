@@ -0,0 +1,67 @@
+import json
+from datetime import date
+
+import pytest
+
+import supermarket_optimizer as so
+from benchmark_optimizer import synthetic_categories
+
+DAY = date(2025, 11, 11)
+
+def test_builtin_table_matches_category_defaults():
+    table = so.PARAMS
+    assert [r[0] for r in so.CATEGORIES_BUILTIN] == table.names
+    for name in table.names[:10]:
+        cid = table.ids[name]
+        brands = table.brands[cid]
+        assert table.price[cid] == so.avg_price(name)
+        assert table.margin[cid] == so.realistic_margins(name)
+        assert table.elasticity[cid] == so.realistic_elasticity(name, brands)
+
+def test_written_table_round_trips(tmp_path):
+    table = synthetic_categories(120)
+    path = tmp_path / "cats.csv"
+    so.write_category_table(str(path), table)
+    loaded = so.load_category_table(str(path))
+    assert loaded.fingerprint() == table.fingerprint()
+    assert so.PARAMS is loaded and so.CATEGORIES == loaded.rows()
+
+def test_csv_table_with_new_category(tmp_path):
+    path = tmp_path / "cats.csv"
+    path.write_text("name,category,weekly_sales,price,margin,elasticity,trade_eligible,group\n"
+                    "Kopi Sachet,,120,1500,0.2,1.4,ya,Minuman\n"
+                    "Soda,,,,,,,\n")
+    table = so.load_category_table(str(path))
+    assert so.PARAMS is table and so.CATEGORIES == table.rows()
+    kopi = table.ids["Kopi Sachet"]
+    assert (table.weekly_sales[kopi], table.price[kopi], table.margin[kopi], table.elasticity[kopi]) == \
+           (120, 1500, 0.2, 1.4)
+    assert table.eligible[kopi] == 1 and table.sku[kopi] == 1
+    assert table.rows()[table.ids["Soda"]] == next(r for r in so.CATEGORIES_BUILTIN if r[0] == "Soda")
+
+def test_sku_rows_inherit_from_parent_category(tmp_path):
+    path = tmp_path / "skus.json"
+    path.write_text(json.dumps({"rows": [
+        {"name": "Soda 330ml", "category": "Soda", "weekly_sales": 40, "price": 6000},
+        {"name": "Soda", "margin": 0.3},
+    ]}))
+    table = so.load_category_table(str(path))
+    soda = so.compile_category_table([{"name": "Soda"}])
+    sku = table.ids["Soda 330ml"]
+    assert table.parents[sku] == "Soda" and table.price[sku] == 6000 and table.weekly_sales[sku] == 40
+    assert table.elasticity[sku] == soda.elasticity[0] and table.group[sku] == soda.group[0]
+    assert table.margin[table.ids["Soda"]] == 0.3
+    plan_rows, _, _ = so.pick_daily_plan(DAY, 1_000_000)
+    assert {r["category"] for r in plan_rows} <= {"Soda 330ml", "Soda"}
+
+def test_invalid_tables_are_rejected():
+    with pytest.raises(ValueError, match="weekly_sales"):
+        so.compile_category_table([{"name": "Kategori Baru"}])
+    with pytest.raises(ValueError, match="duplikat"):
+        so.compile_category_table([{"name": "Soda"}, {"name": "Soda"}])
+
+def test_fingerprint_tracks_parameters():
+    a = so.compile_category_table([{"name": "Soda"}, {"name": "Teh"}])
+    b = so.compile_category_table([{"name": "Soda"}, {"name": "Teh", "elasticity": 2.5}])
+    assert a.fingerprint() != b.fingerprint()
+    assert a.fingerprint() == so.compile_category_table([{"name": "Soda"}, {"name": "Teh"}]).fingerprint()
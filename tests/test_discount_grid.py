@@ -0,0 +1,36 @@
+from datetime import date
+
+import pytest
+
+import supermarket_optimizer as so
+from conftest import requires_numpy
+
+def test_grids_and_ladder():
+    so.set_discount_grid("fine")
+    assert so.DISCOUNT_GRID == "fine"
+    assert len(so.LADDER) == 2 * len(so.FINE_DISCOUNTS)
+    assert {0.05, 0.10, 0.25, 0.40} <= set(so.FINE_DISCOUNTS)
+    so.set_discount_grid("ladder")
+    assert so.LADDER == [(0.10, "In-Store"), (0.15, "In-Store"), (0.20, "In-Store"),
+                         (0.15, "Trade"), (0.20, "Trade"), (0.25, "Trade")]
+    with pytest.raises(ValueError):
+        so.set_discount_grid("kontinu")
+
+@requires_numpy
+@pytest.mark.parametrize("day", [date(2025, 11, 11), date(2025, 7, 1)])
+def test_fine_grid_best_option_dominates_ladder(day):
+    # Grid halus memuat semua titik tangga, jadi opsi terbaik per (toko, kategori) tidak boleh lebih buruk
+    events = so.day_events(day)
+    best = {}
+    for grid in ("ladder", "fine"):
+        so.set_discount_grid(grid)
+        batch = so.evaluate_options_batch(so.STORES, so.PARAMS, events)
+        best[grid] = so.np.where(batch["ok"], batch["incremental_profit"], -so.np.inf).max(axis=-1)
+    has = best["ladder"] > -so.np.inf
+    assert (best["fine"][has] >= best["ladder"][has] - 1e-6).all()
+    assert (best["fine"][has] > best["ladder"][has] + 1).any()
+
+def test_fine_grid_plan_uses_off_ladder_discounts():
+    so.set_discount_grid("fine")
+    plan_rows, _, _ = so.pick_daily_plan(date(2025, 11, 11), 1_000_000)
+    assert {r["discount_pct"] for r in plan_rows} - {10, 15, 20, 25}
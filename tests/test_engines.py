@@ -0,0 +1,17 @@
+from datetime import date
+
+import pytest
+
+import supermarket_optimizer as so
+from conftest import requires_numpy
+
+@requires_numpy
+@pytest.mark.parametrize("day", [date(2025, 11, 11), date(2025, 3, 15), date(2025, 7, 1)])
+@pytest.mark.parametrize("grid", ["ladder", "fine"])
+def test_numpy_engine_matches_scalar(day, grid):
+    so.set_discount_grid(grid)
+    events = so.day_events(day)
+    scalar = so.choose_scalar(day, so.STORES, events, 1_000_000)
+    batch = so.choose_batch(day, so.STORES, events, 1_000_000)
+    assert [[so.plan_row(day, sid, o) for o in opts] for sid, opts in scalar.items()] == \
+           [[so.plan_row(day, sid, o) for o in opts] for sid, opts in batch.items()]
@@ -0,0 +1,52 @@
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+import supermarket_optimizer as so
+from conftest import requires_numpy
+
+DAYS = [date(2025, 11, 5) + timedelta(days=k) for k in range(14)]
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["supermarket_optimizer.py", *argv])
+    return so.main()
+
+@pytest.mark.parametrize("argv", [
+    ("--cooldown", "2", "--date", "2025-11-11"),
+    ("--cooldown", "2", "--start", "2025-11-01", "--days", "5", "--find-best-days", "3"),
+    ("--fatigue-decay", "0.8", "--start", "2025-11-01", "--days", "5", "--engine", "scalar"),
+    ("--max-promo-days-week", "3", "--start", "2025-11-01", "--days", "5", "--cache-dir", "cache"),
+    ("--max-promo-days-week", "3", "--start", "2025-11-01", "--days", "5", "--incremental", "x.state"),
+])
+def test_fatigue_flags_rejected_outside_rolling_horizon(monkeypatch, tmp_path, capsys, argv):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit) as exc:
+        run_main(monkeypatch, *argv)
+    assert exc.value.code == 2
+    assert "--cooldown" in capsys.readouterr().err
+    assert not (tmp_path / "promotion_plan_optimized.csv").exists()
+
+@requires_numpy
+def test_inactive_rules_match_daily_plans():
+    planner = so.RollingPlanner(so.FatigueRules(), 1_000_000)
+    for day in DAYS[:4]:
+        rolled, free = planner.plan_day(day), so.compute_day(day, 1_000_000)
+        assert {sid: [so.plan_row(day, sid, o) for o in opts] for sid, opts in rolled.items()} == \
+               {sid: [so.plan_row(day, sid, o) for o in opts] for sid, opts in free.items()}
+
+@requires_numpy
+def test_cooldown_and_weekly_cap_are_respected():
+    rules = so.FatigueRules(cooldown=1, max_days_per_week=3, decay=0.9)
+    planner = so.RollingPlanner(rules, 1_000_000)
+    history = {}
+    for day in DAYS:
+        for sid, opts in planner.plan_day(day).items():
+            for o in opts:
+                history.setdefault((sid, o.category), []).append(day)
+    assert history
+    for days in history.values():
+        assert all((b - a).days > rules.cooldown for a, b in zip(days, days[1:]))
+        for d in days:
+            assert sum(d <= x < d + timedelta(days=7) for x in days) <= rules.max_days_per_week
+    assert planner.stats["blocked"] > 0
@@ -0,0 +1,32 @@
+import csv
+from datetime import date
+
+import supermarket_optimizer as so
+
+DAYS = so.horizon_days(date(2025, 11, 9), date(2025, 11, 14))
+
+def run_horizon(tmp_path, name, workers):
+    plan, summary = tmp_path / f"{name}_plan.csv", tmp_path / f"{name}_sum.csv"
+    with so.open_sink(str(plan), "plan") as plan_out, so.open_sink(str(summary), "summary") as sum_out:
+        grand = so.plan_horizon(DAYS, 1_000_000, workers, plan_out, sum_out)
+    with open(plan, newline="") as f1, open(summary, newline="") as f2:
+        return grand, list(csv.DictReader(f1)), list(csv.DictReader(f2))
+
+def test_horizon_days_inclusive():
+    assert DAYS[0] == date(2025, 11, 9) and DAYS[-1] == date(2025, 11, 14) and len(DAYS) == 6
+    assert so.horizon_days(DAYS[0], DAYS[0]) == [DAYS[0]]
+
+def test_parallel_horizon_matches_serial(tmp_path):
+    serial = run_horizon(tmp_path, "serial", 1)
+    parallel = run_horizon(tmp_path, "parallel", 2)
+    assert parallel == serial
+    assert [r["date"] for r in serial[2]] == [d.isoformat() for d in DAYS for _ in so.STORES]
+
+def test_horizon_matches_single_day_plans(tmp_path):
+    grand, plan_rows, sum_rows = run_horizon(tmp_path, "serial", 1)
+    expected_plan, expected_sum = [], []
+    for day in DAYS:
+        rows, sums, _ = so.pick_daily_plan(day, 1_000_000)
+        expected_plan += rows; expected_sum += sums
+    assert plan_rows == [{k: str(v) for k, v in r.items()} for r in expected_plan]
+    assert grand == sum(r["incremental_profit_total"] for r in expected_sum)
@@ -0,0 +1,86 @@
+import json, pickle
+from datetime import date, timedelta
+
+import pytest
+
+import supermarket_optimizer as so
+from conftest import requires_numpy
+
+DAYS = [date(2025, 1, 1) + timedelta(days=k) for k in range(20)]
+
+def rows(plans):
+    return [[so.plan_row(d, sid, o) for sid, opts in p.items() for o in opts] for d, p in zip(DAYS, plans)]
+
+def full_rebuild():
+    return [so.compute_day(d, 1_000_000) for d in DAYS]
+
+def with_margin(table, category, factor, field="margin"):
+    records = so.category_records(table)
+    for r in records:
+        if r["name"] == category:
+            r[field] *= factor
+    return so.compile_category_table(records)
+
+@pytest.mark.parametrize("engine", [pytest.param("numpy", marks=requires_numpy), "scalar"])
+def test_matches_full_rebuild_and_reuses_state(tmp_path, engine):
+    so.ENGINE = engine
+    state = str(tmp_path / "plan.state")
+    planner = so.IncrementalPlanner.load(state)
+    assert rows([planner.choose_day(d, 1_000_000) for d in DAYS]) == rows(full_rebuild())
+    planner.save(state)
+    json.load(open(state, encoding="utf-8"))          # state berformat JSON
+    again = so.IncrementalPlanner.load(state)
+    assert rows([again.choose_day(d, 1_000_000) for d in DAYS]) == rows(full_rebuild())
+    assert again.stats["store_days_reselected"] == 0
+    assert again.changes == []
+
+def test_category_change_reports_changed_plans(tmp_path):
+    planner = so.IncrementalPlanner()
+    for d in DAYS: planner.choose_day(d, 1_000_000)
+    name = so.PARAMS.names[0]
+    so.set_category_table(with_margin(so.PARAMS, name, 0.2))
+    planner.changes = []
+    assert rows([planner.choose_day(d, 1_000_000) for d in DAYS]) == rows(full_rebuild())
+    changed = [c for c in planner.changes if not c["new_plan"]]
+    assert changed
+    assert any(name in c["removed"] + c["modified"] for c in changed)
+    assert planner.stats["selections"] < planner.stats["store_days_reselected"]
+
+@pytest.mark.parametrize("engine", [pytest.param("numpy", marks=requires_numpy), "scalar"])
+def test_param_change_recomputes_only_its_cells(engine):
+    so.ENGINE = engine
+    name = so.PARAMS.names[0]
+    so.set_category_table(with_margin(so.PARAMS, name, 1e-4, "weekly_sales"))   # ROI terlalu kecil: bukan kandidat
+    planner = so.IncrementalPlanner()
+    for d in DAYS: planner.choose_day(d, 1_000_000)
+    signatures = planner.stats["signatures"]
+    so.set_category_table(with_margin(so.PARAMS, name, 1.1))
+    planner.stats = dict.fromkeys(planner.stats, 0)
+    assert rows([planner.choose_day(d, 1_000_000) for d in DAYS]) == rows(full_rebuild())
+    assert planner.stats["cells_evaluated"] == signatures * len(so.STORES)
+    assert planner.stats["store_days_reselected"] == 0
+    other = so.PARAMS.names[1]
+    so.set_category_table(with_margin(so.PARAMS, other, 0.2))
+    planner.stats = dict.fromkeys(planner.stats, 0)
+    assert rows([planner.choose_day(d, 1_000_000) for d in DAYS]) == rows(full_rebuild())
+    assert planner.stats["cells_evaluated"] == signatures * len(so.STORES)
+    assert planner.stats["store_days_reselected"] > 0
+
+def test_state_is_bounded(tmp_path):
+    state = str(tmp_path / "plan.state")
+    planner = so.IncrementalPlanner.load(state, max_days=5)
+    for d in DAYS[:10]: planner.choose_day(d, 1_000_000)
+    planner.save(state)
+    planner = so.IncrementalPlanner.load(state, max_days=5)
+    for d in DAYS[10:13]: planner.choose_day(d, 1_000_000)
+    planner.save(state)
+    kept = set(json.load(open(state, encoding="utf-8"))["plans"])
+    assert kept == {d.isoformat() for d in DAYS[8:13]}
+
+def test_untrusted_or_old_state_starts_fresh(tmp_path):
+    state = tmp_path / "plan.state"
+    state.write_bytes(pickle.dumps({"cells": {}, "plans": {}}))
+    planner = so.IncrementalPlanner.load(str(state))
+    assert planner.plans == {} and planner.run == 1
+    state.write_text(json.dumps({"version": 1, "plans": {"2025-01-01": {}}}))
+    assert so.IncrementalPlanner.load(str(state)).plans == {}
@@ -0,0 +1,43 @@
+from datetime import date
+
+import supermarket_optimizer as so
+from benchmark_optimizer import synthetic_categories
+
+DAY = date(2025, 11, 11)
+
+def rows(day, chosen):
+    return [so.plan_row(day, sid, o) for sid, opts in chosen.items() for o in opts]
+
+def test_key_depends_on_events_not_date():
+    a, b = date(2025, 1, 7), date(2025, 1, 8)
+    assert so.day_events(a) == so.day_events(b)
+    assert so.plan_cache_key(a, 1_000_000) == so.plan_cache_key(b, 1_000_000)
+    assert so.plan_cache_key(DAY, 1_000_000) != so.plan_cache_key(a, 1_000_000)
+
+def test_key_changes_with_planner_inputs():
+    base = so.plan_cache_key(DAY, 1_000_000)
+    assert so.plan_cache_key(DAY, 2_000_000) != base
+    so.SOLVER = "greedy"
+    assert so.plan_cache_key(DAY, 1_000_000) != base
+    so.SOLVER = "exact"
+    so.set_discount_grid("fine")
+    assert so.plan_cache_key(DAY, 1_000_000) != base
+    so.set_discount_grid("ladder")
+    so.set_category_table(synthetic_categories(60))
+    assert so.plan_cache_key(DAY, 1_000_000) != base
+
+def test_key_follows_store_edits():
+    stores = [dict(s) for s in so.STORES]
+    so.set_stores(stores)
+    base = so.plan_cache_key(DAY, 1_000_000)
+    stores[0]["size_m2"] += 100
+    so.set_stores(stores)              # list yang sama (id & panjang tetap), isi berubah
+    assert so.plan_cache_key(DAY, 1_000_000) != base
+
+def test_cache_round_trip(tmp_path):
+    expected = so.compute_day(DAY, 1_000_000)
+    so.PLAN_CACHE = so.PlanCache(str(tmp_path / "cache"))
+    first = so.choose_day(DAY, 1_000_000)
+    second = so.choose_day(DAY, 1_000_000)
+    assert (so.PLAN_CACHE.misses, so.PLAN_CACHE.hits) == (1, 1)
+    assert rows(DAY, first) == rows(DAY, second) == rows(DAY, expected)
@@ -0,0 +1,49 @@
+import json
+import sys
+
+import pytest
+
+import supermarket_optimizer as so
+
+@pytest.fixture
+def unwrapped(monkeypatch):
+    # enable_profiling membungkus fungsi di globals modul; kembalikan versi asli setelah test
+    for name in so.PROFILED_FUNCTIONS:
+        monkeypatch.setattr(so, name, getattr(so, name))
+    monkeypatch.setattr(so.RowSink, "write", so.RowSink.write)
+    monkeypatch.setattr(so, "PROFILER", None)
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["supermarket_optimizer.py", *argv])
+    return so.main()
+
+def test_stage_profiler_records_take_and_merge():
+    prof = so.StageProfiler()
+    with prof.stage("outer"):
+        with prof.stage("inner"):
+            pass
+    with prof.stage("inner"):
+        pass
+    assert prof.stages["inner"][0] == 2 and prof.stages["outer"][0] == 1
+    assert prof.stages["outer"][1] >= prof.stages["inner"][1] / 2
+    snapshot = prof.take()
+    assert prof.stages == {}
+    prof.merge(snapshot); prof.merge(snapshot)
+    assert prof.stages["inner"][0] == 4
+    report = prof.report(1.0)
+    assert report["wall_is_inclusive"] and set(report["stages"]) == {"outer", "inner"}
+
+def test_stage_is_noop_without_profiler(unwrapped):
+    assert so.stage("x") is so.NULL_STAGE
+
+def test_profile_report_and_unchanged_output(unwrapped, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    run_main(monkeypatch, "--date", "2025-11-11", "--no_details", "--plan-out", "a.csv", "--summary-out", "as.csv")
+    run_main(monkeypatch, "--date", "2025-11-11", "--no_details", "--plan-out", "b.csv", "--summary-out", "bs.csv",
+             "--profile", "prof.json")
+    assert (tmp_path / "a.csv").read_bytes() == (tmp_path / "b.csv").read_bytes()
+    assert (tmp_path / "as.csv").read_bytes() == (tmp_path / "bs.csv").read_bytes()
+    report = json.loads((tmp_path / "prof.json").read_text())
+    assert {"pick_daily_plan", "selection", "write_csv"} <= set(report["stages"])
+    assert report["stages"]["selection"]["calls"] == len(so.STORES)
+    assert report["stages"]["pick_daily_plan"]["wall_s"] <= report["total_wall_s"]
@@ -0,0 +1,73 @@
+import sys
+from datetime import date
+
+import pytest
+
+import supermarket_optimizer as so
+
+DAYS = [date(2025, 11, 10), date(2025, 11, 11), date(2025, 12, 1)]
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["supermarket_optimizer.py", *argv])
+    return so.main()
+
+def plan_rows(day, target=1_000_000):
+    return so.pick_daily_plan(day, target)[0]
+
+def write_rollup(path, mode, days, target=1_000_000):
+    with so.AnalyticsRollup(str(path), mode) as rollup:
+        for day in days:
+            rollup.write(plan_rows(day, target))
+    return so.AnalyticsRollup(str(path), "append")
+
+def assert_same(a, b):
+    assert a.dates == b.dates
+    for dim in so.ROLLUP_DIMENSIONS:
+        qa, qb = a.query(dim), b.query(dim)
+        assert set(qa) == set(qb)
+        for key in qa:
+            assert qa[key] == pytest.approx(qb[key])
+
+def test_live_rollup_matches_rebuild(tmp_path):
+    live = write_rollup(tmp_path / "live.json", "overwrite", DAYS)
+    plan = tmp_path / "plan.csv"
+    with so.open_sink(str(plan), "plan") as sink:
+        for day in DAYS: sink.write(plan_rows(day))
+    rebuilt = so.AnalyticsRollup(str(tmp_path / "rebuilt.json"), "overwrite")
+    rebuilt.rebuild([str(plan)])
+    assert_same(live, rebuilt)
+    assert live.query("month")["2025-11"]["count"] == len(plan_rows(DAYS[0])) + len(plan_rows(DAYS[1]))
+
+def test_append_skips_known_dates(tmp_path):
+    path = tmp_path / "r.json"
+    write_rollup(path, "overwrite", DAYS[:2])
+    with so.AnalyticsRollup(str(path), "append") as rollup:
+        rollup.write(plan_rows(DAYS[1], 3_000_000))
+        rollup.write(plan_rows(DAYS[2]))
+        assert rollup.skipped_rows == len(plan_rows(DAYS[1], 3_000_000))
+    assert_same(so.AnalyticsRollup(str(path), "append"), write_rollup(tmp_path / "ref.json", "overwrite", DAYS))
+
+def test_upsert_replaces_date_contributions(tmp_path):
+    path = tmp_path / "r.json"
+    write_rollup(path, "overwrite", DAYS)
+    with so.AnalyticsRollup(str(path), "upsert") as rollup:
+        rollup.write(plan_rows(DAYS[1], 3_000_000))
+        assert rollup.skipped_rows == 0
+    expected = so.AnalyticsRollup(str(tmp_path / "ref.json"), "overwrite")
+    for day, target in ((DAYS[0], 1_000_000), (DAYS[1], 3_000_000), (DAYS[2], 1_000_000)):
+        expected.write(plan_rows(day, target))
+    assert_same(so.AnalyticsRollup(str(path), "append"), expected)
+    assert plan_rows(DAYS[1], 3_000_000) != plan_rows(DAYS[1])
+
+def test_remove_day_drops_empty_cells(tmp_path):
+    rollup = write_rollup(tmp_path / "r.json", "overwrite", DAYS[2:])
+    rollup.remove_day(DAYS[2].isoformat())
+    assert rollup.cells == {} and rollup.dates == set()
+
+def test_plan_overwrite_keeps_rollup(monkeypatch, tmp_path):
+    # --write-mode overwrite (default) hanya mengganti file plan; rollup meng-upsert tanggal yang ditulis
+    monkeypatch.chdir(tmp_path)
+    run_main(monkeypatch, "--date", DAYS[0].isoformat(), "--no_details", "--rollup", "r.json")
+    run_main(monkeypatch, "plan", "--date", DAYS[1].isoformat(), "--rollup", "r.json")
+    run_main(monkeypatch, "--date", DAYS[0].isoformat(), "--no_details", "--rollup", "r.json")
+    assert_same(so.AnalyticsRollup("r.json", "append"), write_rollup(tmp_path / "ref.json", "overwrite", DAYS[:2]))
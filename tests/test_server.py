@@ -0,0 +1,81 @@
+import asyncio
+import json
+from datetime import date
+
+import pytest
+
+import supermarket_optimizer as so
+
+DAY = date(2025, 11, 11)
+
+@pytest.fixture
+def server():
+    srv = so.PlanServer(workers=1, cache_size=8)
+    srv.start()
+    yield srv
+    srv.close()
+
+def call(server, **request):
+    return asyncio.run(server.handle(request))
+
+def stream(server, requests):
+    async def go():
+        reader = asyncio.StreamReader()
+        reader.feed_data("".join(json.dumps(r) + "\n" for r in requests).encode())
+        reader.feed_eof()
+        out = []
+        await server.serve_stream(reader, out.append)
+        return [json.loads(line) for line in b"".join(out).decode().splitlines()]
+    return asyncio.run(go())
+
+def test_plan_and_summary_match_batch_run(server):
+    plan_rows, sum_rows, _ = so.pick_daily_plan(DAY, 1_000_000)
+    assert call(server, op="plan", date=DAY.isoformat())["rows"] == plan_rows
+    assert call(server, op="summary", date=DAY.isoformat())["rows"] == sum_rows
+    assert server.stats["computed"] == 1 and server.stats["cache_hits"] == 1
+
+def test_waiters_survive_eviction():
+    # cache_size=0: entri langsung tergusur sebelum penunggu request yang sama bangun
+    srv = so.PlanServer(workers=1, cache_size=0)
+    srv.start()
+    days = [DAY, date(2025, 12, 12), DAY, date(2025, 12, 12), DAY]
+    async def go():
+        return await asyncio.gather(*(srv.chosen(d, 1_000_000) for d in days))
+    try:
+        results = asyncio.run(go())
+    finally:
+        srv.close()
+    assert not srv.plans and srv.stats["computed"] == 2
+    for d, chosen in zip(days, results):
+        assert sorted(chosen) == [st["store_id"] for st in so.STORES]
+        assert chosen == results[days.index(d)]
+
+def test_store_filter_and_analytics(server):
+    sid = so.STORES[0]["store_id"]
+    rows = call(server, op="plan", date=DAY.isoformat(), store_id=str(sid))["rows"]
+    assert rows and {r["store_id"] for r in rows} == {sid}
+    result = call(server, op="analytics", date=DAY.isoformat())
+    assert set(result) == {"categories", "summary"}
+
+def test_stream_responses_and_errors(server):
+    responses = stream(server, [
+        {"id": 1, "op": "ping"},
+        {"id": 2, "op": "plan", "date": DAY.isoformat(), "store_id": 999999},
+        {"id": 3, "op": "nope"},
+        {"id": 4, "op": "summary", "date": DAY.isoformat()},
+        {"id": 5, "op": "summary", "date": DAY.isoformat()},
+        {"id": 6, "op": "stats"},
+    ])
+    by_id = {r["id"]: r for r in responses}
+    assert by_id[1] == {"id": 1, "ok": True, "result": {"pong": True}}
+    assert not by_id[2]["ok"] and "store_id" in by_id[2]["error"]
+    assert not by_id[3]["ok"] and "op" in by_id[3]["error"]
+    assert by_id[4]["result"] == by_id[5]["result"]
+    assert server.stats["computed"] == 1
+    assert server.stats["errors"] == 2
+
+def test_cache_is_bounded(server):
+    server.cache_size = 2
+    for target in (500_000, 1_000_000, 2_000_000):
+        call(server, op="summary", date=DAY.isoformat(), target=target)
+    assert len(server.plans) == 2
@@ -0,0 +1,52 @@
+from datetime import date
+
+import pytest
+
+import supermarket_optimizer as so
+from conftest import requires_numpy
+
+DAY = date(2025, 11, 11)
+
+pytestmark = requires_numpy
+
+def random_rows(n, C, seed=7):
+    np = so.load_numpy()
+    rng = np.random.default_rng(seed)
+    profit = rng.choice([0.0, 1.0, 2.0, 3.0], size=(n, C)) * 1e5 + rng.uniform(0, 4e5, size=(n, C))
+    roi = rng.uniform(0.1, 1.0, size=(n, C))
+    has = rng.random((n, C)) < 0.8
+    groups = rng.integers(0, 4, size=C).astype(np.intp)
+    max_promos = rng.integers(3, 13, size=n)
+    return profit, roi, has, groups, max_promos
+
+def scalar_total(profit, roi, has, groups, max_promos, target):
+    np = so.load_numpy()
+    cats = np.arange(len(profit))[has]
+    order = cats[np.lexsort((cats, -roi[cats], -profit[cats]))]
+    profits = profit[order].tolist()
+    return sum(profits[i] for i in so.select_plan(groups[order].tolist(), profits, int(max_promos), target))
+
+@pytest.mark.parametrize("solver", ["greedy", "exact"])
+@pytest.mark.parametrize("target", [500_000, 1_000_000, 5_000_000])
+def test_plan_profit_batch_matches_select_plan(solver, target):
+    so.SOLVER = solver
+    profit, roi, has, groups, max_promos = random_rows(300, 12)
+    totals = so.plan_profit_batch(profit, roi, has, groups, max_promos, target)
+    expected = [scalar_total(profit[i], roi[i], has[i], groups, max_promos[i], target) for i in range(len(profit))]
+    assert totals.tolist() == pytest.approx(expected)
+
+def test_zero_noise_reproduces_plan():
+    _, _, chosen = so.pick_daily_plan(DAY, 1_000_000)
+    sim = so.simulate_plan(DAY, chosen, 50, elas_sd=0, boost_sd=0, noise_sd=0, reoptimize=True)
+    for draw in range(50):
+        assert sim["store_incr"][draw] == pytest.approx(sim["planned_store_incr"])
+        assert sim["reopt_store_incr"][draw] == pytest.approx(sim["planned_store_incr"])
+
+def test_reoptimize_is_at_least_plan_and_seeded():
+    _, _, chosen = so.pick_daily_plan(DAY, 1_000_000)
+    a = so.simulate_plan(DAY, chosen, 200, seed=3, reoptimize=True)
+    b = so.simulate_plan(DAY, chosen, 200, seed=3, reoptimize=True)
+    np = so.load_numpy()
+    assert np.array_equal(a["reopt_store_incr"], b["reopt_store_incr"])
+    assert a["reopt_store_incr"].shape == (200, len(so.STORES))
+    assert (a["reopt_store_incr"].sum(axis=1) >= a["store_incr"].sum(axis=1) - 1e-6).mean() > 0.9
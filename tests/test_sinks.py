@@ -0,0 +1,45 @@
+import csv, gzip, json, sqlite3
+
+import pytest
+
+import supermarket_optimizer as so
+
+def rows(day, n, value):
+    return [{"date": day, "store_id": i + 1, "incremental_profit": value} for i in range(n)]
+
+def read_back(path):
+    if path.endswith((".db", ".sqlite")):
+        conn = sqlite3.connect(path)
+        try:
+            cur = conn.execute("SELECT date, store_id, incremental_profit FROM plan ORDER BY date, store_id")
+            return [(d, int(s), int(v)) for d, s, v in cur]
+        finally:
+            conn.close()
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if ".jsonl" in path:
+            recs = [json.loads(line) for line in f]
+        else:
+            recs = list(csv.DictReader(f))
+    return sorted((r["date"], int(r["store_id"]), int(r["incremental_profit"])) for r in recs)
+
+def write(path, mode, batch):
+    with so.open_sink(path, "plan", mode) as sink:
+        sink.write(batch)
+
+@pytest.mark.parametrize("suffix", [".csv", ".csv.gz", ".jsonl", ".jsonl.gz", ".db"])
+def test_append_and_upsert(tmp_path, suffix):
+    path = str(tmp_path / ("plan" + suffix))
+    write(path, "overwrite", rows("2025-01-01", 2, 10) + rows("2025-01-02", 2, 20))
+    write(path, "append", rows("2025-01-03", 1, 30))
+    assert [r[0] for r in read_back(path)] == ["2025-01-01"] * 2 + ["2025-01-02"] * 2 + ["2025-01-03"]
+    # Upsert mengganti seluruh baris tanggal yang ditulis ulang, tanggal lain tetap
+    write(path, "upsert", rows("2025-01-02", 3, 99))
+    assert read_back(path) == [("2025-01-01", 1, 10), ("2025-01-01", 2, 10), ("2025-01-02", 1, 99),
+                               ("2025-01-02", 2, 99), ("2025-01-02", 3, 99), ("2025-01-03", 1, 30)]
+    write(path, "overwrite", rows("2025-02-01", 1, 5))
+    assert read_back(path) == [("2025-02-01", 1, 5)]
+
+def test_unknown_write_mode(tmp_path):
+    with pytest.raises(ValueError):
+        so.open_sink(str(tmp_path / "x.csv"), "plan", "merge")
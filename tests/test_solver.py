@@ -0,0 +1,43 @@
+import itertools, random
+from collections import Counter
+
+import pytest
+
+import supermarket_optimizer as so
+
+def brute_force(groups, profits, group_cap, limit):
+    best = 0.0
+    for k in range(limit + 1):
+        for combo in itertools.combinations(range(len(groups)), k):
+            if max(Counter(groups[i] for i in combo).values(), default=0) <= group_cap:
+                best = max(best, sum(profits[i] for i in combo))
+    return best
+
+def random_candidates(rng, n):
+    profits = sorted((rng.uniform(-50_000, 600_000) for _ in range(n)), reverse=True)
+    return [rng.randrange(4) for _ in range(n)], profits
+
+@pytest.mark.parametrize("seed", range(20))
+def test_group_knapsack_is_optimal(seed):
+    rng = random.Random(seed)
+    groups, profits = random_candidates(rng, rng.randrange(1, 11))
+    cap, limit = rng.choice([2, 3]), rng.randrange(1, 6)
+    chosen = so._group_knapsack(groups, profits, cap, limit)
+    assert len(chosen) <= limit
+    assert max(Counter(groups[i] for i in chosen).values(), default=0) <= cap
+    assert sum(profits[i] for i in chosen) == pytest.approx(brute_force(groups, profits, cap, limit))
+
+@pytest.mark.parametrize("seed", range(20))
+def test_exact_never_worse_than_greedy(seed):
+    rng = random.Random(seed)
+    groups, profits = random_candidates(rng, 12)
+    profits = [max(p, 1.0) for p in profits]
+    for target in (0, 1_000_000, 5_000_000):
+        greedy = so.select_greedy(groups, profits, 5, target)
+        exact = so.select_exact(groups, profits, 5, target)
+        if sum(profits[i] for i in greedy) >= 0.7 * target:
+            assert sum(profits[i] for i in exact) >= sum(profits[i] for i in greedy) - 1e-6
+
+def test_greedy_respects_group_cap():
+    groups, profits = [0, 0, 0, 1, 1, 2], [9.0, 8.0, 7.0, 6.0, 5.0, 4.0]
+    assert so.select_greedy(groups, profits, 4, 0) == [0, 1, 3, 4]
@@ -0,0 +1,24 @@
+from datetime import date
+
+import supermarket_optimizer as so
+from benchmark_optimizer import synthetic_stores
+
+NO_EVENT_DAY = date(2025, 1, 2)
+
+def test_parallel_store_chunks_keep_stores_without_promotions():
+    so.set_stores(synthetic_stores(300))
+    assert len(so.STORES) >= so.PARALLEL_STORE_MIN
+    so.STORE_WORKERS = 1
+    serial = so.compute_day(NO_EVENT_DAY, 1_000_000)
+    so.STORE_WORKERS = 2
+    parallel = so.compute_day(NO_EVENT_DAY, 1_000_000)
+    assert list(parallel) == [st["store_id"] for st in so.STORES]
+    assert any(not opts for opts in parallel.values())
+    assert {sid: [so.plan_row(NO_EVENT_DAY, sid, o) for o in opts] for sid, opts in parallel.items()} == \
+           {sid: [so.plan_row(NO_EVENT_DAY, sid, o) for o in opts] for sid, opts in serial.items()}
+    plan_rows, sum_rows, _ = so.pick_daily_plan(NO_EVENT_DAY, 1_000_000)
+    assert len(sum_rows) == len(so.STORES)
+
+def test_option_table_by_store_seeds_empty_stores():
+    table = so.OptionTable()
+    assert table.by_store([1, 2]) == {1: [], 2: []}
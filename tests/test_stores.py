@@ -0,0 +1,39 @@
+from datetime import date
+
+import supermarket_optimizer as so
+from benchmark_optimizer import synthetic_stores
+
+def test_store_scales_follow_in_place_edits():
+    stores = synthetic_stores(20)
+    so.set_stores(stores)
+    before = dict(so.store_scales())
+    stores[3]["size_m2"] *= 3
+    so.set_stores(stores)
+    after = so.store_scales()
+    assert after[stores[3]["store_id"]] > before[stores[3]["store_id"]]
+    for s in stores:
+        assert abs(after[s["store_id"]] - so.store_scale(s, stores)) < 1e-12
+
+def test_store_scales_new_list_same_length():
+    so.set_stores(synthetic_stores(10, seed=1))
+    first = dict(so.store_scales())
+    so.STORES = synthetic_stores(10, seed=2)     # tanpa set_stores: list baru tetap terdeteksi lewat id
+    assert so.store_scales() != first
+
+def test_store_scales_cached_per_version():
+    stores = synthetic_stores(10)
+    so.set_stores(stores)
+    first = so.store_scales()
+    assert so.store_scales() is first
+    so.set_stores(stores)
+    assert so.store_scales() is not first
+
+def test_load_stores_plan(tmp_path):
+    path = tmp_path / "stores.csv"
+    rows = synthetic_stores(5)
+    path.write_text("store_id,open_year,size_m2,sku_count,employees\n" +
+                    "".join(f"{s['store_id']},{s['open_year']},{s['size_m2']},{s['sku_count']},{s['employees']}\n"
+                            for s in rows))
+    so.load_stores(str(path))
+    chosen = so.choose_day(date(2025, 11, 11), 1_000_000)
+    assert sorted(chosen) == [s["store_id"] for s in rows]
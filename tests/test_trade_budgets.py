@@ -0,0 +1,58 @@
+import sys
+from datetime import date
+
+import pytest
+
+import supermarket_optimizer as so
+from benchmark_optimizer import synthetic_stores
+from conftest import requires_numpy
+
+DAYS = [date(2025, 11, 10), date(2025, 11, 11), date(2025, 11, 12)]
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["supermarket_optimizer.py", *argv])
+    return so.main()
+
+def test_trade_budgets_rejects_scalar_engine(monkeypatch, tmp_path, capsys):
+    budgets = tmp_path / "budgets.csv"
+    budgets.write_text("category,budget\nSoda,1000000\n")
+    with pytest.raises(SystemExit) as exc:
+        run_main(monkeypatch, "--engine", "scalar", "--trade-budgets", str(budgets))
+    assert exc.value.code == 2
+    assert "--trade-budgets" in capsys.readouterr().err
+
+@requires_numpy
+def test_loose_budget_matches_unconstrained_plan():
+    so.set_stores(synthetic_stores(30))
+    category = so.PARAMS.parents[0]
+    plans, report = so.allocate_trade_budgets(DAYS, [so.TradeBudget("category", category, "", 1e12)],
+                                              1_000_000, 1)
+    assert report["constraints"][0]["lambda"] == 0
+    assert report["iterations"] == 0                   # λ=0 sudah layak: tanpa iterasi subgradien
+    for day in DAYS:
+        free = so.compute_day(day, 1_000_000)
+        assert {sid: [so.plan_row(day, sid, o) for o in opts] for sid, opts in plans[day].items()} == \
+               {sid: [so.plan_row(day, sid, o) for o in opts] for sid, opts in free.items()}
+
+@requires_numpy
+def test_tight_budget_is_respected():
+    so.set_stores(synthetic_stores(30))
+    category = so.PARAMS.parents[0]
+    _, free = so.allocate_trade_budgets(DAYS, [so.TradeBudget("category", category, "", 1e12)], 1_000_000, 1)
+    amount = free["constraints"][0]["spent"] / 2
+    plans, report = so.allocate_trade_budgets(DAYS, [so.TradeBudget("category", category, "", amount)],
+                                              1_000_000, 1)
+    assert report["constraints"][0]["spent"] <= amount
+    assert report["profit"] <= report["free_profit"]
+    assert set(plans) == set(DAYS)
+    assert all(len(plans[day]) == len(so.STORES) for day in DAYS)
+
+@requires_numpy
+def test_subgradient_stops_when_multipliers_settle():
+    so.set_stores(synthetic_stores(30))
+    category = so.PARAMS.parents[0]
+    _, free = so.allocate_trade_budgets(DAYS, [so.TradeBudget("category", category, "", 1e12)], 1_000_000, 1)
+    budget = [so.TradeBudget("category", category, "", free["constraints"][0]["spent"] / 2)]
+    _, full = so.allocate_trade_budgets(DAYS, budget, 1_000_000, 1, iterations=500)
+    assert full["iterations"] < 500
+    assert full["constraints"][0]["spent"] <= budget[0].amount